@@ -32,6 +32,8 @@ defaultChineseLanguage = 'Chinese (simplified)'
 defaultPortugueseLanguage = 'Portuguese (European)'
 
 validSpreadsheetExtensions = [ '.csv', '.xlsx', '.xls', '.ods', '.tsv' ]
+# if cacheFile ends with one of these, then the cache will be stored in an SQLite database instead of a spreadsheet. This scales much better for large caches because changes are written incrementally instead of exporting the entire cache every time it is saved.
+validSQLiteExtensions = [ '.sqlite', '.sqlite3', '.db' ]
 defaultAddress = 'http://localhost'
 defaultKoboldCppPort = 5001
 defaultPy3translationServerPort = 14366
@@ -41,6 +43,10 @@ maximumPortNumber = 65535 #16 bit integer -1
 defaultPortForHTTP = 80
 defaultPortForHTTPS = 443
 defaultTimeout = 360 # Per request to translation engine in seconds. Set to 0 to disable.
+# The number of translation requests that can be waiting on the translation engine at the same time when batches are not being used. 1 means submit one entry at a time. Higher values only help if the server can process requests in parallel, like KoboldCpp with --multiuser. Concurrent requests are always disabled when contextHistory is enabled since every translation depends on the previous one.
+defaultMaxConcurrentRequests = 1
+# The number of processes used by local translation engines, like pykakasi and cutlet, to translate large batches at the same time. 1 means translate everything in the current process. 0 means one process per CPU core.
+defaultProcesses = 1
 
 # LLMs tend to hallucinate, so setting this overly high tends to corrupt the output. It should also be reset back to 0 periodically, like when it gets full, so the corruption of one bad entry does not spread too much. Sane values are 4-10.
 defaultContextHistoryMaxLength = 6
@@ -49,13 +55,24 @@ defaultEnableBatchesForLLMs = False
 # Valid options for defaultBatchSizeLimit are an integer or None. Sensible limits are 100-10000 depending upon hardware. In addition to this setting, translation engines also have internal limiters.
 #defaultBatchSizeLimit = None
 defaultBatchSizeLimit = 1000
+# For adaptiveBatchSize. The batch size starts small and is adjusted after every request, but always stays between adaptiveBatchSizeMinimum and batchSizeLimit. Requests that take longer than the target latency make the batch size smaller.
+defaultAdaptiveBatchSizeMinimum = 1
+defaultAdaptiveBatchSizeTargetLatency = 30 # In seconds.
+# The maximum amount of text in each request to the translation engine when batches are enabled. 0 means no limit, so only batchSizeLimit applies.
+defaultMaxCharactersPerRequest = 0
+defaultMaxTokensPerRequest = 0
 defaultSceneSummaryLength = 40
+# The number of batches ahead of the current one that scene summaries are generated for while the current batch is being translated. 0 means generate every summary right before its batch is translated.
+defaultSceneSummaryPrefetch = 0
 defaultInputTextEncodingErrorHandler = 'strict'
 #defaultOutputTextEncodingErrorHandler = 'namereplace'  # This get set dynamically further below.
 
 defaultLinesThatBeginWithThisAreComments = '#'
 defaultAssignmentOperatorInSettingsFile = '='
 defaultMetadataDelimiter = '_'
+# Flags for every row in programSettings[ 'translatedRows' ]. See: buildTranslatedRows()
+translatedInSpreadsheetFlag = 1
+translatedInCacheFlag = 2
 defaultScriptSettingsFileExtension = '.ini'
 # if a column begins with one of these entries, then it will be assumed to be invalid for cacheAnyMatch. Case insensitive.
 defaultBlacklistedHeadersForCache = [ 'rawText', 'speaker', 'hashedText', 'metadata' ] #'cache', 'cachedEntry', 'cache entry'
@@ -73,11 +90,17 @@ defaultSceneSummaryCacheLocation = defaultBackupsFolder + '/sceneSummaryCache' +
 defaultMinimumSaveIntervalForMainSpreadsheet = 540 #240 # In seconds. 240 is every 4 minutes. 540 is every 9 minutes
 #defaultMinimumSaveIntervalForCache = 60 # For debugging.
 defaultMinimumSaveIntervalForCache = 300 # In seconds. 300 if 5 min. 240 is once every four minutes which means that, at most, only four minutes worth of processing time should be lost due to a program or translation engine error.
+# SQLite commits only write the entries that changed, so they are cheap enough to do much more often than exporting cache.xlsx.
+defaultMinimumCommitIntervalForSQLiteCache = 10 # In seconds.
+# When the journal is enabled, every translation is also appended to a journal file that can be replayed after a crash, so cache.xlsx and mainSpreadsheet backups do not need to be exported nearly as often. Exporting a large cache.xlsx can take a long time.
+defaultMinimumSaveIntervalForCacheWithJournal = 3600 # In seconds. 3600 is 1 hour.
+defaultMinimumSaveIntervalForMainSpreadsheetWithJournal = 3600 # In seconds.
+defaultJournalExtension = '.journal'
 defaultMinimumSaveIntervalForSceneSummaryCache = 240 # In seconds. 540 is 9 minutes. 300 is 5 min. SceneSummary tends to be a large number of lines compressed into relatively few entries, and be missing translationEngines that do not support the sceneSummary feature, so it should not grow in size as much as regular cache and mainSpreadsheet. For that reason, backing it up more often should not impose an undo burden on the hardware. 
 
 # These two lists do not determine if the values are True/ False by default. Use action='store_true' and 'store_false' in the CLI options to toggle defaults and then update these two lists. These lists ensure the values are toggled correctly if a different than default setting is specified in program.ini when merging the CLI options with the options from the .ini .
-booleanValuesTrueByDefault = [ 'cache', 'contextHistory', 'contextHistoryReset', 'batches', 'backups']
-booleanValuesFalseByDefault = [ 'cacheAnyMatch', 'overwriteWithCache', 'overwriteWithSpreadsheet', 'reTranslate', 'readOnlyCache', 'sceneSummaryEnableTranslation', 'batchesEnabledForLLMs', 'rebuildCache', 'resume', 'testRun', 'verbose', 'debug', 'version' ]
+booleanValuesTrueByDefault = [ 'cache', 'contextHistory', 'contextHistoryReset', 'batches', 'backups', 'journal' ]
+booleanValuesFalseByDefault = [ 'cacheAnyMatch', 'overwriteWithCache', 'overwriteWithSpreadsheet', 'reTranslate', 'readOnlyCache', 'sceneSummaryEnableTranslation', 'batchesEnabledForLLMs', 'stablePrompt', 'adaptiveBatchSize', 'rebuildCache', 'resume', 'streaming', 'testRun', 'verbose', 'debug', 'version' ]
 
 translationEnginesAvailable = 'cacheOnly, koboldcpp, py3translationserver, sugoi, deepl_api_free, deepl_api_pro, deepl_web, pykakasi, cutlet'
 usageHelp = 'Usage: python py3TranslateLLM --help Translation Engines: \n' + translationEnginesAvailable + '. Example: py3TranslateLLM -te KoboldCpp -f myInputFile.ks.xlsx -sl jpn -tl eng'
@@ -97,16 +120,27 @@ import time                                   # Used to write out cache no more
 
 # Technically, these two are optional for parseOnly. To support or not support such a thing... probably yes. # Update: Maybe. # Update removed parseOnly. Added --testRun functionality as a replacement.
 #from collections import deque  # Used to hold rolling history of translated items to use as context for new translations.
+import itertools                            # For itertools.islice(). Used to read the next batch of rows when streaming.
 import collections                         # Newer syntax. For collections.deque. Used to hold rolling history of translated items to use as context for new translations.
 #import queue                               # collections.deque is probably better but it lacks a lot of the methods, like full/empty booleans, that make queue convenient. Just give up and use lists instead. This needs to be changed to a superset of deque or something. Maybe a custom data structure based on lists?
 import hashlib                              # Allow calculating the sha1 hash for batches of entries when using the experimental sceneSummary feature.
+import concurrent.futures              # Used to keep multiple requests in flight at the same time for translation engines that can process them in parallel. See: maxConcurrentRequests.
 
-import requests                            # Do basic http stuff, like submitting post/get requests to APIs. Must be installed using: 'pip install requests' # Update: Moved to functions.py # Update: Also imported here because it can be useful to parse exceptions (errors) when submitting entries for translation.
+# The libraries below take a long time to import but are not needed for every job, so they are only imported when they are first used. This must come before the other libraries in resources/ so that they get the same lazy modules when they import them. See: resources/lazyImport.py
+# The translation engines are also only imported once --translationEngine is known. See: validateUserInput()
+import resources.lazyImport as lazyImport
+requests = lazyImport.lazyImport( 'requests' )    # Do basic http stuff, like submitting post/get requests to APIs. Must be installed using: 'pip install requests' # Update: Moved to functions.py # Update: Also imported here because it can be useful to parse exceptions (errors) when submitting entries for translation.
 
 #import openpyxl                           # Used as the core internal data structure and to read/write xlsx files. Must be installed using pip. # Update: Moved to chocolate.py
 import resources.chocolate as chocolate # Implements openpyxl. A helper/wrapper library to aid in using openpyxl as a datastructure.
 import resources.dealWithEncoding as dealWithEncoding   # dealWithEncoding implements the 'chardet' library which is installed with 'pip install chardet'  Same with 'pip install charamel' and 'pip install charset-normalizer'
 import resources.functions as functions  # Moved most generic functions here to increase code readability and enforce function best practices for logic not directly relevant to main().
+import resources.sqliteCache as sqliteCache # Optional SQLite backend for cache. Uses the sqlite3 library included with Python.
+import resources.journal as journal    # Append-only journal for translations so they are not lost if the program crashes in between backups.
+import resources.dictionaryReplacer as dictionaryReplacer # Applies preTranslationDictionary, revertAfterTranslationDictionary, and postTranslationDictionary in a single pass per line.
+import resources.requestPacker as requestPacker # Splits batches into requests of about the same size for maxCharactersPerRequest and maxTokensPerRequest.
+import resources.languageCodes as languageCodes # Reads languageCodes.csv once into an index file so finding the source and target languages does not require reading the spreadsheet every time.
+import resources.translationEngines.loadBalancer as loadBalancer # Spreads requests across several servers when --address has more than one.
 
 # The above syntax assumes all of the libraries are under resources. To import the libraries directly regardless of where they are on the file system:
 # import sys
@@ -116,11 +150,8 @@ import resources.functions as functions  # Moved most generic functions here to
 
 #from resources.functions import * # Do not use this syntax if at all possible. The * is fine, but the 'from' breaks everything because it copies everything instead of pointing to the original resources which makes updating library variables borderline impossible.
 
-try:
-    import tqdm                             # Optional library to add pretty progress bars.
-    tqdmAvailable = True
-except:
-    tqdmAvailable = False
+tqdm = lazyImport.lazyImport( 'tqdm', optional=True )  # Optional library to add pretty progress bars.
+tqdmAvailable = tqdm != None
 
 #Using the 'namereplace' error handler for text encoding requires Python 3.5+, so use an older one if necessary.
 if sys.version_info.minor >= 5:
@@ -177,7 +208,7 @@ def createCommandLineOptions():
     commandLineParser.add_argument( '-postwde', '--postWritingToFileDictionaryEncoding', help='The encoding of file postWritingToFile.csv. Default=' + str( defaultTextEncoding ), default=None, type=str )
 
     commandLineParser.add_argument( '-c', '--cache', help='Toggles cache. Specifying this will disable using or updating the cache file for translated entries. Default=Use the cache file to fill in previously translated entries and update it with new entries to speed up future translations.', action='store_false' )
-    commandLineParser.add_argument( '-cf', '--cacheFile', help='The location of the cache file. Must be in a spreadsheet format like .xlsx. Default=' + str( defaultCacheFileLocation ), default=None, type=str )
+    commandLineParser.add_argument( '-cf', '--cacheFile', help='The location of the cache file. Must be in a spreadsheet format like .xlsx or an SQLite database ending in .sqlite. SQLite scales better for large caches. Default=' + str( defaultCacheFileLocation ), default=None, type=str )
     commandLineParser.add_argument( '-cam', '--cacheAnyMatch', help='Use all translation engines when considering the cache. Default=Only consider the current translation engine as valid for cache hits.', action='store_true' )
     commandLineParser.add_argument( '-owc', '--overwriteWithCache', help='Override any already translated lines in mainSpreadsheet with results from the cache. Default=Do not override already translated lines. This setting is overridden by reTranslate. This setting takes precedence over overwriteWithSpreadsheet.', action='store_true' )
     commandLineParser.add_argument( '-ows', '--overwriteWithSpreadsheet', help='Override any already translated lines in the cache using mainSpreadsheet. Default=Do not override the cache. This setting is overridden by reTranslate. overwriteWithCache takes precedence over this setting.', action='store_true' )
@@ -198,18 +229,30 @@ def createCommandLineOptions():
     commandLineParser.add_argument( '-ssl', '--sceneSummaryLength', help='Experimental feature. The number of entries that should be summarized at any one time. If batches are enabled, batches and this will be reduced to the same number depending on whichever is lower. Set to 0 to disable limits when generating a summary. Reasonable amounts are 40-100. Default=' + str( defaultSceneSummaryLength ), default=None, type=int )
     commandLineParser.add_argument( '-sset', '--sceneSummaryEnableTranslation', help='Enable the use of summaries of untranslated text when translating data. This always requires prompt.txt and sceneSummaryPrompt.txt files. sceneSummaryCache.xlsx will be used as cache. Default=Do not translate when generating a summary. The summary will be inserted in place of {scene} of memory.txt and prompt.txt', action='store_true' )
     commandLineParser.add_argument( '-sscf', '--sceneSummaryCacheFile', help='Experimental feature. The location of the sceneSummaryCache.xlsx which stores a cache of every previously generated summary. Default=' + defaultSceneSummaryCacheLocation, default=None, type=str )
+    commandLineParser.add_argument( '-sspf', '--sceneSummaryPrefetch', help='Experimental feature. The number of batches ahead of the current one to generate scene summaries for in the background while the current batch is being translated. This hides the time needed to generate summaries, but the server must be able to process two requests at the same time, like KoboldCpp with --multiuser. Not supported with --streaming. Default=' + str( defaultSceneSummaryPrefetch ), default=None, type=int )
     commandLineParser.add_argument( '-sscam', '--sceneSummaryCacheAnyMatch', help='Use all translation engines when considering the cache. Default=Only consider the current translation engine as valid for cache hits. This setting only affects sceneSummaryCache.', action='store_true' )
 
     commandLineParser.add_argument( '-b', '--batches', help='Toggles if entries should be submitted for translations engines that support them. Enabling batches disables context history. Default=Batches are automatically enabled for NMTs that support batches and web APIs like DeepL, but disabled for LLMs. Specifying this will disable them globally for all engines.', action='store_false' )
     commandLineParser.add_argument( '-bllm', '--batchesEnabledForLLMs', help='For translation engines that support both batches and single translations, should batches be enabled? Batches are automatically enabled for NMTs that support batches and DeepL regardless of this setting. Enabling batches for LLMs disables context history. Default=' + str( defaultEnableBatchesForLLMs ), action='store_true' )
     commandLineParser.add_argument( '-bsl', '--batchSizeLimit', help='Specify the maximum number of translations that should be sent to the translation engine if that translation engine supports batches. Not all translation engines support batches. Set to 0 to not place any limits on the size of batches. Some translation engines might also have their own internal limiters not affected by this setting. If the scene summary feature is enabled, this and sceneSummaryLength will be reduced to the same number depending on whichever is lower. Default=' + str( defaultBatchSizeLimit ), default=None, type=int )
-
-    commandLineParser.add_argument( '-a', '--address', help='Specify the protocol and IP for NMT/LLM server, Example: http://192.168.0.100', default=None,type=str )
+    commandLineParser.add_argument( '-abs', '--adaptiveBatchSize', help='For py3translationServer. Split every batch into smaller batches and adjust their size after every request based on how long the server took and how many lines per second it translated. The batch size grows while requests finish within --adaptiveBatchSizeTargetLatency and is cut in half when they take longer or time out, so throughput is maximized without tuning --batchSizeLimit for every server. --batchSizeLimit is the largest batch size allowed. Default=Send every batch in a single request.', action='store_true' )
+    commandLineParser.add_argument( '-absmin', '--adaptiveBatchSizeMinimum', help='For --adaptiveBatchSize. The smallest batch size allowed. Default=' + str( defaultAdaptiveBatchSizeMinimum ), default=None, type=int )
+    commandLineParser.add_argument( '-abstl', '--adaptiveBatchSizeTargetLatency', help='For --adaptiveBatchSize. The number of seconds each request should take at most. Must be lower than --timeout. Default=' + str( defaultAdaptiveBatchSizeTargetLatency ), default=None, type=int )
+    commandLineParser.add_argument( '-mcpr', '--maxCharactersPerRequest', help='For translation engines that support batches. The maximum number of characters in each request to the translation engine. Every batch is packed into as few requests as possible, in order, without going over this limit, so requests have about the same amount of text no matter how long the lines are. Entries longer than this are sent by themselves. Set to 0 to disable. Default=' + str( defaultMaxCharactersPerRequest ), default=None, type=int )
+    commandLineParser.add_argument( '-mtpr', '--maxTokensPerRequest', help='For translation engines that support batches. The same as --maxCharactersPerRequest, but counts tokens using --tokenizer. Set to 0 to disable. Default=' + str( defaultMaxTokensPerRequest ), default=None, type=int )
+    commandLineParser.add_argument( '-tok', '--tokenizer', help='The tokenizer used to count tokens for --maxTokensPerRequest. Valid tokenizers: ' + requestPacker.availableTokenizers + '. Example: sentencepiece:C:/Sugoi/fairseq/spmModels/spm.ja.nopretok.model Default=' + str( requestPacker.defaultTokenizer ), default=None, type=str )
+
+    commandLineParser.add_argument( '-a', '--address', help='Specify the protocol and IP for NMT/LLM server, Example: http://192.168.0.100 For KoboldCpp and py3translationServer, several servers can be specified by separating them with commas. Each server can have its own port. Requests are sent to the server with the fewest requests in progress. All servers must have the same model loaded. Example: http://192.168.0.100:5001,http://192.168.0.101:5001', default=None,type=str )
     commandLineParser.add_argument( '-port', '--port', help='Specify the port for the NMT/LLM server. Example: 5001', default=None, type=int )
     commandLineParser.add_argument( '-to', '--timeout', help='Specify the maximum number of seconds each individual request can take before quiting. Default=' + str( defaultTimeout ), default=None, type=int )
+    commandLineParser.add_argument( '-sp', '--stablePrompt', help='For KoboldCpp. Keep the start of every prompt the same and only add the history and the current line to the end, so KoboldCpp can reuse the already processed part of the context instead of processing the entire prompt again for every line. With --verbose, the number of reused tokens is printed at the end. Works best with --contextHistoryReset left enabled. Default=Build the entire prompt from prompt.txt for every line.', action='store_true' )
+    commandLineParser.add_argument( '-mcr', '--maxConcurrentRequests', help='Specify the maximum number of translation requests that can be submitted to the translation engine at the same time when batches are not being used. Only useful if the server can process multiple requests in parallel, like KoboldCpp with --multiuser. Translations are still written to the spreadsheet in order. This setting is ignored if contextHistory is enabled. For translation engines that support concurrent batches, like KoboldCpp and py3translationServer, batches are also split into this many parts that are submitted at the same time. Default=' + str( defaultMaxConcurrentRequests ), default=None, type=int )
+    commandLineParser.add_argument( '-proc', '--processes', help='For pykakasi and cutlet. The number of processes used to translate large batches at the same time. Every process loads its own copy of the library once and translates part of the batch. The translations are still written in order. Set to 0 to use one process per CPU core. Default=' + str( defaultProcesses ), default=None, type=int )
 
     commandLineParser.add_argument( '-bk', '--backups', help='This setting toggles writing backup files for mainSpreadsheet. This setting does not affect cache. Default=Write mainSpreadsheet to backups/[date]/* periodically for use with --resume. Specifying this will disable creating backups.', action='store_false' )
-    commandLineParser.add_argument( '-r', '--resume', help='Attempt to resume previously interupted operation. No gurantees. Only checks backups made today and yesterday. Not currently implemented.', action='store_true' )
+    commandLineParser.add_argument( '-jn', '--journal', help='Toggles the journal. Default=Append every new translation to a journal file next to the cache file and in the backups folder, and replay it on the next run if the program crashed. This allows cache and mainSpreadsheet to be exported less often. Specifying this will disable the journal.', action='store_false' )
+    commandLineParser.add_argument( '-r', '--resume', help='Attempt to resume previously interupted operation. No gurantees. Only checks backups made today and yesterday. The most recent backup of fileToTranslate is loaded, the journal is replayed on top of it, and translation starts at the batch that has the first untranslated entry.', action='store_true' )
+    commandLineParser.add_argument( '-sm', '--streaming', help='Read fileToTranslate and write outputFile one batch at a time instead of loading the entire file into memory. Memory usage then depends on batchSizeLimit instead of the size of fileToTranslate. Only .xlsx and .csv files are supported. Disables backups of mainSpreadsheet, the mainSpreadsheet journal, and --resume. Default=Load the entire file into memory.', action='store_true' )
     commandLineParser.add_argument( '-tr', '--testRun', help='Specifying this will read all input files and import the translation engine, but there will be no translation or output files written. Default=Translate contents and write output.', action='store_true' )
     commandLineParser.add_argument( '-sf', '--settingsFile', help='The is the ' + defaultScriptSettingsFileExtension + ' file from which to read program settings. Default= The name of the program ' + defaultScriptSettingsFileExtension + ' Example: py3TranslateLLM.ini This file must be encoded as ' + defaultTextEncoding + '.', default=None, type=str )
 
@@ -265,17 +308,29 @@ def createCommandLineOptions():
     userInput[ 'sceneSummaryEnableTranslation' ] = commandLineArguments.sceneSummaryEnableTranslation
     userInput[ 'sceneSummaryCacheFile' ] = commandLineArguments.sceneSummaryCacheFile
     userInput[ 'sceneSummaryCacheAnyMatch' ] = commandLineArguments.sceneSummaryCacheAnyMatch
+    userInput[ 'sceneSummaryPrefetch' ] = commandLineArguments.sceneSummaryPrefetch
 
     userInput[ 'batches' ] = commandLineArguments.batches
     userInput[ 'batchesEnabledForLLMs' ] = commandLineArguments.batchesEnabledForLLMs
     userInput[ 'batchSizeLimit' ] = commandLineArguments.batchSizeLimit
+    userInput[ 'adaptiveBatchSize' ] = commandLineArguments.adaptiveBatchSize
+    userInput[ 'adaptiveBatchSizeMinimum' ] = commandLineArguments.adaptiveBatchSizeMinimum
+    userInput[ 'adaptiveBatchSizeTargetLatency' ] = commandLineArguments.adaptiveBatchSizeTargetLatency
+    userInput[ 'maxCharactersPerRequest' ] = commandLineArguments.maxCharactersPerRequest
+    userInput[ 'maxTokensPerRequest' ] = commandLineArguments.maxTokensPerRequest
+    userInput[ 'tokenizer' ] = commandLineArguments.tokenizer
 
     userInput[ 'address' ] = commandLineArguments.address  #Must be reachable. How to test for that?
     userInput[ 'port' ] = commandLineArguments.port                #Port should be conditionaly guessed. If no port specified and an address was specified, then try to guess port as either 80, 443, or default settings depending upon protocol and translationEngine selected.
     userInput[ 'timeout' ] = commandLineArguments.timeout
+    userInput[ 'maxConcurrentRequests' ] = commandLineArguments.maxConcurrentRequests
+    userInput[ 'processes' ] = commandLineArguments.processes
+    userInput[ 'stablePrompt' ] = commandLineArguments.stablePrompt
 
     userInput[ 'backups' ] = commandLineArguments.backups
+    userInput[ 'journal' ] = commandLineArguments.journal
     userInput[ 'resume' ] = commandLineArguments.resume
+    userInput[ 'streaming' ] = commandLineArguments.streaming
     userInput[ 'testRun' ] = commandLineArguments.testRun
     userInput[ 'settingsFile' ] = commandLineArguments.settingsFile
 
@@ -456,6 +511,14 @@ def validateUserInput( userInput=None ):
 
     userInput[ 'backupsEnabled' ] = userInput[ 'backups' ]
 
+    userInput[ 'journalEnabled' ] = userInput[ 'journal' ]
+
+    userInput[ 'streamingEnabled' ] = userInput[ 'streaming' ]
+
+    userInput[ 'stablePromptEnabled' ] = userInput[ 'stablePrompt' ]
+
+    userInput[ 'adaptiveBatchSizeEnabled' ] = userInput[ 'adaptiveBatchSize' ]
+
     # Remove old value names.
     # https://www.w3schools.com/python/python_ref_dictionary.asp
     userInput.pop( 'fileToTranslate' )
@@ -516,12 +579,39 @@ def validateUserInput( userInput=None ):
 
     if userInput[ 'sceneSummaryLength' ] == None:
         userInput[ 'sceneSummaryLength' ] = defaultSceneSummaryLength
+    if userInput[ 'sceneSummaryPrefetch' ] == None:
+        userInput[ 'sceneSummaryPrefetch' ] = defaultSceneSummaryPrefetch
+    elif userInput[ 'sceneSummaryPrefetch' ] < 0:
+        print( 'Warning: sceneSummaryPrefetch must be 0 or higher instead of \'' + str( userInput[ 'sceneSummaryPrefetch' ] ) + '\'. Using 0 instead.' )
+        userInput[ 'sceneSummaryPrefetch' ] = 0
     if userInput[ 'sceneSummaryCacheFileName' ] == None:
         userInput[ 'sceneSummaryCacheFileName' ] = userInput[ 'currentScriptPathOnly' ] + '/' + defaultSceneSummaryCacheLocation
 
     if userInput[ 'batchSizeLimit' ] == None:
         userInput[ 'batchSizeLimit' ] = defaultBatchSizeLimit
 
+    if userInput[ 'adaptiveBatchSizeMinimum' ] == None:
+        userInput[ 'adaptiveBatchSizeMinimum' ] = defaultAdaptiveBatchSizeMinimum
+    elif userInput[ 'adaptiveBatchSizeMinimum' ] < 1:
+        print( 'Warning: adaptiveBatchSizeMinimum must be 1 or higher instead of \'' + str( userInput[ 'adaptiveBatchSizeMinimum' ] ) + '\'. Using 1 instead.' )
+        userInput[ 'adaptiveBatchSizeMinimum' ] = 1
+    if userInput[ 'adaptiveBatchSizeTargetLatency' ] == None:
+        userInput[ 'adaptiveBatchSizeTargetLatency' ] = defaultAdaptiveBatchSizeTargetLatency
+    elif userInput[ 'adaptiveBatchSizeTargetLatency' ] < 1:
+        print( 'Warning: adaptiveBatchSizeTargetLatency must be 1 or higher instead of \'' + str( userInput[ 'adaptiveBatchSizeTargetLatency' ] ) + '\'. Using ' + str( defaultAdaptiveBatchSizeTargetLatency ) + ' instead.' )
+        userInput[ 'adaptiveBatchSizeTargetLatency' ] = defaultAdaptiveBatchSizeTargetLatency
+
+    if userInput[ 'maxCharactersPerRequest' ] == None:
+        userInput[ 'maxCharactersPerRequest' ] = defaultMaxCharactersPerRequest
+    elif userInput[ 'maxCharactersPerRequest' ] < 0:
+        print( 'Warning: maxCharactersPerRequest must be 0 or higher instead of \'' + str( userInput[ 'maxCharactersPerRequest' ] ) + '\'. Using 0 instead.' )
+        userInput[ 'maxCharactersPerRequest' ] = 0
+    if userInput[ 'maxTokensPerRequest' ] == None:
+        userInput[ 'maxTokensPerRequest' ] = defaultMaxTokensPerRequest
+    elif userInput[ 'maxTokensPerRequest' ] < 0:
+        print( 'Warning: maxTokensPerRequest must be 0 or higher instead of \'' + str( userInput[ 'maxTokensPerRequest' ] ) + '\'. Using 0 instead.' )
+        userInput[ 'maxTokensPerRequest' ] = 0
+
     # if using py3translationserver or sugoi, address must be specified, but default to using http://localhost. Warn user later.
     addressIsDefault = False
     if userInput[ 'address' ] == None:
@@ -541,6 +631,17 @@ def validateUserInput( userInput=None ):
             portIsDefault = True
     if userInput[ 'timeout' ] == None:
         userInput[ 'timeout' ] = defaultTimeout
+    if userInput[ 'maxConcurrentRequests' ] == None:
+        userInput[ 'maxConcurrentRequests' ] = defaultMaxConcurrentRequests
+    elif userInput[ 'maxConcurrentRequests' ] < 1:
+        print( 'Warning: maxConcurrentRequests must be 1 or higher instead of \'' + str( userInput[ 'maxConcurrentRequests' ] ) + '\'. Using 1 instead.' )
+        userInput[ 'maxConcurrentRequests' ] = 1
+
+    if userInput[ 'processes' ] == None:
+        userInput[ 'processes' ] = defaultProcesses
+    elif userInput[ 'processes' ] < 0:
+        print( 'Warning: processes must be 0 or higher instead of \'' + str( userInput[ 'processes' ] ) + '\'. Using ' + str( defaultProcesses ) + ' instead.' )
+        userInput[ 'processes' ] = defaultProcesses
 
     # Old code. Probably useful for later for use with different translation engines.
     #if port == None:
@@ -612,6 +713,10 @@ def validateUserInput( userInput=None ):
     cacheFileNameObject = pathlib.Path( str(userInput[ 'cacheFileName' ] ) ).absolute()
     userInput[ 'cacheFilePathOnly' ] = str( cacheFileNameObject.parent )
     userInput[ 'cacheFileExtensionOnly' ] = cacheFileNameObject.suffix
+    if userInput[ 'cacheFileExtensionOnly' ].lower() in validSQLiteExtensions:
+        userInput[ 'cacheIsSQLite' ] = True
+    else:
+        userInput[ 'cacheIsSQLite' ] = False
 
     if userInput[ 'sceneSummaryPromptFileName' ] == None:
         userInput[ 'sceneSummaryEnabled' ] = False
@@ -646,6 +751,39 @@ def validateUserInput( userInput=None ):
     dealWithEncoding.debug = userInput[ 'debug' ]
     dealWithEncoding.consoleEncoding = userInput[ 'consoleEncoding' ]
 
+    sqliteCache.verbose = userInput[ 'verbose' ]
+    sqliteCache.debug = userInput[ 'debug' ]
+    sqliteCache.consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    journal.verbose = userInput[ 'verbose' ]
+    journal.debug = userInput[ 'debug' ]
+    journal.consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    dictionaryReplacer.verbose = userInput[ 'verbose' ]
+    dictionaryReplacer.debug = userInput[ 'debug' ]
+    dictionaryReplacer.consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    languageCodes.verbose = userInput[ 'verbose' ]
+    languageCodes.debug = userInput[ 'debug' ]
+    languageCodes.consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    lazyImport.verbose = userInput[ 'verbose' ]
+    lazyImport.debug = userInput[ 'debug' ]
+    lazyImport.consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    requestPacker.verbose = userInput[ 'verbose' ]
+    requestPacker.debug = userInput[ 'debug' ]
+    requestPacker.consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    # The tokenizer is only loaded if it is used, since some of them need large libraries and model files.
+    userInput[ 'tokenizerFunction' ] = None
+    if userInput[ 'maxTokensPerRequest' ] > 0:
+        try:
+            userInput[ 'tokenizerFunction' ] = requestPacker.getTokenizer( userInput[ 'tokenizer' ] )
+        except ( ValueError, ImportError, OSError, RuntimeError ) as exception:
+            print( ( 'Error: Unable to load tokenizer \'' + str( userInput[ 'tokenizer' ] ) + '\' for maxTokensPerRequest. ' + str( exception ) ).encode( consoleEncoding ) )
+            sys.exit( 1 )
+
 
     # Start to validate input settings and input combinations from parsed imported command line option values.
     # Certain files must be present, like fileToTranslateFileName and usually languageCodesFileName.
@@ -713,6 +851,9 @@ def validateUserInput( userInput=None ):
         global py3translationServerEngine
         import resources.translationEngines.py3translationServerEngine as py3translationServerEngine
         implemented = True
+        py3translationServerEngine.batchSizeTuner.verbose = userInput[ 'verbose' ]
+        py3translationServerEngine.batchSizeTuner.debug = userInput[ 'debug' ]
+        py3translationServerEngine.batchSizeTuner.consoleEncoding = userInput[ 'consoleEncoding' ]
     elif ( userInput[ 'translationEngine' ].lower() == 'sugoi' ):
         userInput[ 'mode'] = 'sugoi'
         # Sugoi has a default port association and only supports Jpn->Eng translations, so having a dedicated entry for it is still useful for input validation, especially since it only supports a subset of the py3translationserver API.
@@ -724,6 +865,9 @@ def validateUserInput( userInput=None ):
         global pykakasiEngine
         import resources.translationEngines.pykakasiEngine as pykakasiEngine
         implemented = True
+        pykakasiEngine.processPool.verbose = userInput[ 'verbose' ]
+        pykakasiEngine.processPool.debug = userInput[ 'debug' ]
+        pykakasiEngine.processPool.consoleEncoding = userInput[ 'consoleEncoding' ]
         if userInput[ 'cacheEnabled' ] == True:
             print( 'Info: Disabling cache for local pykakasi library.' )
             userInput[ 'cacheEnabled' ] = False # Since pykakasi is a local library with a fast dictionary, enabling cache would only make things slower.
@@ -732,6 +876,9 @@ def validateUserInput( userInput=None ):
         global cutletEngine
         import resources.translationEngines.cutletEngine as cutletEngine
         implemented = True
+        cutletEngine.processPool.verbose = userInput[ 'verbose' ]
+        cutletEngine.processPool.debug = userInput[ 'debug' ]
+        cutletEngine.processPool.consoleEncoding = userInput[ 'consoleEncoding' ]
         if userInput[ 'cacheEnabled' ] == True:
             print( 'Info: Disabling cache for local cutlet library.' )
             userInput [ 'cacheEnabled' ] = False # Is enabling cache worth it for cutlet? Unlikely.
@@ -741,6 +888,9 @@ def validateUserInput( userInput=None ):
     userInput.pop( 'translationEngine' )
 
     print( ( 'Mode is set to: \'' + str( userInput[ 'mode'] ) + '\'' ).encode( consoleEncoding ) )
+    if ( userInput[ 'adaptiveBatchSizeEnabled' ] == True ) and ( userInput[ 'mode' ] != 'py3translationserver' ):
+        print( 'Info: adaptiveBatchSize is only supported for py3translationServer. Ignoring.' )
+        userInput[ 'adaptiveBatchSizeEnabled' ] = False
     if implemented == False:
         print( '\n\'' + userInput[ 'mode' ] + '\' not yet implemented. Please pick another translation engine. \n Translation engines: ' + str( translationEnginesAvailable ) )
         sys.exit( 1 )
@@ -812,9 +962,10 @@ def validateUserInput( userInput=None ):
     # The cache file does not need to exist. if it does not exist, then it will be created dynamically when it is needed as a chocolate.Strawberry(), so only verify the extension.
     if userInput[ 'cacheEnabled' ] == True:
         # Verify cache file extension is .xlsx. Shouldn't .csv also work? .csv would be harder for user to edit but might take less space on disk. Need to check. # Update: It was backwards. .csv files take more space on disk but can be potentially the most compatible. They might compress the best via lzma2 with python's zip library. In practice, .ods should be the most compatible in exchange for larger file size compared to .xlsx, but .ods support is not yet implemented in chocolate.py library.
-        if not userInput[ 'cacheFileExtensionOnly' ] in validSpreadsheetExtensions:
-            print( ( '\n Error: cacheFile must have a spreadsheet extension instead of \''+ userInput[ 'cacheFileExtensionOnly' ] +'\'' ).encode( consoleEncoding ) )
+        if ( not userInput[ 'cacheFileExtensionOnly' ] in validSpreadsheetExtensions ) and ( userInput[ 'cacheIsSQLite' ] != True ):
+            print( ( '\n Error: cacheFile must have a spreadsheet or SQLite extension instead of \''+ userInput[ 'cacheFileExtensionOnly' ] +'\'' ).encode( consoleEncoding ) )
             print( 'validSpreadsheetExtensions=' + str( validSpreadsheetExtensions ) )
+            print( 'validSQLiteExtensions=' + str( validSQLiteExtensions ) )
             print( ( 'cacheFile: \'' + str( userInput[ 'cacheFileName' ] ) ).encode( consoleEncoding ) )
             sys.exit( 1 )
 
@@ -827,6 +978,11 @@ def validateUserInput( userInput=None ):
         if ( userInput[ 'readOnlyCache' ] == True ) and ( userInput[ 'rebuildCache' ] == True ):
             userInput[ 'rebuildCache' ] = False
 
+        # SQLite enforces unique entries with its primary key, so there is nothing to rebuild.
+        if ( userInput[ 'cacheIsSQLite' ] == True ) and ( userInput[ 'rebuildCache' ] == True ):
+            print( 'Info: rebuildCache is not needed for SQLite caches. Ignoring.' )
+            userInput[ 'rebuildCache' ] = False
+
     #if contextHistoryMaxLength was specified as == 0, then disable it. Update: 0 should mean unlimited contextHistory
     #if userInput[ 'contextHistoryMaxLength' ] == 0:
     #    userInput[ 'contextHistoryEnabled' ] = False
@@ -872,6 +1028,27 @@ def validateUserInput( userInput=None ):
     if userInput[ 'batchesEnabled' ] == False:
         userInput[ 'batchesEnabledForLLMs' ] = False
 
+    # Streaming reads and writes fileToTranslate one batch at a time, so mainSpreadsheet never has all of the entries in it at once. Anything that needs the full mainSpreadsheet cannot work.
+    if userInput[ 'streamingEnabled' ] == True:
+        if not ( userInput[ 'fileToTranslateFileExtensionOnly' ] in chocolate.streamingExtensions ) or not ( userInput[ 'outputFileExtensionOnly' ] in chocolate.streamingExtensions ):
+            print( ( 'Warning: streaming only supports ' + str( chocolate.streamingExtensions ) + ' files. Loading the entire file into memory instead.' ).encode( consoleEncoding ) )
+            userInput[ 'streamingEnabled' ] = False
+    if userInput[ 'streamingEnabled' ] == True:
+        if userInput[ 'batchSizeLimit' ] == 0:
+            print( 'Info: streaming requires a batchSizeLimit. Using batchSizeLimit=' + str( defaultBatchSizeLimit ) )
+            userInput[ 'batchSizeLimit' ] = defaultBatchSizeLimit
+            if userInput[ 'sceneSummaryEnabled' ] == True:
+                userInput[ 'sceneSummaryLength' ] = defaultBatchSizeLimit
+        if userInput[ 'resume' ] == True:
+            print( 'Info: --resume is not supported when streaming. Ignoring.' )
+            userInput[ 'resume' ] = False
+        # The next batch is not read until the current one is finished, so there is nothing to generate summaries for ahead of time.
+        if ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryPrefetch' ] > 0 ):
+            print( 'Info: --sceneSummaryPrefetch is not supported when streaming. Ignoring.' )
+            userInput[ 'sceneSummaryPrefetch' ] = 0
+        # Backups of mainSpreadsheet would only have the current batch in them.
+        userInput[ 'backupsEnabled' ] = False
+
 
     # if using cacheOnly...
     if userInput[ 'mode' ] == 'cacheOnly':
@@ -884,12 +1061,33 @@ def validateUserInput( userInput=None ):
             print( ( 'Warning: No address was specified for: '+ userInput[ 'mode' ] +'. Defaulting to: '+ defaultAddress + ' This is probably incorrect.' ).encode(consoleEncoding) )
         if portIsDefault == True:
                 print( 'Warning: No port specified for ' + userInput[ 'mode' ] + ' translation engine. Using default port of: ' + str( userInput[ 'port' ] ) )
-        try:
-            assert( userInput[ 'port' ] >= minimumPortNumber ) #1
-            assert( userInput[ 'port' ] <= maximumPortNumber ) #65535
-        except:
-            print( ( 'Error: Unable to verify port number: \'' + str( userInput[ 'port' ] ) + '\' Must be '+ str( minimumPortNumber ) + '-' + str( maximumPortNumber ) + '.').encode( consoleEncoding ) )
-            sys.exit( 1 )
+
+    # address can be a comma separated list of servers, and every server can have its own port like http://192.168.0.100:5001 Servers without a port use --port.
+    # addressList is a list of tuples: [ ( 'http://192.168.0.100', 5001 ), ( 'http://192.168.0.101', 5001 ) ]
+    userInput[ 'addressList' ] = []
+    for tempAddress in userInput[ 'address' ].split( ',' ):
+        tempAddress = tempAddress.strip().rstrip( '/' )
+        if tempAddress == '':
+            continue
+        tempProtocol, tempSeparator, tempHost = tempAddress.rpartition( '://' )
+        if ( tempHost.find( ':' ) != -1 ) and ( tempHost.rpartition( ':' )[ 2 ].isdigit() == True ):
+            userInput[ 'addressList' ].append( ( tempProtocol + tempSeparator + tempHost.rpartition( ':' )[ 0 ], int( tempHost.rpartition( ':' )[ 2 ] ) ) )
+        else:
+            userInput[ 'addressList' ].append( ( tempAddress, userInput[ 'port' ] ) )
+    if len( userInput[ 'addressList' ] ) == 0:
+        userInput[ 'addressList' ].append( ( defaultAddress, userInput[ 'port' ] ) )
+
+    if ( userInput[ 'mode' ] == 'koboldcpp' ) or ( userInput[ 'mode' ] == 'py3translationserver' ) or ( userInput[ 'mode' ] == 'sugoi' ):
+        for tempAddress,tempPort in userInput[ 'addressList' ]:
+            try:
+                assert( tempPort >= minimumPortNumber ) #1
+                assert( tempPort <= maximumPortNumber ) #65535
+            except:
+                print( ( 'Error: Unable to verify port number: \'' + str( tempPort ) + '\' for \'' + tempAddress + '\' Must be '+ str( minimumPortNumber ) + '-' + str( maximumPortNumber ) + '.').encode( consoleEncoding ) )
+                sys.exit( 1 )
+        if ( len( userInput[ 'addressList' ] ) > 1 ) and ( userInput[ 'mode' ] == 'sugoi' ):
+            print( 'Warning: Multiple servers are only supported for koboldcpp and py3translationserver. Only using: ' + userInput[ 'addressList' ][ 0 ][ 0 ] )
+            userInput[ 'addressList' ] = userInput[ 'addressList' ][ : 1 ]
 
 
     # if using deepl_api_free, pro or any engine that requires internet access, then insist the internet is available.
@@ -952,7 +1150,7 @@ def readInputFiles( userInput=None ):
         print( ( 'targetLanguageRaw=' + str( userInput[ 'targetLanguageRaw' ] ) ).encode( consoleEncoding ) )
 
     # Instantiate basket of Strawberries. Start with languageCodes.csv  # languageCodes.csv, cache.xlsx, sceneSummaryCache.xlsx, and mainSpreadsheet are chocolate.Strawberry() instances. For the various dictionary.csv files, use Python dictionaries instead. The prompt files are regular files (strings).
-    # languageCodes.csv could also be a dictionary with key=[ list ] or multidimensional array [[][][]], but then searching through that would be annoying, so leave as a chocolate.Strawberry().
+    # languageCodes.csv is the exception. It is read by languageCodes.LanguageCodes() which stores every row and a dictionary of lowercase cell value -> cell in languageCodes.index.json next to languageCodes.csv. Searching is then a dictionary lookup, and languageCodes.csv is only read again when it changes.
     # Read in and process languageCodes.csv
     # Format specificiation for languageCodes.csv
     # Name of language in English, ISO 639 Code, ISO 639-2 Code
@@ -978,11 +1176,11 @@ def readInputFiles( userInput=None ):
         print('languageCodesFileName=' + userInput[ 'languageCodesFileName' ] )
         print('languageCodesFileEncoding=' + userInput[ 'languageCodesFileEncoding' ] )
 
-    userInput[ 'languageCodesSpreadsheet' ] = chocolate.Strawberry( myFileName=userInput[ 'languageCodesFileName' ], fileEncoding=userInput[ 'languageCodesFileEncoding' ], removeWhitespaceForCSV=True )
+    userInput[ 'languageCodesSpreadsheet' ] = languageCodes.LanguageCodes( userInput[ 'languageCodesFileName' ], fileEncoding=userInput[ 'languageCodesFileEncoding' ] )
 
-    #sourceLanguageCellRow, sourceLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].searchColumnsCaseInsensitive( 'lav')
-    #sourceLanguageCellRow, sourceLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].searchColumnsCaseInsensitive( 'japanese' )
-    sourceLanguageCellRow, sourceLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].searchColumnsCaseInsensitive( userInput[ 'sourceLanguageRaw' ] )
+    #sourceLanguageCellRow, sourceLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].search( 'lav')
+    #sourceLanguageCellRow, sourceLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].search( 'japanese' )
+    sourceLanguageCellRow, sourceLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].search( userInput[ 'sourceLanguageRaw' ] )
     if ( sourceLanguageCellRow == None ) or ( sourceLanguageCellColumn == None ):
         print( ( 'Error: Unable to find source language \'' + str( sourceLanguageRaw ) + '\' in file: ' + str( userInput[ 'languageCodesFileName' ] ) ).encode( consoleEncoding ) )
         sys.exit(1)
@@ -998,7 +1196,7 @@ def readInputFiles( userInput=None ):
         print( ('internalSourceLanguageTwoCode=' + userInput[ 'internalSourceLanguageTwoCode' ] ).encode( consoleEncoding ) )
         print( ('internalSourceLanguageThreeCode=' + userInput[ 'internalSourceLanguageThreeCode' ] ).encode( consoleEncoding ) )
 
-    targetLanguageCellRow, targetLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].searchColumnsCaseInsensitive( userInput[ 'targetLanguageRaw' ] )
+    targetLanguageCellRow, targetLanguageCellColumn = userInput[ 'languageCodesSpreadsheet' ].search( userInput[ 'targetLanguageRaw' ] )
     if ( targetLanguageCellRow == None ) or ( targetLanguageCellColumn == None ):
         print( ( 'Error: Unable to find target language \'' + userInput[ 'targetLanguageRaw' ] + '\' in file: '+ userInput[ 'languageCodesFileName' ] ).encode( consoleEncoding ) )
         sys.exit(1)
@@ -1084,6 +1282,23 @@ def readInputFiles( userInput=None ):
     else:
         userInput[ 'postWritingToFileDictionary' ] = None
 
+    # Compile the dictionaries that are applied to every line. Every key is searched for at the same time, and the longest key wins. See: resources/dictionaryReplacer.py
+    # revertAfterTranslationDictionary needs two of them, one for before translation and one to undo it after translation.
+    if userInput[ 'preDictionary' ] != None:
+        userInput[ 'preDictionaryReplacer' ] = dictionaryReplacer.DictionaryReplacer( userInput[ 'preDictionary' ] )
+    else:
+        userInput[ 'preDictionaryReplacer' ] = None
+    if userInput[ 'revertAfterTranslationDictionary' ] != None:
+        userInput[ 'revertAfterTranslationDictionaryReplacer' ] = dictionaryReplacer.DictionaryReplacer( userInput[ 'revertAfterTranslationDictionary' ] )
+        userInput[ 'revertAfterTranslationDictionaryReverseReplacer' ] = dictionaryReplacer.DictionaryReplacer( userInput[ 'revertAfterTranslationDictionary' ], reverse=True )
+    else:
+        userInput[ 'revertAfterTranslationDictionaryReplacer' ] = None
+        userInput[ 'revertAfterTranslationDictionaryReverseReplacer' ] = None
+    if userInput[ 'postDictionary' ] != None:
+        userInput[ 'postDictionaryReplacer' ] = dictionaryReplacer.DictionaryReplacer( userInput[ 'postDictionary' ] )
+    else:
+        userInput[ 'postDictionaryReplacer' ] = None
+
     if userInput[ 'debug' ] == True:
         print( ( 'promptFileContents=' + str( userInput[ 'promptFileContents' ] ) ).encode( consoleEncoding) )
         print( ( 'memoryFileContents=' + str( userInput[ 'memoryFileContents' ] ) ).encode( consoleEncoding) )
@@ -1105,11 +1320,63 @@ def backupMainSpreadsheet( userInput=None, programSettings=None, outputName=None
     if userInput[ 'backupsEnabled' ] != True:
         return None
 
-    if ( int( time.perf_counter() - programSettings[ 'timeThatBackupOfMainSpreadsheetWasLastSaved' ] ) > defaultMinimumSaveIntervalForMainSpreadsheet ) or ( force == True ):
+    # if the journal is enabled, then every translation is already on disk, so backups can be made less often.
+    if programSettings[ 'mainSpreadsheetJournal' ] != None:
+        minimumSaveInterval = defaultMinimumSaveIntervalForMainSpreadsheetWithJournal
+    else:
+        minimumSaveInterval = defaultMinimumSaveIntervalForMainSpreadsheet
+
+    if ( int( time.perf_counter() - programSettings[ 'timeThatBackupOfMainSpreadsheetWasLastSaved' ] ) > minimumSaveInterval ) or ( force == True ):
         programSettings[ 'mainSpreadsheet' ].export( outputName )
         programSettings[ 'timeThatBackupOfMainSpreadsheetWasLastSaved' ] = time.perf_counter()
 
 
+# Returns the most recent backup of fileToTranslate made by backupMainSpreadsheet() either today or yesterday as a string, or None if there are not any.
+def findLatestBackup( userInput=None ):
+    backupsList = []
+    # backupsFileNameWithPathAndDate is: backups/[date]/[fileToTranslateFileNameWithoutPath].backup.[dateAndTime].xlsx
+    backupPrefix = userInput[ 'fileToTranslateFileNameWithoutPath' ] + '.backup.'
+    for date in [ functions.getYearMonthAndDay(), functions.getYesterdaysDate() ]:
+        backupsFolderWithDate = pathlib.Path( userInput[ 'backupsFolder' ] + '/' + date )
+        if backupsFolderWithDate.is_dir() != True:
+            continue
+        for fileNameObject in backupsFolderWithDate.iterdir():
+            if ( fileNameObject.name.startswith( backupPrefix ) == True ) and ( fileNameObject.suffix == defaultExportExtension ) and ( fileNameObject.is_file() == True ):
+                backupsList.append( fileNameObject )
+
+    if len( backupsList ) == 0:
+        return None
+    # Use the time the file was last modified instead of the name since backups are overwritten repeatedly during the same run.
+    return str( max( backupsList, key=lambda fileNameObject : fileNameObject.stat().st_mtime ) )
+
+
+# Returns the row number in mainSpreadsheet that translation should resume from.
+def getResumeRow( userInput=None, programSettings=None ):
+    # if reTranslate == True, then existing translations do not mean the row is finished. if sceneSummaryEnableTranslation == False, then nothing gets translated at all. In both cases, only the progress recorded in the journal is meaningful.
+    if ( userInput[ 'reTranslate' ] == True ) or ( ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnableTranslation' ] == False ) ):
+        if programSettings[ 'lastCompletedRow' ] == None:
+            return 2
+        return programSettings[ 'lastCompletedRow' ] + 1
+
+    # Otherwise, the first row without a translation for the current model is where the previous run stopped. Reading a single column is much faster than checking every row against the cache.
+    translatedColumn = programSettings[ 'mainSpreadsheet' ].getColumn( programSettings[ 'currentMainSpreadsheetColumn' ] )
+    for counter,translatedEntry in enumerate( translatedColumn ):
+        # Skip header.
+        if counter == 0:
+            continue
+        if translatedEntry == None:
+            # Rows start at 1.
+            return counter + 1
+    return len( translatedColumn ) + 1
+
+
+# Records in the journal that every row up to and including lastCompletedRow has been processed. This is used by --resume.
+def recordProgress( userInput=None, programSettings=None, lastCompletedRow=None, batchNumber=None ):
+    if programSettings[ 'mainSpreadsheetJournal' ] == None:
+        return None
+    programSettings[ 'mainSpreadsheetJournal' ].append( { 'lastCompletedRow' : lastCompletedRow, 'batch' : batchNumber } )
+
+
 def backupSceneSummaryCache( userInput=None, programSettings=None, force=False ):
     consoleEncoding = userInput[ 'consoleEncoding' ]
     if userInput[ 'sceneSummaryCacheEnabled' ] == False:
@@ -1143,7 +1410,20 @@ def backupCache( userInput=None, programSettings=None, force=False ):
     if ( userInput[ 'readOnlyCache' ] == True ) or ( programSettings[ 'cacheWasUpdated' ] == False ):
         return None
 
-    if ( int( time.perf_counter() - programSettings[ 'timeThatCacheWasLastSaved' ] ) > defaultMinimumSaveIntervalForCache ) or ( force == True ):
+    # SQLite only needs to commit the changes since the last commit instead of writing out the entire cache, so do that more often.
+    if userInput[ 'cacheIsSQLite' ] == True:
+        if ( int( time.perf_counter() - programSettings[ 'timeThatCacheWasLastSaved' ] ) > defaultMinimumCommitIntervalForSQLiteCache ) or ( force == True ):
+            programSettings[ 'cache' ].commit()
+            programSettings[ 'timeThatCacheWasLastSaved' ] = time.perf_counter()
+        return None
+
+    # if the journal is enabled, then every new cache entry is already on disk, so exporting the entire cache can be done less often.
+    if programSettings[ 'cacheJournal' ] != None:
+        minimumSaveInterval = defaultMinimumSaveIntervalForCacheWithJournal
+    else:
+        minimumSaveInterval = defaultMinimumSaveIntervalForCache
+
+    if ( int( time.perf_counter() - programSettings[ 'timeThatCacheWasLastSaved' ] ) > minimumSaveInterval ) or ( force == True ):
 
         #Syntax: randomNumber = random.randrange( 0, 500000 )
         temporaryFileNameAndPath = userInput[ 'cacheFilePathOnly' ] + '/' + 'cache.temp.' + str( random.randrange( 0, 500000 ) ) + userInput[ 'cacheFileExtensionOnly' ]
@@ -1152,6 +1432,9 @@ def backupCache( userInput=None, programSettings=None, force=False ):
         if functions.checkIfThisFileExists( temporaryFileNameAndPath ) == True:
             #Replace any existing cache with the temporary one.
             pathlib.Path( temporaryFileNameAndPath ).replace( userInput[ 'cacheFileName' ] )
+            # Everything in the journal is now in the cache file, so the journal can be cleared.
+            if programSettings[ 'cacheJournal' ] != None:
+                programSettings[ 'cacheJournal' ].reset()
             #print( ( 'Wrote cache to disk at: ' + userInput[ 'cacheFileName' ] ).encode(consoleEncoding) )
         else:
             print( ( 'Warning: Error writing temporary cache file at:' + temporaryFileNameAndPath ).encode(consoleEncoding) )
@@ -1214,7 +1497,7 @@ def updateSceneSummaryCache( userInput=None, programSettings=None, hash=None, me
 
 
 # Expects two strings.
-def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, translation=None ):
+def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, translation=None, syncJournal=True ):
     consoleEncoding = userInput[ 'consoleEncoding' ]
     if userInput[ 'cacheEnabled' ] == False:
         return None
@@ -1222,6 +1505,19 @@ def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, t
     if userInput[ 'readOnlyCache' ] == True:
         return None
 
+    # The SQLite backend applies the same rules internally: Always fill in empty entries, but only replace existing ones if reTranslate or overwriteWithSpreadsheet.
+    if userInput[ 'cacheIsSQLite' ] == True:
+        if programSettings[ 'cache' ].setTranslation( untranslatedEntry, programSettings[ 'translationEngine' ].model, translation, overwrite=( ( userInput[ 'reTranslate' ] == True ) or ( userInput[ 'overwriteWithSpreadsheet' ] == True ) ) ) == True:
+            if programSettings[ 'cacheWasUpdated' ] == False:
+                programSettings[ 'cacheWasUpdated' ] = True
+            if userInput[ 'debug' ] == True:
+                print( ( 'Updated cache for: ' + str( untranslatedEntry ) ).encode( consoleEncoding ) )
+        backupCache( userInput=userInput, programSettings=programSettings )
+        return None
+
+    # This is only used to decide if the change should be added to the journal.
+    cacheEntryChanged = False
+
     # tempSearchRow can be a row number (as a string) or None if the string was not found.
     # Technically, searchCache is unnecessary here and makes the program slower because cache.addToCache will always cache.searchCache() internally add the data if it is ineeded. Then addToCache will return the correct row number. However, splitting this into 2 discrete steps increases readability. TODO: Optimize this.
     tempSearchRow = programSettings[ 'cache' ].searchCache( untranslatedEntry )
@@ -1232,6 +1528,7 @@ def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, t
         # This returns the row number of the found entry as a string.
         tempSearchRow = programSettings[ 'cache' ].addToCache( untranslatedEntry )
         programSettings[ 'cache' ].setCellValue( programSettings[ 'currentCacheColumn' ] + str( tempSearchRow ) , translation )
+        cacheEntryChanged = True
         # The idea here is to limit the number of times cacheWasUpdated will be set to True which can be tens of thousands of times in a very short span of time which could potentially trigger a memory write out operation that many times depending upon how sub-programmer level caching is handled. Since CPUs are fast, and CPUs have cache for frequently used variables, this should be faster than writing out to main memory. Whether or not this optimization actually makes sense depends a lot on hardware which makes this questionabe to implement.
         if programSettings[ 'cacheWasUpdated' ] == False:
             programSettings[ 'cacheWasUpdated' ] = True
@@ -1246,6 +1543,7 @@ def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, t
         if programSettings[ 'cache' ].getCellValue( currentCellAddress ) == None:
             # then replace the value
             programSettings[ 'cache' ].setCellValue( currentCellAddress, translation )
+            cacheEntryChanged = True
             if programSettings[ 'cacheWasUpdated' ] == False:
                 programSettings[ 'cacheWasUpdated' ] = True
         # elif the cell's value is not empty
@@ -1256,6 +1554,7 @@ def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, t
             if ( ( userInput[ 'reTranslate' ] == True ) or ( userInput[ 'overwriteWithSpreadsheet' ] == True ) ) and ( programSettings[ 'cache' ].getCellValue( currentCellAddress ) != translation ):
                 #print( 'Updated cache')
                 programSettings[ 'cache' ].setCellValue( currentCellAddress, translation )
+                cacheEntryChanged = True
                 if programSettings[ 'cacheWasUpdated' ] == False:
                     programSettings[ 'cacheWasUpdated' ] = True
 
@@ -1263,15 +1562,133 @@ def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, t
         #programSettings[ 'cache' ].printAllTheThings()
         print( ( 'Updated cache at row ', tempSearchRow ).encode(consoleEncoding)  )
 
+    # Write the change to the journal before anything else so it survives a crash until the next time the cache is exported. if syncJournal == False, then the caller must call programSettings[ 'cacheJournal' ].sync() after it is done adding entries.
+    if ( cacheEntryChanged == True ) and ( programSettings[ 'cacheJournal' ] != None ):
+        programSettings[ 'cacheJournal' ].append( { 'rawText' : untranslatedEntry, 'model' : programSettings[ 'translationEngine' ].model, 'translation' : translation }, sync=syncJournal )
+
     #print( 'userInput=', userInput )
 
     backupCache( userInput=userInput, programSettings=programSettings )
 
 
+# After a crash, the journal has every cache entry that was added after cache.xlsx was last exported. Add them back to the cache, and then export the cache so the journal can be cleared.
+def replayCacheJournal( userInput=None, programSettings=None ):
+    consoleEncoding = userInput[ 'consoleEncoding' ]
+    if programSettings[ 'cacheJournal' ] == None:
+        return None
+
+    replayCounter = 0
+    for record in programSettings[ 'cacheJournal' ].replay():
+        if ( not isinstance( record, dict ) ) or ( record.get( 'rawText' ) == None ) or ( record.get( 'model' ) == None ):
+            continue
+
+        # The journal can have entries for models other than the current one, so look up the column for each record.
+        columnLetter = programSettings[ 'cache' ].searchHeaders( record[ 'model' ] )
+        if columnLetter == None:
+            headers = programSettings[ 'cache' ].getRow( 1 )
+            headers.append( record[ 'model' ] )
+            programSettings[ 'cache' ].replaceRow( 1, headers )
+            columnLetter = programSettings[ 'cache' ].searchHeaders( record[ 'model' ] )
+
+        tempSearchRow = programSettings[ 'cache' ].searchCache( record[ 'rawText' ] )
+        if tempSearchRow == None:
+            tempSearchRow = programSettings[ 'cache' ].addToCache( record[ 'rawText' ] )
+        # The journal is always newer than the cache file, so always use the value from the journal.
+        programSettings[ 'cache' ].setCellValue( columnLetter + str( tempSearchRow ), record.get( 'translation' ) )
+        replayCounter += 1
+
+    if replayCounter > 0:
+        print( ( 'Info: Restored ' + str( replayCounter ) + ' entries to the cache from: ' + programSettings[ 'cacheJournal' ].fileName ).encode( consoleEncoding ) )
+        programSettings[ 'cacheWasUpdated' ] = True
+        # This also clears the journal.
+        backupCache( userInput=userInput, programSettings=programSettings, force=True )
+
+
+# Writes translation to mainSpreadsheet at rowNumber and adds it to the journal, so it survives a crash until the next backup. rawText is the untranslated text from column A of that row. The journal uses it to check that the row still has the same text when it is replayed.
+# if syncJournal == False, then the caller must call programSettings[ 'mainSpreadsheetJournal' ].sync() after it is done writing translations.
+def updateMainSpreadsheet( userInput=None, programSettings=None, rowNumber=None, rawText=None, translation=None, syncJournal=True ):
+    programSettings[ 'mainSpreadsheet' ].setCellValueByIndex( rowNumber, programSettings[ 'currentMainSpreadsheetColumnNumber' ], translation )
+    if ( programSettings[ 'mainSpreadsheetJournal' ] != None ) and ( translation != None ):
+        programSettings[ 'mainSpreadsheetJournal' ].append( { 'row' : rowNumber, 'rawText' : rawText, 'translation' : translation }, sync=syncJournal )
+
+
+# After a crash, the journal has every translation that was written to mainSpreadsheet during the previous run. Add them back to mainSpreadsheet so they are treated as already translated.
+def replayMainSpreadsheetJournal( userInput=None, programSettings=None ):
+    consoleEncoding = userInput[ 'consoleEncoding' ]
+    if programSettings[ 'mainSpreadsheetJournal' ] == None:
+        return None
+
+    replayCounter = 0
+    mismatchCounter = 0
+    for record in programSettings[ 'mainSpreadsheetJournal' ].replay():
+        if not isinstance( record, dict ):
+            continue
+        # Progress records are added by recordProgress() after every batch.
+        if isinstance( record.get( 'lastCompletedRow' ), int ):
+            programSettings[ 'lastCompletedRow' ] = record[ 'lastCompletedRow' ]
+            programSettings[ 'lastCompletedBatch' ] = record.get( 'batch' )
+            continue
+        if ( not isinstance( record.get( 'row' ), int ) ) or ( record.get( 'translation' ) == None ):
+            continue
+        # Only apply the record if the untranslated text is still at the same row. Otherwise, the input file was changed after the journal was written.
+        if programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( record[ 'row' ], 1 ) != record.get( 'rawText' ):
+            mismatchCounter += 1
+            continue
+        programSettings[ 'mainSpreadsheet' ].setCellValueByIndex( record[ 'row' ], programSettings[ 'currentMainSpreadsheetColumnNumber' ], record[ 'translation' ] )
+        replayCounter += 1
+
+    if replayCounter > 0:
+        print( ( 'Info: Restored ' + str( replayCounter ) + ' translations from: ' + programSettings[ 'mainSpreadsheetJournal' ].fileName ).encode( consoleEncoding ) )
+    if mismatchCounter > 0:
+        print( 'Warning: Skipped ' + str( mismatchCounter ) + ' journal entries that did not match fileToTranslate.' )
+
+
 # This function needs to check sceneSummaryCache to see if a sceneSummary has been generated before. If not, then it needs to generate one and update the cache.
 #sceneSummary = getSceneSummary( userInput=userInput, programSettings=programSettings, untranslatedListSize=currentBatchSize )
-def getSceneSummary( userInput=None, programSettings=None, untranslatedListSize=None ):
+# preTranslationDictionary and revertAfterTranslationDictionary are applied to column A of mainSpreadsheet once, and the results are stored as programSettings[ 'preprocessedColumn' ]. getSceneSummary(), the cache lookups, and translate() all read from it instead of applying the dictionaries again.
+# programSettings[ 'preprocessedColumn' ][ 0 ] is the header. Like getColumn( 'A' ), the entry for row number x is at index x - 1.
+# This must be called again whenever mainSpreadsheet is replaced, like for every batch when streaming. The cache must already be loaded.
+def preprocessMainSpreadsheet( userInput=None, programSettings=None ):
+    preprocessedColumn = programSettings[ 'mainSpreadsheet' ].getColumn( 'A' )
+    if ( userInput[ 'preDictionary' ] != None ) or ( userInput[ 'revertAfterTranslationDictionary' ] != None ):
+        for index,entry in enumerate( preprocessedColumn ):
+            # The header is not translated.
+            if ( index == 0 ) or ( entry == None ):
+                continue
+            if userInput[ 'preDictionary' ] != None:
+                entry = userInput[ 'preDictionaryReplacer' ].replace( entry )
+            if userInput[ 'revertAfterTranslationDictionary' ] != None:
+                entry = userInput[ 'revertAfterTranslationDictionaryReplacer' ].replace( entry )
+            preprocessedColumn[ index ] = entry
+    programSettings[ 'preprocessedColumn' ] = preprocessedColumn
+
+    # sceneSummaryCache uses a hash of every batch as the key. Hash every row once here so the hash of any batch can be calculated from the row hashes without reading or joining the rows again. See: getSceneSummaryHash()
+    if userInput[ 'sceneSummaryEnabled' ] == True:
+        # It makes sense to hardcode utf-8 here because then the hash does not change even if the user changes their consoleEncoding later.
+        programSettings[ 'rowHashList' ] = [ hashlib.sha1( str( entry ).encode( 'utf-8' ) ).digest() for entry in preprocessedColumn ]
+    else:
+        programSettings[ 'rowHashList' ] = None
+
+    buildTranslatedRows( userInput=userInput, programSettings=programSettings )
+
+
+# Returns the sceneSummaryCache key for the rows from startRow to startRow + size - 1 as a hex string. The key is the sha1 hash of the sha1 hashes of every row, so only size * 20 bytes need to be hashed.
+# if legacy == True, then return the sha1 hash of all of the rows joined together instead. Older versions used that as the key, so it is still needed to find summaries in existing sceneSummaryCache files.
+def getSceneSummaryHash( programSettings=None, startRow=None, size=None, legacy=False ):
+    if legacy == True:
+        # hashlib objects can be updated piece by piece. The result is the same as hashing the joined string.
+        hashObject = hashlib.sha1()
+        for entry in programSettings[ 'preprocessedColumn' ][ startRow - 1 : startRow - 1 + size ]:
+            hashObject.update( str( entry ).encode( 'utf-8' ) )
+        return hashObject.hexdigest()
+    return hashlib.sha1( b''.join( programSettings[ 'rowHashList' ][ startRow - 1 : startRow - 1 + size ] ) ).hexdigest()
+
+
+# startRow is the row number of the first entry to summarize. Default=programSettings[ 'currentRow' ]. Summaries for later batches are generated in the background with startRow. See: sceneSummaryPrefetch
+def getSceneSummary( userInput=None, programSettings=None, untranslatedListSize=None, startRow=None ):
     consoleEncoding = userInput[ 'consoleEncoding' ]
+    if startRow == None:
+        startRow = programSettings[ 'currentRow' ]
 
     # Generating a summary does not make sense for overly small batches.
     if untranslatedListSize <= 1:
@@ -1283,34 +1700,9 @@ def getSceneSummary( userInput=None, programSettings=None, untranslatedListSize=
     # entry, metadata, engine
     # entry is the sha1 hash of the rawEntries list, engine is the translation engine from translationEngine.model, and metadata is filename_startLineNumber_endLineNumberRaw
 
-    # Check if in sceneSummaryCache. In order to do that, generate a hash using the untranslatedList. That means untranslatedList needs to be extracted from mainSpreadsheet first.
-
-    # Get untranslatedList from mainSpreadsheet based on currentRow and untranslatedListSize. currentRow gets -1 to fix the index since spreadsheet rows start at 1 but list indexes start at 0.
-    # Is untranslatedListSize correct, or should untranslatedListSize have a + 1 to deal with slicing not returning the last entry? As-is, this will return number of entries = untranslatedListSize, so len(untranslatedList) == untranslatedListSize. TODO: Debug this.
-    # Extract untranslated contents.
-    untranslatedList = programSettings[ 'mainSpreadsheet' ].getColumn( 'A' )[ programSettings[ 'currentRow' ] -1 : programSettings[ 'currentRow' ] -1 + untranslatedListSize ]
-    speakerList = programSettings[ 'mainSpreadsheet' ].getColumn( 'B' )[ programSettings[ 'currentRow' ] -1 : programSettings[ 'currentRow' ] -1 + untranslatedListSize ]
-
-    # untranslatedList should consider preTranslateDictionary and revertAfterTranslationDictionary since those dictionaries can contain fixes to the raw data.
-    for counter,string in enumerate(untranslatedList):
-        if userInput[ 'preDictionary' ] != None:
-            for key,value in userInput[ 'preDictionary' ].items():
-                if string.find( key ) != -1:
-                    untranslatedList[counter] = string.replace( key, value )
-        if userInput[ 'revertAfterTranslationDictionary' ] != None:
-            for key,value in userInput[ 'revertAfterTranslationDictionary' ].items():
-                if string.find( key ) != -1:
-                    untranslatedList[ counter ] = string.replace( key, value )
-
-    # Calculate sha1 hash from untranslatedList.
-    tempString = ''
-    for entry in untranslatedList:
-        tempString = tempString + str( entry )
-    if len( tempString ) == 0:
-        print( 'Warning: Unable to calculate hash of empty list.' )
-        return None
-    # It makes sense to hardcode utf-8 here because then the hash does not change even if the user changes their consoleEncoding later. This makes sceneSummaryCache.xlsx more portable and avoids creating strange dependencies between unrelated sets of data.
-    hash = str( hashlib.sha1( tempString.encode( 'utf-8' ) ).hexdigest() )
+    # Check if in sceneSummaryCache. In order to do that, generate a hash using the untranslatedList.
+    # Update: The rows were already hashed by preprocessMainSpreadsheet(), so the hash of this batch can be calculated from those without extracting untranslatedList from mainSpreadsheet first.
+    hash = getSceneSummaryHash( programSettings=programSettings, startRow=startRow, size=untranslatedListSize )
 
     # Check to see if it is already in cache.
     # Right now, this will always check the cache in a specific order. if sceneSummaryCacheAnyMatch == True, then it will retrieve the summary and send it back. It might be better to try to re-create the summary using the current translation engine and only then check sceneSummaryCacheAnyMatch if both there is not one in the sceneSummaryCache and also if the current translation engine cannot produce. Of course, this still needs to be checked now for a perfect match.
@@ -1320,11 +1712,24 @@ def getSceneSummary( userInput=None, programSettings=None, untranslatedListSize=
     # tempCellData can be a string or None if the string was not found.
     tempCellData = getCellValueFromSceneSummaryCache( userInput=userInput, programSettings=programSettings, searchString=hash )
 
+    # Summaries created by older versions use a different hash. Calculating that one is only needed if the current hash was not found.
+    if tempCellData == None:
+        tempCellData = getCellValueFromSceneSummaryCache( userInput=userInput, programSettings=programSettings, searchString=getSceneSummaryHash( programSettings=programSettings, startRow=startRow, size=untranslatedListSize, legacy=True ) )
+
     if isinstance( tempCellData, str ) == True:
         return tempCellData
 
+    # Get untranslatedList from mainSpreadsheet based on currentRow and untranslatedListSize. currentRow gets -1 to fix the index since spreadsheet rows start at 1 but list indexes start at 0.
+    # As-is, this will return number of entries = untranslatedListSize, so len(untranslatedList) == untranslatedListSize.
+    # untranslatedList should consider preTranslateDictionary and revertAfterTranslationDictionary since those dictionaries can contain fixes to the raw data. preprocessedColumn already has both applied.
+    untranslatedList = programSettings[ 'preprocessedColumn' ][ startRow -1 : startRow -1 + untranslatedListSize ]
+    # Only read the speakers for this batch instead of copying the entire column.
+    speakerList = []
+    for rowNumber in range( startRow, startRow + untranslatedListSize ):
+        speakerList.append( programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( rowNumber, 2 ) )
+
     #if userInput[ 'verbose' ] == True:
-    print( ( 'Generating sceneSummary for ' + userInput[ 'fileToTranslateFileNameWithoutPath' ] + ':' + str( programSettings[ 'currentRow'] ) + '-' + str( programSettings[ 'currentRow'] + untranslatedListSize ) + ' ...' ).encode(consoleEncoding) )
+    print( ( 'Generating sceneSummary for ' + userInput[ 'fileToTranslateFileNameWithoutPath' ] + ':' + str( programSettings[ 'rowOffset' ] + startRow ) + '-' + str( programSettings[ 'rowOffset' ] + startRow + untranslatedListSize ) + ' ...' ).encode(consoleEncoding) )
 
     # Otherwise, need to generate it.
     settings = userInput.copy()
@@ -1336,7 +1741,7 @@ def getSceneSummary( userInput=None, programSettings=None, untranslatedListSize=
     # postTranslatedList = programSettings[ 'translationEngine' ].batchTranslate( translateMe, settings=settings )
     sceneSummary = programSettings[ 'translationEngine' ].getSceneSummary( untranslatedList, settings=settings )
     if userInput[ 'verbose' ] == True:
-        print( ( 'Returned sceneSummary for lines ' + str( programSettings[ 'currentRow' ] ) + '-' + str( programSettings[ 'currentRow' ] + untranslatedListSize ) + '=' + str( sceneSummary ) ).encode( consoleEncoding ) )
+        print( ( 'Returned sceneSummary for lines ' + str( startRow ) + '-' + str( startRow + untranslatedListSize ) + '=' + str( sceneSummary ) ).encode( consoleEncoding ) )
 
     # TODO: Update sceneSummaryCache here so main function does not have to worry about it. TODO: Implement updateSceneSummaryCache() properly. # Update. This should be done now.
     # 1) data is, current lines, the lines themselves,
@@ -1344,7 +1749,8 @@ def getSceneSummary( userInput=None, programSettings=None, untranslatedListSize=
     # 3) sceneSummary if it is not None and is an instance of a string
     # rawEntries is a list of strings, metadata is filename_startLineNumber_endLineNumberRaw as a string, summaryData is the actual summary.
     #def updateSceneSummaryCache( userInput=None, programSettings=None, rawEntries=None, metadata=None, summaryData=None ):
-    metadata = userInput[ 'fileToTranslateFileNameWithoutPath' ] + defaultMetadataDelimiter + str( programSettings[ 'currentRow' ] ) + defaultMetadataDelimiter + str( programSettings[ 'currentRow' ] + untranslatedListSize )
+    # rowOffset is the number of rows before the first row in mainSpreadsheet. It is only different from 0 when streaming.
+    metadata = userInput[ 'fileToTranslateFileNameWithoutPath' ] + defaultMetadataDelimiter + str( programSettings[ 'rowOffset' ] + startRow ) + defaultMetadataDelimiter + str( programSettings[ 'rowOffset' ] + startRow + untranslatedListSize )
     updateSceneSummaryCache( userInput=userInput, programSettings=programSettings, hash=hash, metadata=metadata, summaryData=sceneSummary )
 
     return sceneSummary
@@ -1393,6 +1799,9 @@ def getCellValueFromCache( userInput=None, programSettings=None, searchString=No
     if userInput[ 'cacheEnabled' ] == False:
         return None
 
+    if userInput[ 'cacheIsSQLite' ] == True:
+        return programSettings[ 'cache' ].getTranslation( searchString, programSettings[ 'translationEngine' ].model, anyMatch=userInput[ 'cacheAnyMatch' ], excludeModels=programSettings[ 'blacklistedHeadersForCacheAnyMatch' ] )
+
     # This will return None of the rowNumber where the entry was found in the cache.
     rowNumber = programSettings[ 'cache' ].searchCache( searchString )
     if rowNumber == None:
@@ -1420,6 +1829,188 @@ def getCellValueFromCache( userInput=None, programSettings=None, searchString=No
     return translatedEntry
 
 
+# This function submits every entry in translateMe to the translation engine using a pool of worker threads and returns the translations one at a time, in the same order as translateMe, as a generator.
+# At most maxConcurrentRequests entries are submitted ahead of the entry currently being returned, so the server is never flooded and the amount of finished but unprocessed work stays bounded.
+# This is only valid when every translation is independent of the previous one, so contextHistory must be disabled. The caller is responsible for checking that.
+def submitConcurrentTranslations( userInput=None, programSettings=None, translateMe=None, translateMeSpeakerList=None, settings=None ):
+    consoleEncoding = userInput[ 'consoleEncoding' ]
+    maxConcurrentRequests = userInput[ 'maxConcurrentRequests' ]
+
+    def translateOneEntry( untranslatedEntry, requestSettings ):
+        try:
+            return programSettings[ 'translationEngine' ].translate( untranslatedEntry, settings=requestSettings )
+        except requests.exceptions.JSONDecodeError:
+            print( 'Error: Internal engine error in for translationEngine=' + userInput[ 'mode' ] )
+            return None
+
+    # collections.deque is used as a FIFO queue of futures. The oldest future is always the next entry that needs to be returned.
+    pendingRequests = collections.deque()
+    # Identical entries are only submitted once. The same future is queued again for every duplicate. A future can return its result any number of times.
+    submittedRequests = {}
+    executor = concurrent.futures.ThreadPoolExecutor( max_workers=maxConcurrentRequests )
+    try:
+        # translateMe already has preDictionary and revertAfterTranslationDictionary applied. See: preprocessMainSpreadsheet()
+        for index,untranslatedEntry in enumerate( translateMe ):
+            if untranslatedEntry in submittedRequests:
+                programSettings[ 'duplicateRequestsSaved' ] += 1
+                pendingRequests.append( submittedRequests[ untranslatedEntry ] )
+                if len( pendingRequests ) >= maxConcurrentRequests:
+                    yield pendingRequests.popleft().result()
+                continue
+
+            # Every request needs its own settings dictionary since speakerName differs per entry and the requests run at the same time.
+            requestSettings = settings.copy()
+            if translateMeSpeakerList[ index ] != None:
+                requestSettings[ 'speakerName' ] = translateMeSpeakerList[ index ]
+            elif 'speakerName' in requestSettings:
+                requestSettings.pop( 'speakerName' )
+            if 'contextHistory' in requestSettings:
+                requestSettings.pop( 'contextHistory' )
+
+            if userInput[ 'debug' ] == True:
+                print( ( 'Submitting concurrent request ' + str( index ) + ': ' + untranslatedEntry ).encode( consoleEncoding ) )
+
+            pendingRequests.append( executor.submit( translateOneEntry, untranslatedEntry, requestSettings ) )
+            submittedRequests[ untranslatedEntry ] = pendingRequests[ -1 ]
+
+            # if the window is full, then wait for the oldest request to finish before submitting any more.
+            if len( pendingRequests ) >= maxConcurrentRequests:
+                yield pendingRequests.popleft().result()
+
+        while len( pendingRequests ) != 0:
+            yield pendingRequests.popleft().result()
+    finally:
+        # if the caller stopped early, like due to an error or KeyboardInterrupt, then do not start any requests that are still waiting.
+        for futureRequest in pendingRequests:
+            futureRequest.cancel()
+        executor.shutdown( wait=True )
+
+
+# Returns a list of ( startIndex, part, partSettings ) for every ( startIndex, endIndex ) in requestRangeList, where part is translateMe[ startIndex : endIndex ] and partSettings has the matching part of the speakerList.
+def splitBatchIntoParts( translateMe=None, settings=None, requestRangeList=None ):
+    partList = []
+    for startIndex,endIndex in requestRangeList:
+        partSettings = settings.copy()
+        if isinstance( settings.get( 'speakerList' ), list ):
+            partSettings[ 'speakerList' ] = settings[ 'speakerList' ][ startIndex : endIndex ]
+        partList.append( ( startIndex, translateMe[ startIndex : endIndex ], partSettings ) )
+    return partList
+
+
+# Combines the translated parts back into a single list in the same order as translateMe, or returns None if any of the parts failed.
+def joinTranslatedParts( translateMe=None, partList=None, translatedParts=None ):
+    postTranslatedList = []
+    for counter,translatedPart in enumerate( translatedParts ):
+        if translatedPart == None:
+            return None
+        postTranslatedList = postTranslatedList + translatedPart
+        # Some engines update the entries in place during preprocessing, and the caller uses translateMe afterwards, so copy those changes back the same as if the entire list had been submitted at once.
+        startIndex = partList[ counter ][ 0 ]
+        translateMe[ startIndex : startIndex + len( partList[ counter ][ 1 ] ) ] = partList[ counter ][ 1 ]
+    return postTranslatedList
+
+
+# Submits translateMe to the translation engine with batchTranslate() and returns the translations in the same order, or None if the engine did not return a valid batch.
+# if maxCharactersPerRequest or maxTokensPerRequest are set, then translateMe is packed into several requests that stay within those limits. See: resources/requestPacker.py
+# if the translation engine supports concurrent batches, then the requests are submitted at the same time, up to maxConcurrentRequests at once. Without any limits, translateMe is split evenly into maxConcurrentRequests requests instead.
+def submitBatchTranslation( userInput=None, programSettings=None, translateMe=None, settings=None ):
+    requestRangeList = None
+    if ( userInput[ 'maxCharactersPerRequest' ] > 0 ) or ( userInput[ 'maxTokensPerRequest' ] > 0 ):
+        requestRangeList = requestPacker.packRequests( translateMe, maxCharacters=userInput[ 'maxCharactersPerRequest' ], maxTokens=userInput[ 'maxTokensPerRequest' ], countTokens=userInput[ 'tokenizerFunction' ] )
+        if ( userInput[ 'verbose' ] == True ) and ( len( requestRangeList ) > 1 ):
+            print( 'Info: Packed ' + str( len( translateMe ) ) + ' entries into ' + str( len( requestRangeList ) ) + ' requests.' )
+
+    if ( programSettings[ 'batchExecutor' ] != None ) and ( len( translateMe ) > 1 ):
+        return submitConcurrentBatchTranslation( userInput=userInput, programSettings=programSettings, translateMe=translateMe, settings=settings, requestRangeList=requestRangeList )
+
+    if ( requestRangeList == None ) or ( len( requestRangeList ) == 1 ):
+        return programSettings[ 'translationEngine' ].batchTranslate( translateMe, settings=settings )
+
+    partList = splitBatchIntoParts( translateMe=translateMe, settings=settings, requestRangeList=requestRangeList )
+    translatedParts = []
+    for startIndex,part,partSettings in partList:
+        translatedPart = programSettings[ 'translationEngine' ].batchTranslate( part, settings=partSettings )
+        if translatedPart == None:
+            return None
+        translatedParts.append( translatedPart )
+    return joinTranslatedParts( translateMe=translateMe, partList=partList, translatedParts=translatedParts )
+
+
+# Submits the parts of translateMe to the translation engine at the same time using the worker threads of programSettings[ 'batchExecutor' ]. The executor has maxConcurrentRequests threads, so there are never more than that many requests at once. This is only used if the translation engine supports concurrent batches.
+# if requestRangeList == None, then translateMe is split into up to maxConcurrentRequests parts of the same size.
+# Returns the translations in the same order as translateMe, or None if any of the parts failed.
+def submitConcurrentBatchTranslation( userInput=None, programSettings=None, translateMe=None, settings=None, requestRangeList=None ):
+    if requestRangeList == None:
+        partSize = -( -len( translateMe ) // userInput[ 'maxConcurrentRequests' ] ) # Round up.
+        requestRangeList = [ ( startIndex, startIndex + partSize ) for startIndex in range( 0, len( translateMe ), partSize ) ]
+    partList = splitBatchIntoParts( translateMe=translateMe, settings=settings, requestRangeList=requestRangeList )
+
+    pendingParts = [ programSettings[ 'batchExecutor' ].submit( programSettings[ 'translationEngine' ].batchTranslate, part, settings=partSettings ) for startIndex,part,partSettings in partList ]
+    # main() cancels whatever is still in batchFutures when it stops the worker threads.
+    programSettings[ 'batchFutures' ].update( pendingParts )
+    try:
+        translatedParts = [ futurePart.result() for futurePart in pendingParts ]
+    finally:
+        # if any part raised an exception, then do not start the parts that are still waiting.
+        for futurePart in pendingParts:
+            futurePart.cancel()
+            programSettings[ 'batchFutures' ].discard( futurePart )
+    return joinTranslatedParts( translateMe=translateMe, partList=partList, translatedParts=translatedParts )
+
+
+# Returns the speaker name for rowNumber in mainSpreadsheet as a string, or None if there is not one.
+def getSpeakerName( userInput=None, programSettings=None, rowNumber=None ):
+    speaker = programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( rowNumber, 2 )
+    if isinstance( speaker, str ) == True:
+        speaker = speaker.strip()
+        if speaker == '':
+            speaker = None
+        else:
+            # Use characterNamesDictionary to translate character names prior to submission to translationEngine.
+            # The character names should have already been translated prior to this during parsing, but if not, then apply a band-aid fix here to translate them prior to submission to the translationEngine so the translationEngine code does not have to worry about it as much. This code should be harmless if the names are already translated.
+            if userInput[ 'characterNamesDictionary' ] != None:
+                if speaker in userInput[ 'characterNamesDictionary' ]:
+                    speaker = userInput[ 'characterNamesDictionary' ][ speaker ]
+    else:
+        if speaker != None:
+            speaker = None
+    return speaker
+
+
+# Adds one entry to contextHistory. if contextHistory is already at contextHistoryMaxLength, then make room for it first.
+def addToContextHistory( userInput=None, contextHistory=None, untranslatedEntry=None, translatedEntry=None, speakerName=None ):
+    if ( len( contextHistory ) >= userInput[ 'contextHistoryMaxLength' ] ) and ( userInput[ 'contextHistoryMaxLength' ] != 0 ):
+        if userInput[ 'contextHistoryReset' ] == True:
+            # LLMs tend to start hallucinating pretty fast and old history can corrupt new entries quickly, so just wipe history every once in a while as a workaround.
+            # Theoretically, it could make sense to keep history at max for a while and then wipe it later, but it seems like it would be model/dataset/risk level specific for how long to leave it at max. For now, Just wipe it whenever it hits max.
+            contextHistory.clear()
+        else:
+            # Remove only the oldest entry.
+            # Only for this feature to work correctly, contextHistory should be changed back to a queue since list.pop is an O(n) operation. In queue's it is O(1). Queue is not thread safe which intereferes with most implementation types of userInput[ 'timout' ]. TODO: Update this appropriately. Somehow.
+            # https://www.w3schools.com/python/ref_list_pop.asp
+            contextHistory.popleft()
+    # ( untranslatedString1, translatedString2, speaker )
+    contextHistory.append( ( untranslatedEntry, translatedEntry, speakerName ) )
+
+
+# Adds the existing translations of a batch that was skipped to contextHistory, the same as if translate() had gone through it. Otherwise, the batch after it would start without the context right before it.
+# Only the last entries can still be in contextHistory afterwards, so only those are read from mainSpreadsheet.
+def addBatchToContextHistory( userInput=None, programSettings=None, startRow=None, batchSize=None ):
+    contextHistory = programSettings[ 'contextHistory' ]
+    maxLength = userInput[ 'contextHistoryMaxLength' ]
+    firstRow = startRow
+    if ( maxLength != 0 ) and ( len( contextHistory ) + batchSize > maxLength ):
+        if userInput[ 'contextHistoryReset' ] == True:
+            # contextHistory is wiped every time it reaches maxLength, so only the entries added after the last wipe are left.
+            firstRow = startRow + batchSize - ( ( ( len( contextHistory ) + batchSize - 1 ) % maxLength ) + 1 )
+            contextHistory.clear()
+        else:
+            firstRow = startRow + max( 0, batchSize - maxLength )
+
+    for rowNumber in range( firstRow, startRow + batchSize ):
+        addToContextHistory( userInput=userInput, contextHistory=contextHistory, untranslatedEntry=programSettings[ 'preprocessedColumn' ][ rowNumber - 1 ], translatedEntry=programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( rowNumber, programSettings[ 'currentMainSpreadsheetColumnNumber' ] ), speakerName=getSpeakerName( userInput=userInput, programSettings=programSettings, rowNumber=rowNumber ) )
+
+
 # translate() recieves untranslatedList which is a list of untranslated strings with programSettings[ 'currentRow' ] pointing to mainSpreadsheet entry that corresponds to the first item in that list. This function is responsible for translating untranslatedList and always returning the same number of entries as the input. This function must also handle updating the cache, reinserting the translated entries into mainSpreadsheet, and backing up cache/mainSpreadsheet regularly.
 # for cacheOnly, it should return None for every entry not found in the cache and never try to update the cache.
 # This function should:
@@ -1470,24 +2061,13 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
         # Goal is to create this:
         #listForThisBatchRaw.append( ( untranslatedData, speaker, alreadyTranslated, translatedData ) )
 
-        untranslatedData = programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( i ) )
+        untranslatedData = programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( i, 1 )
         # This makes sure untranslatedData is a string and also not empty.
         assert( untranslatedData.strip() != '' )
+        # The cache stores entries after preDictionary and revertAfterTranslationDictionary are applied, so search for that version.
+        preprocessedData = programSettings[ 'preprocessedColumn' ][ i - 1 ]
 
-        speaker = programSettings[ 'mainSpreadsheet' ].getCellValue( 'B' + str( i ) )
-        if isinstance( speaker, str ) == True:
-            speaker = speaker.strip()
-            if speaker == '':
-                speaker = None
-            else:
-                # Use characterNamesDictionary to translate character names prior to submission to translationEngine.
-                # The character names should have already been translated prior to this during parsing, but if not, then apply a band-aid fix here to translate them prior to submission to the translationEngine so the translationEngine code does not have to worry about it as much. This code should be harmless if the names are already translated.
-                if userInput[ 'characterNamesDictionary' ] != None:
-                    if speaker in userInput[ 'characterNamesDictionary' ]:
-                        speaker = userInput[ 'characterNamesDictionary' ][ speaker ]
-        else:
-            if speaker != None:
-                speaker = None
+        speaker = getSpeakerName( userInput=userInput, programSettings=programSettings, rowNumber=i )
 
         # if reTranslate == True, then the data in cache and spreadsheet are not considered.
         if userInput [ 'reTranslate' ] == True:
@@ -1495,9 +2075,9 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
             continue
 
         # alreadyTranslated depends on a lot of factors, so no way to determine that yet.
-        dataFromSpreadsheet = programSettings[ 'mainSpreadsheet' ].getCellValue( programSettings[ 'currentMainSpreadsheetColumn' ] + str( i ) )
+        dataFromSpreadsheet = programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( i, programSettings[ 'currentMainSpreadsheetColumnNumber' ] )
         # This is actually a non-trivial operation since there is cacheAnyMatch to consider, so put the logic into a function to retain clarity here.
-        dataFromCache = getCellValueFromCache( userInput=userInput, programSettings=programSettings, searchString=untranslatedData )
+        dataFromCache = getCellValueFromCache( userInput=userInput, programSettings=programSettings, searchString=preprocessedData )
         # Possible situations to consider:
         # Both None.
         if ( dataFromSpreadsheet == None ) and ( dataFromCache == None ):
@@ -1507,14 +2087,14 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
         if ( dataFromSpreadsheet == None ) and ( dataFromCache != None ):
             listForThisBatchRaw.append( ( untranslatedData, speaker, True, dataFromCache ) )
             # Aside: Update the data in mainSpreadsheet/cache now so that all values that are alreadyTranslated == True can be skipped during processing after translation logic completes.
-            programSettings[ 'mainSpreadsheet' ].setCellValue( programSettings[ 'currentMainSpreadsheetColumn' ] + str( i ), dataFromCache )
+            updateMainSpreadsheet( userInput=userInput, programSettings=programSettings, rowNumber=i, rawText=untranslatedData, translation=dataFromCache, syncJournal=False )
             cacheHitCounter += 1
             continue
         # Spreadsheet has data, but cache is None.
         if ( dataFromSpreadsheet != None ) and ( dataFromCache == None ):
             listForThisBatchRaw.append( ( untranslatedData, speaker, True, dataFromSpreadsheet ) )
             #def updateCache( userInput=None, programSettings=None, untranslatedEntry=None, translation=None ): 
-            updateCache( userInput=userInput, programSettings=programSettings, untranslatedEntry=untranslatedData, translation=dataFromSpreadsheet )
+            updateCache( userInput=userInput, programSettings=programSettings, untranslatedEntry=preprocessedData, translation=dataFromSpreadsheet )
             cacheHitCounter += 1
             continue
         # Both spreadsheet and cache have data.
@@ -1528,24 +2108,28 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
         if userInput[ 'overwriteWithCache' ] == True:
             # then take the data from the cache, write it to the spreadsheet and add the data taken from the cache as the translated data. Set alreadyTranslated = True
             listForThisBatchRaw.append( ( untranslatedData, speaker, True, dataFromCache ) )
-            programSettings[ 'mainSpreadsheet' ].setCellValue( programSettings[ 'currentMainSpreadsheetColumn' ] + str( i ), dataFromCache )
+            updateMainSpreadsheet( userInput=userInput, programSettings=programSettings, rowNumber=i, rawText=untranslatedData, translation=dataFromCache, syncJournal=False )
             cacheHitCounter += 1
             continue
         if userInput[ 'overwriteWithSpreadsheet' ] == True:
             listForThisBatchRaw.append( ( untranslatedData, speaker, True, dataFromSpreadsheet ) )
-            updateCache( userInput=userInput, programSettings=programSettings, untranslatedEntry=untranslatedData, translation=dataFromSpreadsheet )
+            updateCache( userInput=userInput, programSettings=programSettings, untranslatedEntry=preprocessedData, translation=dataFromSpreadsheet )
             cacheHitCounter += 1
             continue
 
         print( 'Error: Unspecified.' )
         sys.exit( 1 )
 
-    # Extract all entries that do not have translations yet.
+    # Translations that were taken from the cache above were added to the journal without syncing it.
+    if ( programSettings[ 'mainSpreadsheetJournal' ] != None ) and ( programSettings[ 'mainSpreadsheetJournal' ].pendingRecords > 0 ):
+        programSettings[ 'mainSpreadsheetJournal' ].sync()
+
+    # Extract all entries that do not have translations yet. translateMe holds the entries after preDictionary and revertAfterTranslationDictionary were applied.
     translateMe = []
     translateMeSpeakerList = []
-    for entry in listForThisBatchRaw:
+    for counter,entry in enumerate( listForThisBatchRaw ):
         if entry[ 2 ] == False:
-            translateMe.append( entry[ 0 ] )
+            translateMe.append( programSettings[ 'preprocessedColumn' ][ currentRow + counter - 1 ] )
             translateMeSpeakerList.append( entry[ 1 ] )
 
     # Sanity check.
@@ -1560,7 +2144,7 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
         # Update the mainSpreadsheet appropraitely, and then return.
         for counter,entry in enumerate( listForThisBatchRaw ):
             # listForThisBatchRaw.append( ( untranslatedData, speaker, alreadyTranslated, translatedData ) )
-            programSettings[ 'mainSpreadsheet' ].setCellValue( programSettings[ 'currentMainSpreadsheetColumn' ] + str( currentRow + counter ), entry[ 3 ] )
+            programSettings[ 'mainSpreadsheet' ].setCellValueByIndex( currentRow + counter, programSettings[ 'currentMainSpreadsheetColumnNumber' ], entry[ 3 ] )
 
         return listForThisBatchRaw
 
@@ -1571,54 +2155,75 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
         settings[ 'sceneSummary' ] = sceneSummary
 
     if programSettings[ 'batchModeEnabled' ] == True:
-        # This preDictionary replacement operation cannot be done outside of the batch code because non-batches need this done to both lines that will be submitted and lines that do not need to be submitted as part of the history feature. Doing it just above here, outside of the batch code, means this preDictionary would be run over the data twice which is incorrect behavior. The translate non-batch code could check for that, but that just complicates the code unnecessarily. Just move the preDictionary code here to gurantee it is only processed once.
-        # Perform replacements specified by preDictionary.
-        if userInput[ 'preDictionary' ] != None:
-            for index,entry in enumerate( translateMe ):
-                for key,item in userInput[ 'preDictionary' ].items():
-                    if translateMe[ index ].find( key ) != -1:
-                        translateMe[ index ] = translateMe[ index ].replace( key, item )
-
-        # Perform replacements specified by revertAfterTranslationDictionary.
-        if userInput[ 'revertAfterTranslationDictionary' ]  != None:
-            for index,entry in enumerate( translateMe ):
-                for key,item in userInput[ 'revertAfterTranslationDictionary' ].items():
-                    if translateMe[ index ].find( key ) != -1:
-                        translateMe[ index ] = translateMe[ index ].replace( key, item )
-
+        # preDictionary and revertAfterTranslationDictionary were already applied to translateMe by preprocessMainSpreadsheet().
         if userInput[ 'debug' ] == True:
             print( ( 'translateMe Raw=' + str( translateMe ) ).encode( consoleEncoding ) )
 
+        # Games repeat a lot of lines, like '...' or the same line of dialogue in different routes, so only submit each unique string once and copy the translation to every entry that has that string.
+        # The cache also only uses the string as the key, so the speaker is ignored here too. The speaker of the first occurrence is used.
+        uniqueTranslateMe = []
+        uniqueSpeakerList = []
+        # uniqueIndexList[ index ] is the index in uniqueTranslateMe that holds the string for translateMe[ index ].
+        uniqueIndexList = []
+        uniqueIndexDictionary = {}
+        for index,entry in enumerate( translateMe ):
+            if entry not in uniqueIndexDictionary:
+                uniqueIndexDictionary[ entry ] = len( uniqueTranslateMe )
+                uniqueTranslateMe.append( entry )
+                uniqueSpeakerList.append( translateMeSpeakerList[ index ] )
+            uniqueIndexList.append( uniqueIndexDictionary[ entry ] )
+        duplicateCount = len( translateMe ) - len( uniqueTranslateMe )
+        programSettings[ 'duplicateRequestsSaved' ] += duplicateCount
+        if ( userInput[ 'verbose' ] == True ) and ( duplicateCount > 0 ):
+            print( 'Info: Skipping ' + str( duplicateCount ) + ' duplicate entries in this batch.' )
+
         # Core logic.
-        settings[ 'speakerList' ] = translateMeSpeakerList
+        settings[ 'speakerList' ] = uniqueSpeakerList
         # TODO: This needs to enforce userInput[ 'timeout' ].
-        postTranslatedList = programSettings[ 'translationEngine' ].batchTranslate( translateMe, settings=settings )
+        postTranslatedList = submitBatchTranslation( userInput=userInput, programSettings=programSettings, translateMe=uniqueTranslateMe, settings=settings )
 
         if userInput[ 'debug' ] == True:
             print( ( 'postTranslatedList Raw=' + str( postTranslatedList ) ).encode( consoleEncoding ) )
 
+        if postTranslatedList == None:
+            print( ( 'Error: The translation engine did not return a valid batch for rows ' + str( currentRow ) + '-' + str( currentRow + len( listForThisBatchRaw ) - 1 ) + '.' ).encode( consoleEncoding ) )
+            sys.exit( 1 )
+
+        # Copy the translations back to every entry, including the duplicates. Some engines update the entries in place during preprocessing, so copy those changes back to translateMe too.
+        postTranslatedList = [ postTranslatedList[ uniqueIndex ] for uniqueIndex in uniqueIndexList ]
+        for index,uniqueIndex in enumerate( uniqueIndexList ):
+            translateMe[ index ] = uniqueTranslateMe[ uniqueIndex ]
+
         # Perform replacements specified by revertAfterTranslationDictionary, in reverse.
         if userInput[ 'revertAfterTranslationDictionary' ] != None:
             for index,entry in enumerate( postTranslatedList ):
-                for key,item in userInput[ 'revertAfterTranslationDictionary' ].items():
-                    if postTranslatedList[ index ].find( item ) != -1:
-                        postTranslatedList[ index ] = postTranslatedList[ index ].replace( item, key )
+                if entry == None:
+                    continue
+                postTranslatedList[ index ] = userInput[ 'revertAfterTranslationDictionaryReverseReplacer' ].replace( entry )
 
         # Update cache here.
         # if cache is enabled, then add the untranslated line and the translated line as a pair to the cache file.
         if ( userInput[ 'cacheEnabled' ] == True ) and ( userInput[ 'readOnlyCache' ] == False ):
+            # Duplicates only need to be added once.
+            cachedUniqueIndexes = set()
             for counter,translatedEntry in enumerate( postTranslatedList ):
-                updateCache( userInput=userInput, programSettings=programSettings, untranslatedEntry=translateMe[ counter ], translation=translatedEntry )
+                # Some engines return None for entries they could not translate. Never add those to the cache.
+                if ( translatedEntry == None ) or ( uniqueIndexList[ counter ] in cachedUniqueIndexes ):
+                    continue
+                cachedUniqueIndexes.add( uniqueIndexList[ counter ] )
+                # Batches can be very large, so only fsync the journal once after the entire batch has been added.
+                updateCache( userInput=userInput, programSettings=programSettings, untranslatedEntry=translateMe[ counter ], translation=translatedEntry, syncJournal=False )
+            if programSettings[ 'cacheJournal' ] != None:
+                programSettings[ 'cacheJournal' ].sync()
 
         # Check with postDictionary, a Python dictionary for possible updates.
         if userInput[ 'postDictionary' ] != None:
             for counter,entry in enumerate( postTranslatedList ):
-                for key,item in postDictionary.items():
-                    #print( 'key=', key, 'item=', item )
-                    if postTranslatedList[counter].find( key ) != -1:
-                        if userInput[ 'debug' ] == True:
-                            print( ( 'Found key=' + key + ' at line=' + str( counter ) ).encode( consoleEncoding ) )
-                        postTranslatedList[ counter ] = postTranslatedList[ counter ].replace( key, item )
+                if entry == None:
+                    continue
+                postTranslatedList[ counter ] = userInput[ 'postDictionaryReplacer' ].replace( entry )
+                if ( userInput[ 'debug' ] == True ) and ( postTranslatedList[ counter ] != entry ):
+                    print( ( 'postDictionary updated line=' + str( counter ) ).encode( consoleEncoding ) )
 
         # Update mainSpreadsheet.
         # Every tempList in listForThisBatchRaw looks like this: ( ( untranslatedData, speaker, alreadyTranslated, translatedData ) )
@@ -1628,11 +2233,13 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
             if tempList[ 2 ] == True:
                 continue
 
-            currentTranslatedCellAddress = programSettings[ 'currentMainSpreadsheetColumn' ] + str( currentRow + counter )
             # then write translations to mainSpreadsheet cell.
-            programSettings[ 'mainSpreadsheet' ].setCellValue( currentTranslatedCellAddress , postTranslatedList[ translateMeCounter ] )
+            updateMainSpreadsheet( userInput=userInput, programSettings=programSettings, rowNumber=currentRow + counter, rawText=tempList[ 0 ], translation=postTranslatedList[ translateMeCounter ], syncJournal=False )
             translateMeCounter += 1
 
+        if programSettings[ 'mainSpreadsheetJournal' ] != None:
+            programSettings[ 'mainSpreadsheetJournal' ].sync()
+
         # The resulting output is already correct.
         if userInput[ 'backupsEnabled' ] == True:
             # Create a backup. Backups are on a minimum timer, so calling this a lot should not be an issue.
@@ -1645,9 +2252,9 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
         # queue vs deque: queue has myQueue.full() to check if it is full or not, but deque has myQueue.popleft() which is ideal here. len(myQueue) == contextHistoryMaxLength can be used with deque as a less convenient alternative to myQueue.full().
         #contextHistory is formatted as:
         #contextHistory = [ ( untranslatedString1, translatedString2, speaker ), ( uString1, tString2, None ), ( uString1, tString2, speaker ) ]
+        # contextHistory is kept in programSettings, so the first entries of a batch still have the last entries of the previous batch as context, including batches that were skipped because they were already translated. See: addBatchToContextHistory()
         if userInput[ 'contextHistoryEnabled' ] == True:
-            #contextHistory = []
-            contextHistory = collections.deque()
+            contextHistory = programSettings[ 'contextHistory' ]
         else:
             contextHistory = None
 
@@ -1658,6 +2265,16 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
             #tempIterable = tqdm.tqdm( listForThisBatchRaw, leave=False )
             tempIterable = tqdm.tqdm( listForThisBatchRaw, leave=True )
 
+        # if concurrent requests are enabled, then submit the entries in translateMe to the translation engine ahead of time. The results still come back in the same order as translateMe, so the logic below that updates the cache and mainSpreadsheet stays the same.
+        # contextHistory is always None here when concurrent requests are enabled. main() checks for that.
+        if programSettings[ 'concurrentRequestsEnabled' ] == True:
+            concurrentTranslations = submitConcurrentTranslations( userInput=userInput, programSettings=programSettings, translateMe=translateMe, translateMeSpeakerList=translateMeSpeakerList, settings=settings )
+        else:
+            concurrentTranslations = None
+
+        # Identical entries in the same batch are only submitted once. The key is untranslatedEntry after preDictionary and revertAfterTranslationDictionary. The value is the translation before the reverse revertAfterTranslationDictionary replacements. Failed translations are not stored, so they are tried again.
+        translatedThisBatch = {}
+
         # This counter points to the current entry in translateMe.
         translateMeCounter = 0
         # for every cell in the current batch, try to translate it.
@@ -1669,45 +2286,23 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
             # tempList[ 0 ], a string inside of a tuple, cannot be modified, but there is a need to alter it prior to submitting it to the translation engine by using preDictionary and revertAfterTranslationDictionary, so making a copy is unavoidable. tempList [ 0 ] is also guranteed to hold the original unmodified value.
             # In addition to that, to add untranslatedEntry to contextHistory correctly, the value of untranslatedEntry after preDictionary but before revertAfterTranslationDictionary must also be known since the revert changes are not valid context. Or are they? Whatever is being submitted to the translation engine is the context which means after revertAfterTranslationDictionary is the correct context.
             # Then again, the user might be using revertAfterTranslationDictionary exactly because they do not want something to be part of the context or otherwise remembered in any way, cache, mainSpreadsheet, sceneSummaryCache. revertAfterTranslationDictionary does make the cache less useful. It is a toss up whether to include it or not.
-            untranslatedEntry = tempList[ 0 ]
+            # Update: preprocessMainSpreadsheet() already applied preDictionary and revertAfterTranslationDictionary to a copy of column A, so take untranslatedEntry from that copy.
+            untranslatedEntry = programSettings[ 'preprocessedColumn' ][ currentRow + counter - 1 ]
 
             # Sanity checks.
-            assert( tempList[ 0 ] == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( currentRow + counter ) ) )
+            assert( tempList[ 0 ] == programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( currentRow + counter, 1 ) )
             # translateMe is a subset of listForThisBatchRaw. Entries from translateMe can only be validated if they happen to overlap with listForThisBatchRaw[i][2] == False
             if tempList[ 2 ] == False:
                 # if the current tempList is not already translated, then the current tempList must have an untranslatedEntry that should match the original data at the correct spot. That has already been verified, but the entry from translateMe[ translateMeCounter ] has not been verified.
-                assert( tempList[ 0 ] == translateMe[ translateMeCounter ] )
+                assert( untranslatedEntry == translateMe[ translateMeCounter ] )
 
             # Get speaker, if any. Either None or a string.
             tempSpeakerName = tempList[ 1 ]
 
-            # Perform replacements specified by preDictionary.
-            if userInput[ 'preDictionary' ] != None:
-                for key,item in userInput[ 'preDictionary' ].items():
-                    if untranslatedEntry.find( key ) != -1:
-                        untranslatedEntry = untranslatedEntry.replace( key, item )
-
-            # Perform replacements specified by revertAfterTranslationDictionary.
-            if userInput[ 'revertAfterTranslationDictionary' ] != None:
-                for key,item in userInput[ 'revertAfterTranslationDictionary' ].items():
-                    if untranslatedEntry.find( key ) != -1:
-                        untranslatedEntry = untranslatedEntry.replace( key, item )
-
             # if the current cell contents are already translated, then just add to history and continue to the next line.
             if tempList[ 2 ] == True:
                 if userInput[ 'contextHistoryEnabled' ] == True:
-                    if ( len( contextHistory ) >= userInput[ 'contextHistoryMaxLength' ] ) and ( userInput[ 'contextHistoryMaxLength' ] != 0 ):
-                        if userInput[ 'contextHistoryReset' ] == True:
-                            # LLMs tend to start hallucinating pretty fast and old history can corrupt new entries quickly, so just wipe history every once in a while as a workaround.
-                            # Theoretically, it could make sense to keep history at max for a while and then wipe it later, but it seems like it would be model/dataset/risk level specific for how long to leave it at max. For now, Just wipe it whenever it hits max.
-                            contextHistory.clear()
-                        else:
-                            # Remove only the oldest entry.
-                            # Only for this feature to work correctly, contextHistory should be changed back to a queue since list.pop is an O(n) operation. In queue's it is O(1). Queue is not thread safe which intereferes with most implementation types of userInput[ 'timout' ]. TODO: Update this appropriately. Somehow.
-                            # https://www.w3schools.com/python/ref_list_pop.asp
-                            contextHistory.popleft()
-                    # ( untranslatedString1, translatedString2, speaker )
-                    contextHistory.append( ( untranslatedEntry, tempList[ 3 ], tempList[1] ) )
+                    addToContextHistory( userInput=userInput, contextHistory=contextHistory, untranslatedEntry=untranslatedEntry, translatedEntry=tempList[ 3 ], speakerName=tempList[ 1 ] )
 
                 # Append the translated data to the output. # This is probably a mistake
                 # postTranslatedList.append( tempList[ 3 ] )
@@ -1727,7 +2322,14 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
             # TODO: This needs to enforce userInput[ 'timeout' ]. Or perhaps the calling code should do it? Well, it needs to be here since this is where the call to the translation engine takes place and timeout refers to each individual translation, not to batches of translations. It only refers to batches if batchModeEnabled.
             translatedEntry = None
             try:
-                translatedEntry = programSettings[ 'translationEngine' ].translate( untranslatedEntry, settings=settings )
+                if concurrentTranslations != None:
+                    # The request was already submitted, so just wait for it to finish. submitConcurrentTranslations() handles duplicates itself.
+                    translatedEntry = next( concurrentTranslations )
+                elif untranslatedEntry in translatedThisBatch:
+                    translatedEntry = translatedThisBatch[ untranslatedEntry ]
+                    programSettings[ 'duplicateRequestsSaved' ] += 1
+                else:
+                    translatedEntry = programSettings[ 'translationEngine' ].translate( untranslatedEntry, settings=settings )
             except requests.exceptions.JSONDecodeError:
                 print( 'Error: Internal engine error in for translationEngine=' + userInput[ 'mode' ] )
                 translatedEntry = None
@@ -1747,26 +2349,16 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
                 postTranslatedList.append( None )
                 continue
 
+            translatedThisBatch[ untranslatedEntry ] = translatedEntry
+
             # After translation, history should be updated before revertAfterTranslationDictionary is applied otherwise there will be invalid data submitted to the translation engine.
             # Conversely, it should not be added to the cache until after reversion takes place because the cache should hold a translation that represents the original data as closely as possible.
             if userInput[ 'contextHistoryEnabled' ] == True:
-                if ( len( contextHistory ) >= userInput[ 'contextHistoryMaxLength' ] ) and ( userInput[ 'contextHistoryMaxLength' ] != 0 ):
-                    if userInput[ 'contextHistoryReset' ] == True:
-                        # LLMs tend to start hallucinating pretty fast and old history can corrupt new entries quickly, so just wipe history every once in a while as a workaround. Theoretically, it could make sense to keep history at max for a while and then wipe it later, but for now, just wipe it whenever it hits max.
-                        contextHistory.clear()
-                    else:
-                        # Remove only the oldest entry.
-                        # Only for this feature to work correctly, contextHistory should be changed back to a queue since list.pop is an O(n) operation. In queue's it is O(1). Queue is not thread safe which intereferes with most implementation types of userInput[ 'timout' ]. TODO: Update this appropriately. Somehow.
-                        # https://www.w3schools.com/python/ref_list_pop.asp
-                        contextHistory.popleft()
-                # ( untranslatedString1, translatedString2, speaker )
-                contextHistory.append( ( untranslatedEntry, translatedEntry, tempSpeakerName ) )
+                addToContextHistory( userInput=userInput, contextHistory=contextHistory, untranslatedEntry=untranslatedEntry, translatedEntry=translatedEntry, speakerName=tempSpeakerName )
 
             # Perform replacements specified by revertAfterTranslationDictionary, in reverse.
             if userInput[ 'revertAfterTranslationDictionary' ] != None:
-                for key,item in userInput[ 'revertAfterTranslationDictionary' ].items():
-                    if translatedEntry.find( item ) != -1:
-                        translatedEntry = translatedEntry.replace( item, key )
+                translatedEntry = userInput[ 'revertAfterTranslationDictionaryReverseReplacer' ].replace( translatedEntry )
 
             # Update cache and mainSpreadsheet here.
             # Update cache.
@@ -1775,16 +2367,13 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
 
             # Check with postDictionary, a Python dictionary for possible updates.
             if userInput[ 'postDictionary' ] != None:
-                for key,item in userInput[ 'postDictionary' ].items():
-                    if translatedEntry.find( key ) != -1:
-                        translatedEntry = translatedEntry.replace( key, item )
+                translatedEntry = userInput[ 'postDictionaryReplacer' ].replace( translatedEntry )
 
             postTranslatedList.append( translatedEntry )
 
             # Update mainSpreadsheet.
-            currentTranslatedCellAddress = programSettings[ 'currentMainSpreadsheetColumn' ] + str( currentRow + counter )
             # then write translations to mainSpreadsheet cell.
-            programSettings[ 'mainSpreadsheet' ].setCellValue( currentTranslatedCellAddress , translatedEntry )
+            updateMainSpreadsheet( userInput=userInput, programSettings=programSettings, rowNumber=currentRow + counter, rawText=tempList[ 0 ], translation=translatedEntry )
 
             if userInput[ 'backupsEnabled' ] == True:
                 # Create a backup. Backups are on a minimum timer, so calling this a lot should not be an issue.
@@ -1816,10 +2405,448 @@ def translate( userInput=None, programSettings=None, untranslatedListSize=None,
             finalOutput.append( postTranslatedList[ postTranslatedListCounter ] )
             postTranslatedListCounter += 1
 
+    # Every entry that has a translation now was written to mainSpreadsheet and, if possible, to the cache. See: buildTranslatedRows()
+    if ( userInput[ 'cacheEnabled' ] == True ) and ( userInput[ 'readOnlyCache' ] == False ):
+        newFlags = translatedInSpreadsheetFlag | translatedInCacheFlag
+    else:
+        newFlags = translatedInSpreadsheetFlag
+    for counter,translatedEntry in enumerate( finalOutput ):
+        if translatedEntry != None:
+            programSettings[ 'translatedRows' ][ currentRow + counter - 1 ] = programSettings[ 'translatedRows' ][ currentRow + counter - 1 ] | newFlags
+
     #currentRow = programSettings[ 'currentRow' ]
     return finalOutput
 
 
+# Returns the flags for rowNumber based on the current contents of mainSpreadsheet and the cache.
+def getTranslatedRowFlags( userInput=None, programSettings=None, rowNumber=None ):
+    flags = 0
+    if programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( rowNumber, programSettings[ 'currentMainSpreadsheetColumnNumber' ] ) != None:
+        flags = flags | translatedInSpreadsheetFlag
+    if getCellValueFromCache( userInput=userInput, programSettings=programSettings, searchString=programSettings[ 'preprocessedColumn' ][ rowNumber - 1 ] ) != None:
+        flags = flags | translatedInCacheFlag
+    return flags
+
+
+# programSettings[ 'translatedRows' ] is a bytearray with one entry per row of mainSpreadsheet. Like preprocessedColumn, the entry for row number x is at index x - 1. Each entry is a combination of translatedInSpreadsheetFlag and translatedInCacheFlag.
+# It is built once here after the cache has been loaded and is updated by translate() after every batch, so checking if a batch is already translated only needs to count the entries in a slice instead of searching mainSpreadsheet and the cache for every row again.
+# Translations are only ever added, never removed, so a flag that is set is always still correct. However, a translation added to the cache for one row also adds it for every other row with the same text, and those rows are not updated right away. Rows that are missing a flag are checked again when needed. See: refreshTranslatedRows()
+def buildTranslatedRows( userInput=None, programSettings=None ):
+    translatedRows = bytearray( len( programSettings[ 'preprocessedColumn' ] ) )
+    # With reTranslate, nothing counts as translated.
+    if userInput[ 'reTranslate' ] != True:
+        for rowNumber in range( 2, len( translatedRows ) + 1 ):
+            translatedRows[ rowNumber - 1 ] = getTranslatedRowFlags( userInput=userInput, programSettings=programSettings, rowNumber=rowNumber )
+    programSettings[ 'translatedRows' ] = translatedRows
+
+
+# Check the rows in the batch that do not have every flag set again.
+def refreshTranslatedRows( userInput=None, programSettings=None, startRow=None, batchSize=None ):
+    translatedRows = programSettings[ 'translatedRows' ]
+    for rowNumber in range( startRow, startRow + batchSize ):
+        if translatedRows[ rowNumber - 1 ] != ( translatedInSpreadsheetFlag | translatedInCacheFlag ):
+            translatedRows[ rowNumber - 1 ] = translatedRows[ rowNumber - 1 ] | getTranslatedRowFlags( userInput=userInput, programSettings=programSettings, rowNumber=rowNumber )
+
+
+# Returns True if every entry in the batch that starts at startRow already has a translation in mainSpreadsheet or the cache. There is not any point in generating a sceneSummary for those batches.
+def batchIsAlreadyTranslated( userInput=None, programSettings=None, startRow=None, batchSize=None ):
+    if userInput[ 'reTranslate' ] == True:
+        return False
+
+    # bytearray.count() runs in C, so this is fast even for very large batches.
+    if programSettings[ 'translatedRows' ][ startRow - 1 : startRow - 1 + batchSize ].count( 0 ) == 0:
+        return True
+    refreshTranslatedRows( userInput=userInput, programSettings=programSettings, startRow=startRow, batchSize=batchSize )
+    return programSettings[ 'translatedRows' ][ startRow - 1 : startRow - 1 + batchSize ].count( 0 ) == 0
+
+
+# Returns True if translate() would not change anything for the batch that starts at startRow. That is the case when every entry is already in mainSpreadsheet and also already in the cache, or the cache cannot be updated, and none of the options that replace existing translations are enabled.
+def batchNeedsNoUpdates( userInput=None, programSettings=None, startRow=None, batchSize=None ):
+    if ( userInput[ 'reTranslate' ] == True ) or ( userInput[ 'overwriteWithCache' ] == True ) or ( userInput[ 'overwriteWithSpreadsheet' ] == True ):
+        return False
+
+    batchRows = programSettings[ 'translatedRows' ][ startRow - 1 : startRow - 1 + batchSize ]
+    if ( userInput[ 'cacheEnabled' ] == True ) and ( userInput[ 'readOnlyCache' ] == False ):
+        # translate() would add every entry that is only in mainSpreadsheet to the cache.
+        return batchRows.count( translatedInSpreadsheetFlag | translatedInCacheFlag ) == batchSize
+    # Otherwise, only entries that are missing from mainSpreadsheet would change.
+    return ( batchRows.count( translatedInSpreadsheetFlag ) + batchRows.count( translatedInSpreadsheetFlag | translatedInCacheFlag ) ) == batchSize
+
+
+# Fills in every empty cell of the current model column in mainSpreadsheet that already has a translation in the cache before any batch is processed. buildTranslatedRows() already searched the cache for every row, so only the rows flagged as being only in the cache need to be read again. translate() would fill in the same rows one batch at a time, but doing it here in one pass means every batch that has nothing left to translate can be left out of the translation loop entirely. See: getRemainingBatchList()
+# Returns a tuple: ( the number of rows filled in from the cache, the number of rows that did not have a translation in mainSpreadsheet ).
+def prefillFromCache( userInput=None, programSettings=None ):
+    translatedRows = programSettings[ 'translatedRows' ]
+    # The header is always 0, so do not count it.
+    untranslatedCount = translatedRows.count( 0 ) + translatedRows.count( translatedInCacheFlag ) - 1
+
+    # With reTranslate, the cache is not used to fill in anything. if sceneSummaryEnableTranslation == False, then translate() is never called, so mainSpreadsheet is never updated either.
+    if ( userInput[ 'cacheEnabled' ] != True ) or ( userInput[ 'reTranslate' ] == True ):
+        return ( 0, untranslatedCount )
+    if ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnableTranslation' ] == False ):
+        return ( 0, untranslatedCount )
+
+    filledCount = 0
+    # bytearray.find() runs in C, so rows that do not need anything are skipped without a Python loop.
+    index = translatedRows.find( translatedInCacheFlag )
+    while index != -1:
+        translatedEntry = getCellValueFromCache( userInput=userInput, programSettings=programSettings, searchString=programSettings[ 'preprocessedColumn' ][ index ] )
+        if translatedEntry != None:
+            # Rows start at 1. These are journaled the same as translations from the translation engine, so they are also restored after a crash.
+            updateMainSpreadsheet( userInput=userInput, programSettings=programSettings, rowNumber=index + 1, rawText=programSettings[ 'mainSpreadsheet' ].getCellValueByIndex( index + 1, 1 ), translation=translatedEntry, syncJournal=False )
+            translatedRows[ index ] = translatedInSpreadsheetFlag | translatedInCacheFlag
+            filledCount += 1
+        index = translatedRows.find( translatedInCacheFlag, index + 1 )
+
+    if ( programSettings[ 'mainSpreadsheetJournal' ] != None ) and ( programSettings[ 'mainSpreadsheetJournal' ].pendingRecords > 0 ):
+        programSettings[ 'mainSpreadsheetJournal' ].sync()
+    return ( filledCount, untranslatedCount )
+
+
+# Returns the work list for the translation loop: the index in untranslatedEntriesColumnFull of the first entry of every batch, starting at batchStartIndex, that translate() would still change. Batches are still the same size and start at the same rows as before, so sceneSummaryCache hashes and batch numbers do not change. Only the batches themselves are skipped.
+# Rows are only ever added to the cache and mainSpreadsheet, never removed, so a batch that needs no updates now will not need any later either.
+def getRemainingBatchList( userInput=None, programSettings=None, batchStartIndex=0, entryCount=None ):
+    batchSizeLimit = userInput[ 'batchSizeLimit' ]
+    remainingBatchList = []
+    for i in range( batchStartIndex, entryCount, batchSizeLimit ):
+        currentBatchSize = min( batchSizeLimit, entryCount - i )
+        # Row 2 is the first entry.
+        if batchNeedsNoUpdates( userInput=userInput, programSettings=programSettings, startRow=i + 2, batchSize=currentBatchSize ) == False:
+            remainingBatchList.append( i )
+    return remainingBatchList
+
+
+# Submits getSceneSummary() to programSettings[ 'sceneSummaryExecutor' ] for the batch that starts at startRow and for the next sceneSummaryPrefetch batches after it, unless they were already submitted. Then returns the future for the batch at startRow, or None if alreadyTranslated == True.
+# The executor only has one thread, so summaries are still generated one at a time and in order, and sceneSummaryCache is only ever used by that thread. Only the translation of the current batch runs at the same time.
+# Whether a later batch is already translated is checked now, before the current batch is translated, so a summary might occasionally be generated for a batch that ends up fully translated from the cache. That summary is still saved to sceneSummaryCache.
+def prefetchSceneSummaries( userInput=None, programSettings=None, startRow=None, batchSize=None, alreadyTranslated=False ):
+    # The last row number in mainSpreadsheet. preprocessedColumn includes the header row.
+    lastRow = len( programSettings[ 'preprocessedColumn' ] )
+    sceneSummaryFutures = programSettings[ 'sceneSummaryFutures' ]
+
+    for counter in range( 0, userInput[ 'sceneSummaryPrefetch' ] + 1 ):
+        batchStartRow = startRow + ( counter * batchSize )
+        if batchStartRow > lastRow:
+            break
+        if batchStartRow in sceneSummaryFutures:
+            continue
+        batchSizeForThisRow = min( batchSize, lastRow - batchStartRow + 1 )
+        # The current batch is checked by the caller right before this.
+        if counter == 0:
+            batchAlreadyTranslated = alreadyTranslated
+        else:
+            batchAlreadyTranslated = batchIsAlreadyTranslated( userInput=userInput, programSettings=programSettings, startRow=batchStartRow, batchSize=batchSizeForThisRow )
+        if batchAlreadyTranslated == True:
+            sceneSummaryFutures[ batchStartRow ] = None
+            continue
+        sceneSummaryFutures[ batchStartRow ] = programSettings[ 'sceneSummaryExecutor' ].submit( getSceneSummary, userInput=userInput, programSettings=programSettings, untranslatedListSize=batchSizeForThisRow, startRow=batchStartRow )
+
+    sceneSummaryFuture = sceneSummaryFutures.pop( startRow )
+    if alreadyTranslated == True:
+        return None
+    # if this batch was already translated when it was checked ahead of time but is not anymore, then generate the summary now. This should not happen since translations are only ever added.
+    if sceneSummaryFuture == None:
+        sceneSummaryFuture = programSettings[ 'sceneSummaryExecutor' ].submit( getSceneSummary, userInput=userInput, programSettings=programSettings, untranslatedListSize=batchSize, startRow=startRow )
+    return sceneSummaryFuture
+
+
+# Generates the sceneSummary for, translates, and records progress for the currentBatchSize entries in mainSpreadsheet that start at programSettings[ 'currentRow' ]. Afterwards, programSettings[ 'currentRow' ] points to the first entry of the next batch.
+def processBatch( userInput=None, programSettings=None, currentBatchSize=None, batchNumber=None ):
+    if userInput[ 'sceneSummaryEnabled' ] == False:
+        sceneSummary = None
+    #if userInput[ 'sceneSummaryEnabled' ] != False:
+    else:
+        # There is not any point in generating a sceneSummary for entries that have already been translated or are in the cache, so check for that here.
+        # tempList=[]
+        # programSettings=[]
+
+        alreadyTranslated = batchIsAlreadyTranslated( userInput=userInput, programSettings=programSettings, startRow=programSettings[ 'currentRow' ], batchSize=currentBatchSize )
+
+        if programSettings[ 'sceneSummaryExecutor' ] != None:
+            # Start generating the summaries for the next few batches before waiting on this one.
+            sceneSummaryFuture = prefetchSceneSummaries( userInput=userInput, programSettings=programSettings, startRow=programSettings[ 'currentRow' ], batchSize=currentBatchSize, alreadyTranslated=alreadyTranslated )
+        else:
+            sceneSummaryFuture = None
+
+        if alreadyTranslated == True:
+            sceneSummary = None
+        else:
+            # This returns either None or a string.
+            if sceneSummaryFuture != None:
+                sceneSummary = sceneSummaryFuture.result()
+            else:
+                sceneSummary = getSceneSummary( userInput=userInput, programSettings=programSettings, untranslatedListSize=currentBatchSize )
+
+            if ( not isinstance( sceneSummary, str ) == True ) or ( sceneSummary == '' ):
+                # Error generating sceneSummary.
+                print( 'Warning: Unable to generate summary for ' + userInput[ 'fileToTranslateFileNameWithoutPath' ] + ':' + str( programSettings[ 'currentRow' ] ) + '-' + str( programSettings[ 'currentRow' ] + currentBatchSize ) + ' Skipping.' )
+                sceneSummary = None
+
+
+    # There are a few special failure cases here:
+    # if sceneSummaryEnabled == True but sceneSummaryEnableTranslation == False, then nothing should be translated regardless of other settings.
+    if ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnableTranslation' ] == False ):
+        recordProgress( userInput=userInput, programSettings=programSettings, lastCompletedRow=programSettings[ 'currentRow' ] + currentBatchSize - 1, batchNumber=batchNumber )
+        programSettings[ 'currentRow' ] += currentBatchSize
+        return
+
+#        if sceneSummaryEnabled:
+#            sceneSummary None, alreadyTranslated == True
+#                pass
+#            sceneSummary != None, alreadyTranslated == True
+#                pass
+#            sceneSummary None, alreadyTranslated == False
+#                error out
+#            sceneSummary != None, alreadyTranslated == False
+#                pass
+    # if sceneSummary failed to generate but it is enabled, then consider it improper to attempt to translate without it.
+    # However, if the contents of the spreadsheet are already translated, then go ahead and write output as normal.
+    if userInput[ 'sceneSummaryEnabled' ] == True:
+        if ( sceneSummary == None ) and ( alreadyTranslated == False ):
+            programSettings[ 'currentRow' ] += currentBatchSize
+            return
+
+    # Large parts of a file that were already translated in a previous run can be skipped without reading every row again.
+    if batchNeedsNoUpdates( userInput=userInput, programSettings=programSettings, startRow=programSettings[ 'currentRow' ], batchSize=currentBatchSize ) == True:
+        if userInput[ 'debug' ] == True:
+            print( 'Skipping already translated rows ' + str( programSettings[ 'currentRow' ] ) + '-' + str( programSettings[ 'currentRow' ] + currentBatchSize - 1 ) )
+        if userInput[ 'contextHistoryEnabled' ] == True:
+            addBatchToContextHistory( userInput=userInput, programSettings=programSettings, startRow=programSettings[ 'currentRow' ], batchSize=currentBatchSize )
+        recordProgress( userInput=userInput, programSettings=programSettings, lastCompletedRow=programSettings[ 'currentRow' ] + currentBatchSize - 1, batchNumber=batchNumber )
+        programSettings[ 'currentRow' ] += currentBatchSize
+        return
+
+    # translate() should only consider the size of untranslatedList as valid since it has programSettings[ 'currentRow' ] as the correct pointer to the first entry already and mainSpreadsheet needs to be parsed again to determine which entries already have translations, which entries can be found in the cache, the speaker names, and the order of each entry for {history}. Since it needs to be re-parsed anyway, passing untranslatedListSize makes more sense than passing the untranslatedList[ slice ].
+    # translate() returns a list where each entry is a string that represents the translated contents.
+    translatedList = translate( userInput=userInput, programSettings=programSettings, untranslatedListSize=currentBatchSize, sceneSummary=sceneSummary )
+
+    # Does this still make sense?
+    assert( len( translatedList ) == currentBatchSize )
+
+    # This will attempt to backup mainSpreadsheet after each translation loop. Does this make sense?
+    # No, because processing a batch could take longer, several hours, than the minimum time to save backupMainSpreadsheet(), a few minutes. To avoid losing data due to insufficent mainSpreadsheet backups, there should be an attempt to back it up after every single translation for local LLMs, especially since it is on a minimum timer anyway. However, if updating main spreadsheet here instead of inside the translate() function, then backing up main spreadsheet here is unavoidable because it does not make sense to backupMainSpreadsheet() inside the translate() function since that would back it up prior to updating it. What makes more sense, waiting for the batches to return to update mainSpreadsheet or updating mainSpreadsheet within translate() after every entry?
+    # Normally, it would always make sense to update inside of translate() after every entry, but cache gets updated regardless so there is no lost data. Hummm. Well, that does not consider operations were cache is disabled and backing up mainSpreadsheet() regularly is the only way to save data if an error occurs in that situation. Is cache a required feature? No. Therefore this backupMainSpreadsheet() behavior must be moved inside of translate so it occurs after every translation to minimize loss of data as intended. Thus, that also means the code to update mainSpreadsheet must also take place inside of translate().
+    #backupMainSpreadsheet( userInput=userInput, programSettings=programSettings, outputName=userInput[ 'backupsFileNameWithPathAndDate' ], force=False )
+    recordProgress( userInput=userInput, programSettings=programSettings, lastCompletedRow=programSettings[ 'currentRow' ] + currentBatchSize - 1, batchNumber=batchNumber )
+    # Increment pointer by batch size so next loop begins at the start of the next entry.
+    programSettings[ 'currentRow' ] += currentBatchSize
+
+
+# Translates every entry in mainSpreadsheet in batches of batchSizeLimit. The entire mainSpreadsheet is already in memory.
+def translateMainSpreadsheet( userInput=None, programSettings=None ):
+    consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    untranslatedEntriesColumnFull = programSettings[ 'mainSpreadsheet' ].getColumn( 'A' )
+    preprocessMainSpreadsheet( userInput=userInput, programSettings=programSettings )
+
+    if userInput[ 'debug' ] == True:
+        # Debug code.
+        for counter,untranslatedString in enumerate( untranslatedEntriesColumnFull ):
+            assert( untranslatedString == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( counter + 1 )) )
+        print( len( untranslatedEntriesColumnFull ) )
+ 
+    untranslatedEntriesColumnFull.pop( 0 ) # This removes the header and returns the header.
+
+    # Debug code.
+    if userInput[ 'debug' ] == True:
+        print( len( untranslatedEntriesColumnFull ) )
+        for counter,untranslatedString in enumerate( untranslatedEntriesColumnFull ):
+            assert( untranslatedString == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( counter + 2 ) ) )
+
+        currentRowTemp = 2 
+        for listCounter,untranslatedString in enumerate( untranslatedEntriesColumnFull ):
+            try:
+                assert( untranslatedString == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( currentRowTemp )) )
+            except:
+                print( 'Mismatch:')
+                print( ( 'untranslatedString=' + str( untranslatedString ) ).encode( consoleEncoding ) )
+                print( ( 'mainSpreadsheet.getCellValue( A' + str( currentRowTemp ) + ' )=' + mainSpreadsheet.getCellValue( 'A' + str( currentRowTemp ) ) ).encode( consoleEncoding ) )
+                raise
+            currentRowTemp += 1
+
+
+    # currentRow is the current and correct pointer to the current contents being processed in mainSpreadsheet.
+    # Start with row 2. Rows start with 1 instead of 0 and row 1 is always headers. Therefore, row 2 is the first row number with untranslated/translated pairs.
+    # Split it into two values, one global value, programSettings[ 'currentRow' ], that keeps track of the pointer globally and a local value used to iterate through the current batch.
+    programSettings[ 'currentRow' ] = 2
+
+    # if there is a limit to how large a batch can be, then the server should handle that internally.
+    # Update: Technically yes, but it could also make sense to limit batch sizes on the application side, like if translating tens of thousands of lines or more, so there should also be a batchSize UI element in addition to any internal engine batch size limitations. Implemented as batchSizeLimit , now just need to implement the batch limiting code. Update: Done.
+    # This works because if a list index goes past the maximum size of the list when splicing, then it will just return the rest of the items and not error out.
+    # Syntax: range( start, stop, stepAmount ):
+    #for i in range( 0, len( untranslatedList ), batchSizeLimit ):
+    #    translateBatchFunction( untranslatedList[ i : i + batchSizeLimit ]  )
+    #    print( untranslatedList[ i : i + batchSizeLimit ]  )
+
+    if userInput[ 'testRun' ] == True:
+        return
+
+    # Summaries for later batches can only be generated ahead of time if batches have a fixed size.
+    if ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryPrefetch' ] > 0 ) and ( userInput[ 'batchSizeLimit' ] != 0 ):
+        programSettings[ 'sceneSummaryExecutor' ] = concurrent.futures.ThreadPoolExecutor( max_workers=1 )
+        programSettings[ 'sceneSummaryFutures' ] = {}
+        print( 'Info: Generating scene summaries up to ' + str( userInput[ 'sceneSummaryPrefetch' ] ) + ' batches ahead.' )
+
+    # The scene summaries are generated by a worker thread, so always stop it, even if translating failed or was interrupted with Ctrl+C.
+    finishedNormally = False
+    try:
+        ( filledCount, untranslatedCount ) = prefillFromCache( userInput=userInput, programSettings=programSettings )
+
+        # batchStartIndex is the index in untranslatedEntriesColumnFull of the first entry of the first batch. This is always 0 unless resuming.
+        batchStartIndex = 0
+        if userInput[ 'resume' ] == True:
+            resumeRow = getResumeRow( userInput=userInput, programSettings=programSettings )
+            batchStartIndex = resumeRow - 2
+            # Start at the beginning of the batch that has resumeRow so batches stay the same as the previous run. Otherwise, the hashes used for sceneSummaryCache would change.
+            if userInput[ 'batchSizeLimit' ] != 0:
+                batchStartIndex = ( batchStartIndex // userInput[ 'batchSizeLimit' ] ) * userInput[ 'batchSizeLimit' ]
+            programSettings[ 'currentRow' ] = batchStartIndex + 2
+            if programSettings[ 'lastCompletedBatch' ] != None:
+                print( 'Info: The last completed batch was ' + str( programSettings[ 'lastCompletedBatch' ] ) + ' ending at row ' + str( programSettings[ 'lastCompletedRow' ] ) + '.' )
+            print( 'Info: Resuming at row ' + str( programSettings[ 'currentRow' ] ) + ' of ' + str( len( untranslatedEntriesColumnFull ) + 1 ) + '.' )
+
+        # Only the batches that still have something to do are processed.
+        if userInput[ 'batchSizeLimit' ] != 0:
+            batchCount = len( range( batchStartIndex, len( untranslatedEntriesColumnFull ), userInput[ 'batchSizeLimit' ] ) )
+            remainingBatchList = getRemainingBatchList( userInput=userInput, programSettings=programSettings, batchStartIndex=batchStartIndex, entryCount=len( untranslatedEntriesColumnFull ) )
+
+        if userInput[ 'cacheEnabled' ] == True:
+            if untranslatedCount > 0:
+                print( 'Info: Filled in ' + str( filledCount ) + '/' + str( untranslatedCount ) + ' untranslated entries from the cache (' + str( round( filledCount * 100 / untranslatedCount, 1 ) ) + '%).' )
+            if userInput[ 'batchSizeLimit' ] != 0:
+                print( 'Info: ' + str( len( remainingBatchList ) ) + '/' + str( batchCount ) + ' batches remain.' )
+
+        # Now need to translate stuff.
+        if tqdmAvailable == False:
+            if userInput[ 'batchSizeLimit' ] == 0:
+                tempBatchIterable = untranslatedEntriesColumnFull
+            else:
+                tempBatchIterable = remainingBatchList
+        #elif tdqmAvailable == True
+        else:
+            # This tdqm logic was originally only invoked for batchModeEnabled==True and then was updated to support nested progress bars for single translations allowing it to be used outside of batches, hence the redundancy.
+            if programSettings[ 'batchModeEnabled' ] == False:
+                if userInput[ 'batchSizeLimit' ] == 0:
+                    tempBatchIterable = untranslatedEntriesColumnFull
+                    #tempBatchIterable = tqdm.tqdm( untranslatedEntriesColumnFull )
+                else:
+                    tempBatchIterable = tqdm.tqdm( remainingBatchList )
+            #elif programSettings[ 'batchModeEnabled' ] == True:
+            else:
+                if userInput[ 'batchSizeLimit' ] == 0:
+                    tempBatchIterable = tqdm.tqdm( untranslatedEntriesColumnFull )
+                else:
+                    tempBatchIterable = tqdm.tqdm( remainingBatchList )
+
+        if userInput[ 'debug' ] == True:
+            print( 'pie' )
+            print( 'len(untranslatedEntriesColumnFull)=', len( untranslatedEntriesColumnFull ) )
+
+        for i in tempBatchIterable:
+            if userInput[ 'batchSizeLimit' ] == 0:
+                # currentRow is only different from 2 here when resuming.
+                currentBatchSize = len( untranslatedEntriesColumnFull ) - ( programSettings[ 'currentRow' ] - 2 )
+            else:
+                # Batches that need no updates are not in remainingBatchList, so move the pointer to the start of this batch.
+                programSettings[ 'currentRow' ] = i + 2
+                currentBatchSize = len( untranslatedEntriesColumnFull[ i : i + userInput[ 'batchSizeLimit' ] ] ) # This will be different than batchSizeLimit during the last iteration.
+
+            # Only used for recording progress in the journal.
+            if userInput[ 'batchSizeLimit' ] == 0:
+                batchNumber = 0
+            else:
+                batchNumber = i // userInput[ 'batchSizeLimit' ]
+
+            if userInput[ 'debug' ] == True:
+                print( 'currentBatchSize=', currentBatchSize )
+                print( 'programSettings[ currentRow ]=', programSettings[ 'currentRow' ] )
+
+            # Workaround. if there is no batchSizeLimit, then tempBatchIterable will just be a list. for would normally iterate one by one through that list. However, since currentBatchSize is the entire list when batchSizeLimit == 0, then every entry will be translated in the first batch and there is no second batch. That means attempting to itterate through this code a second time is a mistake, so just break out of the loop.
+            if programSettings[ 'currentRow' ] -1 > len( untranslatedEntriesColumnFull ):
+            #if userInput[ 'batchSizeLimit' ] == 0:
+                break
+
+            processBatch( userInput=userInput, programSettings=programSettings, currentBatchSize=currentBatchSize, batchNumber=batchNumber )
+        finishedNormally = True
+    finally:
+        if programSettings[ 'sceneSummaryExecutor' ] != None:
+            # if translating stopped early, then do not wait for the summary that is currently being generated.
+            stopSceneSummaryPrefetch( programSettings=programSettings, wait=finishedNormally )
+
+
+# Summaries that were generated ahead of time but not used yet are already in sceneSummaryCache, so any that have not started yet can just be cancelled.
+# if wait == False, then return without waiting for the summary that is currently being generated, if any.
+# The futures are cancelled one at a time since shutdown( cancel_futures=True ) requires Python 3.9+.
+def stopSceneSummaryPrefetch( programSettings=None, wait=True ):
+    for sceneSummaryFuture in programSettings[ 'sceneSummaryFutures' ].values():
+        if sceneSummaryFuture != None:
+            sceneSummaryFuture.cancel()
+    programSettings[ 'sceneSummaryExecutor' ].shutdown( wait=wait )
+    programSettings[ 'sceneSummaryExecutor' ] = None
+    programSettings[ 'sceneSummaryFutures' ] = {}
+
+
+# Translates fileToTranslate one batch at a time without ever loading all of it into memory. Each batch is read from programSettings[ 'streamingRowIterator' ] into a new mainSpreadsheet that only has the header row and that batch. After translating, the batch is written to outputFile and discarded.
+def translateStreaming( userInput=None, programSettings=None ):
+    consoleEncoding = userInput[ 'consoleEncoding' ]
+
+    if userInput[ 'testRun' ] == True:
+        return
+
+    headers = programSettings[ 'mainSpreadsheet' ].getRow( 1 )
+
+    # Same as when not streaming, only write outputFile if something was translated.
+    outputWriter = None
+    if ( userInput[ 'sceneSummaryEnabled' ] == False ) or ( userInput[ 'sceneSummaryEnableTranslation' ] == True ):
+        outputWriter = chocolate.StreamingWriter( userInput[ 'outputFileName' ], fileEncoding=userInput[ 'outputFileEncoding' ], spreadsheetName=programSettings[ 'mainSpreadsheet' ].spreadsheetName )
+        outputWriter.appendRow( headers )
+
+    # The total number of batches is not known without reading the entire file first, so the progress bar just counts them.
+    if tqdmAvailable == True:
+        progressBar = tqdm.tqdm( unit='batch' )
+
+    batchNumber = 0
+    programSettings[ 'rowOffset' ] = 0
+    totalFilledCount = 0
+    totalUntranslatedCount = 0
+    while True:
+        currentBatch = chocolate.Blueberry()
+        currentBatch.appendRow( headers )
+        for row in itertools.islice( programSettings[ 'streamingRowIterator' ], userInput[ 'batchSizeLimit' ] ):
+            currentBatch.appendRow( row )
+        currentBatchSize = currentBatch.rowCount - 1
+        if currentBatchSize == 0:
+            break
+
+        programSettings[ 'mainSpreadsheet' ] = currentBatch
+        programSettings[ 'currentRow' ] = 2
+        preprocessMainSpreadsheet( userInput=userInput, programSettings=programSettings )
+        ( filledCount, untranslatedCount ) = prefillFromCache( userInput=userInput, programSettings=programSettings )
+        totalFilledCount += filledCount
+        totalUntranslatedCount += untranslatedCount
+        processBatch( userInput=userInput, programSettings=programSettings, currentBatchSize=currentBatchSize, batchNumber=batchNumber )
+
+        if outputWriter != None:
+            for rowNumber,row in enumerate( currentBatch.iterRows() ):
+                # The header row was already written.
+                if rowNumber == 0:
+                    continue
+                outputWriter.appendRow( row )
+
+        programSettings[ 'rowOffset' ] += currentBatchSize
+        batchNumber += 1
+        if tqdmAvailable == True:
+            progressBar.update( 1 )
+
+    if tqdmAvailable == True:
+        progressBar.close()
+    if outputWriter != None:
+        outputWriter.close()
+    print( 'Info: Processed ' + str( programSettings[ 'rowOffset' ] ) + ' entries in ' + str( batchNumber ) + ' batches.' )
+    if ( userInput[ 'cacheEnabled' ] == True ) and ( totalUntranslatedCount > 0 ):
+        print( 'Info: Filled in ' + str( totalFilledCount ) + '/' + str( totalUntranslatedCount ) + ' untranslated entries from the cache (' + str( round( totalFilledCount * 100 / totalUntranslatedCount, 1 ) ) + '%).' )
+
+
 # Implement KoboldAPI first, then DeepL.
 # Update: Implement py3translationserver, then Sugoi, then KoboldCPP's API, then DeepL API, then DeepL Web, then OpenAI's API (generic).
 # Update (again): Implement py3translationserver, then KoboldCpp, then DeepL API Free, then Google-T, then Groq + mixtral8x7b API, then sugoi.
@@ -1862,11 +2889,31 @@ def main( userInput=None ):
     programSettings[ 'cacheWasUpdated' ] = False
     programSettings[ 'sceneSummaryCacheWasUpdated' ] = False
 
+    # These are only used if journalEnabled == True. They are created after cache and mainSpreadsheet have been initialized.
+    programSettings[ 'cacheJournal' ] = None
+    programSettings[ 'mainSpreadsheetJournal' ] = None
+    # These are read from mainSpreadsheetJournal for use with --resume.
+    programSettings[ 'lastCompletedRow' ] = None
+    programSettings[ 'lastCompletedBatch' ] = None
+    # The number of rows of fileToTranslate that come before row 2 of mainSpreadsheet. This is always 0 unless streaming.
+    programSettings[ 'rowOffset' ] = 0
+
 
     # Build settings dictionary for this translation engine.
     settingsDictionary = {}
-    settingsDictionary[ 'address' ] = userInput[ 'address' ] # address has both the protocol and the port.
-    settingsDictionary[ 'port' ] = userInput[ 'port' ]
+    # address has the protocol and the host. if there are several servers, this is the first one. The others are added below.
+    settingsDictionary[ 'address' ] = userInput[ 'addressList' ][ 0 ][ 0 ]
+    settingsDictionary[ 'port' ] = userInput[ 'addressList' ][ 0 ][ 1 ]
+    # Network engines keep this many connections open so every concurrent request can reuse one.
+    settingsDictionary[ 'connectionPoolSize' ] = userInput[ 'maxConcurrentRequests' ]
+    # Every server gets its own batch size since each one can have different hardware.
+    settingsDictionary[ 'adaptiveBatchSize' ] = userInput[ 'adaptiveBatchSizeEnabled' ]
+    settingsDictionary[ 'adaptiveBatchSizeMinimum' ] = userInput[ 'adaptiveBatchSizeMinimum' ]
+    if userInput[ 'batchSizeLimit' ] == 0:
+        settingsDictionary[ 'adaptiveBatchSizeMaximum' ] = defaultBatchSizeLimit
+    else:
+        settingsDictionary[ 'adaptiveBatchSizeMaximum' ] = userInput[ 'batchSizeLimit' ]
+    settingsDictionary[ 'adaptiveBatchSizeTargetLatency' ] = userInput[ 'adaptiveBatchSizeTargetLatency' ]
 
     # py3translationServer must be reachable Check by getting currently loaded model. This is required for the cache and mainSpreadsheet.
     if userInput[ 'mode' ] == 'py3translationserver':
@@ -1894,6 +2941,9 @@ def main( userInput=None ):
             settingsDictionary[ 'memory' ] = userInput[ 'memoryFileContents' ]
         if userInput[ 'sceneSummaryFileContents' ] != None:
             settingsDictionary[ 'sceneSummaryPrompt' ] = userInput[ 'sceneSummaryFileContents' ]
+        settingsDictionary[ 'stablePrompt' ] = userInput[ 'stablePromptEnabled' ]
+        # Measuring how much of the prompt KoboldCpp reused needs extra requests, so only do it when the statistics are shown.
+        settingsDictionary[ 'measurePromptReuse' ] = ( userInput[ 'stablePromptEnabled' ] == True ) and ( ( userInput[ 'verbose' ] == True ) or ( userInput[ 'debug' ] == True ) )
 
         programSettings[ 'translationEngine' ] = koboldCppEngine.KoboldCppEngine( sourceLanguage=userInput[ 'sourceLanguageFullRow' ], targetLanguage=userInput[ 'targetLanguageFullRow' ], characterDictionary=userInput[ 'characterNamesDictionary' ], settings=settingsDictionary )
 
@@ -1901,12 +2951,16 @@ def main( userInput=None ):
         # Add unique settings for this translation engine.
         #settingsDictionary[ 'prompt' ] = userInput[ 'promptFileContents' ]
 
+        settingsDictionary[ 'processes' ] = userInput[ 'processes' ]
+
         programSettings[ 'translationEngine' ] = pykakasiEngine.PyKakasiEngine( sourceLanguage=userInput[ 'sourceLanguageFullRow' ], targetLanguage=userInput[ 'targetLanguageFullRow' ], characterDictionary=userInput[ 'characterNamesDictionary' ], settings=settingsDictionary )
 
     elif userInput[ 'mode' ] == 'cutlet':
         # Add unique settings for this translation engine.
         #settingsDictionary[ 'prompt' ] = userInput[ 'promptFileContents' ]
 
+        settingsDictionary[ 'processes' ] = userInput[ 'processes' ]
+
         programSettings[ 'translationEngine' ] = cutletEngine.CutletEngine( sourceLanguage=userInput[ 'sourceLanguageFullRow' ], targetLanguage=userInput[ 'targetLanguageFullRow' ], characterDictionary=userInput[ 'characterNamesDictionary' ], settings=settingsDictionary )
 
     #elif userInput[ 'mode' ] == 'deepl_api_free':
@@ -1936,6 +2990,20 @@ def main( userInput=None ):
     #        print( 'translationEngine.version is None' )
     #        sys.exit(1)
 
+    # if there are several servers, then create the same translation engine for each of the other servers and put all of them behind a load balancer that behaves like a single translation engine.
+    if ( len( userInput[ 'addressList' ] ) > 1 ) and ( ( userInput[ 'mode' ] == 'koboldcpp' ) or ( userInput[ 'mode' ] == 'py3translationserver' ) ):
+        engineType = type( programSettings[ 'translationEngine' ] )
+        # The load balancer also uses this to connect again to servers that were not reachable at startup.
+        def createEngine( index ):
+            tempSettingsDictionary = settingsDictionary.copy()
+            tempSettingsDictionary[ 'address' ], tempSettingsDictionary[ 'port' ] = userInput[ 'addressList' ][ index ]
+            return engineType( sourceLanguage=userInput[ 'sourceLanguageFullRow' ], targetLanguage=userInput[ 'targetLanguageFullRow' ], characterDictionary=userInput[ 'characterNamesDictionary' ], settings=tempSettingsDictionary )
+
+        engineList = [ programSettings[ 'translationEngine' ] ]
+        for index in range( 1, len( userInput[ 'addressList' ] ) ):
+            engineList.append( createEngine( index ) )
+        programSettings[ 'translationEngine' ] = loadBalancer.LoadBalancerEngine( engineList, createEngine=createEngine )
+
     if programSettings[ 'translationEngine' ].reachable != True:
         print( 'TranslationEngine \''+ userInput[ 'mode' ] +'\' is not reachable. Check the connection or API settings and try again. --address must contain the protocol.' )
         sys.exit(1)
@@ -1960,9 +3028,26 @@ def main( userInput=None ):
     # chocolate.Strawberry() is a wrapper class for the onenpyxl.workbook class with additional methods.
     # The interface has no concept of workbooks vs spreadsheets. That distinction is handled only inside the class. Syntax:
     # mainSpreadsheet = chocolate.Strawberry()
+    # mainSpreadsheet uses chocolate.Blueberry() which has the same interface as chocolate.Strawberry() but stores the data in Python lists instead of openpyxl cells. That makes reading and writing cells much faster for large files. openpyxl is only used for .xlsx import and export. mainSpreadsheet only ever has one sheet, so nothing is lost by not keeping the workbook. cache.xlsx and sceneSummaryCache.xlsx have one sheet per language pair, so they remain as chocolate.Strawberry().
     # if main file is a spreadsheet, then it will be read in as a native data structure. Otherwise, if the main file is a .txt file, then it will be parsed as line-by-line by the class. Basically, the user is responsible for proper parsing if line-by-line parsing does not work right. Proper parsing is outside the scope of py3TranslateLLM.
     # Create data structure using fileToTranslateFileName. Whether it is a text file or spreadsheet file is handled internally.
-    programSettings[ 'mainSpreadsheet' ] = chocolate.Strawberry( userInput[ 'fileToTranslateFileName' ], fileEncoding=userInput[ 'fileToTranslateEncoding' ], removeWhitespaceForCSV=False, addHeaderToTextFile=True )
+    # if resuming, then start from the most recent backup instead. Backups are always .xlsx and always have a header row.
+    latestBackup = None
+    if userInput[ 'resume' ] == True:
+        latestBackup = findLatestBackup( userInput=userInput )
+        if latestBackup == None:
+            print( 'Info: No backups were found for today or yesterday. Resuming using fileToTranslate and the journal, if any.' )
+    # When streaming, mainSpreadsheet only ever has the header row and the current batch in it. The rest of the rows are read from fileToTranslate by translateStreaming() as they are needed.
+    programSettings[ 'streamingRowIterator' ] = None
+    if userInput[ 'streamingEnabled' ] == True:
+        programSettings[ 'streamingRowIterator' ] = chocolate.iterateRowsFromFile( userInput[ 'fileToTranslateFileName' ], fileEncoding=userInput[ 'fileToTranslateEncoding' ], removeWhitespaceForCSV=False )
+        programSettings[ 'mainSpreadsheet' ] = chocolate.Blueberry()
+        programSettings[ 'mainSpreadsheet' ].appendRow( next( programSettings[ 'streamingRowIterator' ], [ 'rawText' ] ) )
+    elif latestBackup != None:
+        print( ( 'Info: Resuming from backup: ' + latestBackup ).encode( consoleEncoding ) )
+        programSettings[ 'mainSpreadsheet' ] = chocolate.Blueberry( latestBackup, fileEncoding=defaultTextEncoding, removeWhitespaceForCSV=False )
+    else:
+        programSettings[ 'mainSpreadsheet' ] = chocolate.Blueberry( userInput[ 'fileToTranslateFileName' ], fileEncoding=userInput[ 'fileToTranslateEncoding' ], removeWhitespaceForCSV=False, addHeaderToTextFile=True )
 
     # Before doing anything, just blindly create a backup. #This code should probably be moved into a local function so backups can be created easier. Update: Done. Use  backupMainSpreadsheet( userInput=userInput, programSettings=programSettings, outputName=outputName, force=False ):
     # backupsFolder does not have / at the end.
@@ -2009,6 +3094,15 @@ def main( userInput=None ):
         if programSettings[ 'currentMainSpreadsheetColumn' ] == None:
             print( 'u nspecified error.' )
             sys.exit(1)
+    # The same column as a number for use with getCellValueByIndex() and setCellValueByIndex(). Column A is 1.
+    programSettings[ 'currentMainSpreadsheetColumnNumber' ] = programSettings[ 'mainSpreadsheet' ].getColumnNumber( programSettings[ 'currentMainSpreadsheetColumn' ] )
+
+    # The journal for mainSpreadsheet is stored in the backups folder and is only valid for the same input file, model, and language pair.
+    # The journal uses row numbers, and those are not stable when streaming, so do not use it then.
+    if ( userInput[ 'journalEnabled' ] == True ) and ( userInput[ 'testRun' ] != True ) and ( userInput[ 'streamingEnabled' ] != True ):
+        mainSpreadsheetJournalHeader = { 'fileToTranslate' : str( pathlib.Path( userInput[ 'fileToTranslateFileName' ] ).absolute() ), 'model' : programSettings[ 'translationEngine' ].model, 'languagePair' : userInput[ 'internalSourceLanguageThreeCode' ] + '_' + userInput[ 'internalDestinationLanguageThreeCode' ] }
+        programSettings[ 'mainSpreadsheetJournal' ] = journal.Journal( userInput[ 'backupsFolder' ] + '/' + userInput[ 'fileToTranslateFileNameWithoutPath' ] + defaultJournalExtension, header=mainSpreadsheetJournalHeader )
+        replayMainSpreadsheetJournal( userInput=userInput, programSettings=programSettings )
 
     # Now that the main data structure has been created, the spreadsheet is ready to be translated. However, there are still a few more things to initialize, like cache.
     # Cache should always be added. This potentially creates a situation where cache is not valid when going from one title to another or where it is used for translating entries for one character that another character spoke, but that is fine since that is a user decision to keep cache enabled despite the slight collisions.
@@ -2026,6 +3120,30 @@ def main( userInput=None ):
         # exist_ok requires Python 3.5+
         pathlib.Path( userInput[ 'cacheFilePathOnly' ] ).mkdir( parents = True, exist_ok = True )
 
+    if ( userInput[ 'cacheEnabled' ] == True ) and ( userInput[ 'cacheIsSQLite' ] == True ):
+        # if cache.sqlite exists, then it will be opened, otherwise a new one will be created on disk.
+        programSettings[ 'cache' ] = sqliteCache.SQLiteCache( myFileName=userInput[ 'cacheFileName' ], languagePair=userInput[ 'internalSourceLanguageThreeCode' ] + '_' + userInput[ 'internalDestinationLanguageThreeCode' ], readOnlyMode=userInput[ 'readOnlyCache' ] )
+
+        # if the database is brand new but there is a cache.xlsx next to it with the same name, then import it so switching to SQLite does not lose the existing cache.
+        legacyCacheFileName = userInput[ 'cacheFilePathOnly' ] + '/' + pathlib.Path( userInput[ 'cacheFileName' ] ).stem + defaultExportExtension
+        if ( programSettings[ 'cache' ].isNew == True ) and ( functions.checkIfThisFileExists( legacyCacheFileName ) == True ):
+            print( ( 'Info: Importing existing cache from: ' + legacyCacheFileName ).encode( consoleEncoding ) )
+            legacyCache = chocolate.Strawberry( myFileName=legacyCacheFileName, fileEncoding=defaultTextEncoding, spreadsheetNameInWorkbook=userInput[ 'internalSourceLanguageThreeCode' ] + '_' + userInput[ 'internalDestinationLanguageThreeCode' ], readOnlyMode=True )
+            programSettings[ 'cache' ].importFromStrawberry( legacyCache )
+            legacyCache.close()
+
+        programSettings[ 'cache' ].addModel( programSettings[ 'translationEngine' ].model )
+        programSettings[ 'cache' ].commit()
+
+        # Used to exclude metadata columns and the current model when using cacheAnyMatch.
+        programSettings[ 'blacklistedHeadersForCacheAnyMatch' ] = []
+        for blacklistedHeader in defaultBlacklistedHeadersForCache:
+            programSettings[ 'blacklistedHeadersForCacheAnyMatch' ].append( blacklistedHeader.lower() )
+
+        if userInput[ 'verbose' ] == True:
+            print( ( 'Cache is available at: ' + str( userInput[ 'cacheFileName' ] ) ).encode( consoleEncoding ) )
+
+    elif userInput[ 'cacheEnabled' ] == True:
         # if cache.xlsx exists, then the cache file will be read into a chocolate.Strawberry(), otherwise, a new one will be created only in memory.
         # Initialize chocolate.Strawberry(). Very tempting to hardcode utf-8 here, but... will avoid.
         global cache
@@ -2072,6 +3190,14 @@ def main( userInput=None ):
                 print( 'un specified error .' )
                 sys.exit( 1 )
 
+        # The cache journal is stored next to the cache file. There is one journal per language pair since cache.xlsx has one sheet per language pair.
+        if ( userInput[ 'journalEnabled' ] == True ) and ( userInput[ 'readOnlyCache' ] != True ) and ( userInput[ 'testRun' ] != True ):
+            languagePair = userInput[ 'internalSourceLanguageThreeCode' ] + '_' + userInput[ 'internalDestinationLanguageThreeCode' ]
+            cacheJournalHeader = { 'cacheFile' : str( pathlib.Path( userInput[ 'cacheFileName' ] ).absolute() ), 'languagePair' : languagePair }
+            programSettings[ 'cacheJournal' ] = journal.Journal( userInput[ 'cacheFilePathOnly' ] + '/' + pathlib.Path( userInput[ 'cacheFileName' ] ).stem + '.' + languagePair + defaultJournalExtension, header=cacheJournalHeader )
+            # This must happen before preparing cacheAnyMatch since replaying the journal can add new columns.
+            replayCacheJournal( userInput=userInput, programSettings=programSettings )
+
         # Prepare some static data for cacheAnyMatch so that it does not have to be prepared while in the loop on every loop.
         if userInput[ 'cacheAnyMatch' ] == True:
             #global blacklistedHeadersForCacheAnyMatch
@@ -2179,183 +3305,102 @@ def main( userInput=None ):
             # print( 'Warning: contextHistoryEnabled=True but translationEngine ' + userInput[ 'mode' ] + ' does not support history. Disabling feature.' )
             userInput[ 'contextHistoryEnabled' ] = False
 
-    untranslatedEntriesColumnFull = programSettings[ 'mainSpreadsheet' ].getColumn( 'A' )
-
-    if userInput[ 'debug' ] == True:
-        # Debug code.
-        for counter,untranslatedString in enumerate( untranslatedEntriesColumnFull ):
-            assert( untranslatedString == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( counter + 1 )) )
-        print( len( untranslatedEntriesColumnFull ) )
- 
-    untranslatedEntriesColumnFull.pop( 0 ) # This removes the header and returns the header.
-
-    # Debug code.
-    if userInput[ 'debug' ] == True:
-        print( len( untranslatedEntriesColumnFull ) )
-        for counter,untranslatedString in enumerate( untranslatedEntriesColumnFull ):
-            assert( untranslatedString == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( counter + 2 ) ) )
-
-        currentRowTemp = 2 
-        for listCounter,untranslatedString in enumerate( untranslatedEntriesColumnFull ):
-            try:
-                assert( untranslatedString == programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( currentRowTemp )) )
-            except:
-                print( 'Mismatch:')
-                print( ( 'untranslatedString=' + str( untranslatedString ) ).encode( consoleEncoding ) )
-                print( ( 'mainSpreadsheet.getCellValue( A' + str( currentRowTemp ) + ' )=' + mainSpreadsheet.getCellValue( 'A' + str( currentRowTemp ) ) ).encode( consoleEncoding ) )
-                raise
-            currentRowTemp += 1
-
-
-    # currentRow is the current and correct pointer to the current contents being processed in mainSpreadsheet.
-    # Start with row 2. Rows start with 1 instead of 0 and row 1 is always headers. Therefore, row 2 is the first row number with untranslated/translated pairs.
-    # Split it into two values, one global value, programSettings[ 'currentRow' ], that keeps track of the pointer globally and a local value used to iterate through the current batch.
-    programSettings[ 'currentRow' ] = 2
-
-    # if there is a limit to how large a batch can be, then the server should handle that internally.
-    # Update: Technically yes, but it could also make sense to limit batch sizes on the application side, like if translating tens of thousands of lines or more, so there should also be a batchSize UI element in addition to any internal engine batch size limitations. Implemented as batchSizeLimit , now just need to implement the batch limiting code. Update: Done.
-    # This works because if a list index goes past the maximum size of the list when splicing, then it will just return the rest of the items and not error out.
-    # Syntax: range( start, stop, stepAmount ):
-    #for i in range( 0, len( untranslatedList ), batchSizeLimit ):
-    #    translateBatchFunction( untranslatedList[ i : i + batchSizeLimit ]  )
-    #    print( untranslatedList[ i : i + batchSizeLimit ]  )
-
-    if userInput[ 'testRun' ] == True:
-        return
-
-    # Now need to translate stuff.
-    if tqdmAvailable == False:
-        if userInput[ 'batchSizeLimit' ] == 0:
-            tempBatchIterable = untranslatedEntriesColumnFull
-        else:
-            tempBatchIterable = range( 0, len( untranslatedEntriesColumnFull ), userInput[ 'batchSizeLimit' ] )
-    #elif tdqmAvailable == True
+    # contextHistory is shared by every batch. See: translate()
+    if userInput[ 'contextHistoryEnabled' ] == True:
+        programSettings[ 'contextHistory' ] = collections.deque()
     else:
-        # This tdqm logic was originally only invoked for batchModeEnabled==True and then was updated to support nested progress bars for single translations allowing it to be used outside of batches, hence the redundancy.
-        if programSettings[ 'batchModeEnabled' ] == False:
-            if userInput[ 'batchSizeLimit' ] == 0:
-                tempBatchIterable = untranslatedEntriesColumnFull
-                #tempBatchIterable = tqdm.tqdm( untranslatedEntriesColumnFull )
-            else:
-                tempBatchIterable = tqdm.tqdm( range( 0, len( untranslatedEntriesColumnFull ), userInput[ 'batchSizeLimit' ] ) )
-        #elif programSettings[ 'batchModeEnabled' ] == True:
-        else:
-            if userInput[ 'batchSizeLimit' ] == 0:
-                tempBatchIterable = tqdm.tqdm( untranslatedEntriesColumnFull )
-            else:
-                tempBatchIterable = tqdm.tqdm( range( 0, len( untranslatedEntriesColumnFull ), userInput[ 'batchSizeLimit' ] ) )
-
-    if userInput[ 'debug' ] == True:
-        print( 'pie' )
-        print( 'len(untranslatedEntriesColumnFull)=', len( untranslatedEntriesColumnFull ) )
+        programSettings[ 'contextHistory' ] = None
 
-    for i in tempBatchIterable:
-        if userInput[ 'batchSizeLimit' ] == 0:
-            currentBatchSize = len( untranslatedEntriesColumnFull )
+    # Submitting multiple requests at the same time only makes sense for single translations. Batches already submit many entries at once, and contextHistory requires every entry to be translated strictly in order.
+    programSettings[ 'concurrentRequestsEnabled' ] = False
+    if ( userInput[ 'maxConcurrentRequests' ] > 1 ) and ( programSettings[ 'batchModeEnabled' ] == False ):
+        if userInput[ 'contextHistoryEnabled' ] == True:
+            print( 'Info: contextHistory requires entries to be translated one at a time. Ignoring maxConcurrentRequests. To use maxConcurrentRequests, disable contextHistory with --contextHistory (-ch).' )
         else:
-            currentBatchSize = len( untranslatedEntriesColumnFull[ i : i + userInput[ 'batchSizeLimit' ] ] ) # This will be different than batchSizeLimit during the last iteration.
-
-        if userInput[ 'debug' ] == True:
-            print( 'currentBatchSize=', currentBatchSize )
-            print( 'programSettings[ currentRow ]=', programSettings[ 'currentRow' ] )
-
-        # Workaround. if there is no batchSizeLimit, then tempBatchIterable will just be a list. for would normally iterate one by one through that list. However, since currentBatchSize is the entire list when batchSizeLimit == 0, then every entry will be translated in the first batch and there is no second batch. That means attempting to itterate through this code a second time is a mistake, so just break out of the loop.
-        if programSettings[ 'currentRow' ] -1 > len( untranslatedEntriesColumnFull ):
-        #if userInput[ 'batchSizeLimit' ] == 0:
-            break
+            programSettings[ 'concurrentRequestsEnabled' ] = True
+            print( 'Info: Submitting up to ' + str( userInput[ 'maxConcurrentRequests' ] ) + ' requests at the same time.' )
+
+    # The number of requests that were not sent to the translation engine because an identical entry in the same batch was already being translated.
+    programSettings[ 'duplicateRequestsSaved' ] = 0
+    # Set by translateMainSpreadsheet() if sceneSummaryPrefetch is enabled.
+    programSettings[ 'sceneSummaryExecutor' ] = None
+    programSettings[ 'sceneSummaryFutures' ] = {}
+
+    # if the translation engine can translate several batches at the same time, then split every batch into maxConcurrentRequests parts and submit them at the same time using a pool of worker threads.
+    # Older engines might not define supportsConcurrentBatches at all.
+    programSettings[ 'batchExecutor' ] = None
+    programSettings[ 'batchFutures' ] = set()
+    if ( getattr( programSettings[ 'translationEngine' ], 'supportsConcurrentBatches', False ) == True ) and ( userInput[ 'maxConcurrentRequests' ] > 1 ) and ( programSettings[ 'batchModeEnabled' ] == True ):
+        programSettings[ 'batchExecutor' ] = concurrent.futures.ThreadPoolExecutor( max_workers=userInput[ 'maxConcurrentRequests' ] )
+        print( 'Info: Splitting every batch into up to ' + str( userInput[ 'maxConcurrentRequests' ] ) + ' parts that are submitted at the same time.' )
+
+    # Everything up to here was startup. Show which of the libraries that are only imported when needed were actually used and how long each one took.
+    if userInput[ 'verbose' ] == True:
+        lazyImport.printImportReport()
 
-        if userInput[ 'sceneSummaryEnabled' ] == False:
-            sceneSummary = None
-        #if userInput[ 'sceneSummaryEnabled' ] != False:
+    # Always stop the worker threads and processes, even if translating failed or was interrupted with Ctrl+C. Otherwise the program could hang on exit waiting for them.
+    try:
+        if userInput[ 'streamingEnabled' ] == True:
+            translateStreaming( userInput=userInput, programSettings=programSettings )
         else:
-            # There is not any point in generating a sceneSummary for entries that have already been translated or are in the cache, so check for that here.
-            # tempList=[]
-            # programSettings=[]
-
-            if userInput[ 'reTranslate' ] == True:
-                alreadyTranslated = False
-            else:
-                alreadyTranslated = True
-                # range( start, stop, step )
-                # This probably has an off by 1 error.
-                for tempCurrentRow in range( programSettings[ 'currentRow' ], programSettings['currentRow'] + currentBatchSize, 1 ):
-                    if userInput[ 'cacheEnabled' ] == True:
-                        untranslatedEntry = programSettings[ 'mainSpreadsheet' ].getCellValue( 'A' + str( tempCurrentRow ) )
-                        entryFromCache = getCellValueFromCache( userInput=userInput, programSettings=programSettings, searchString=untranslatedEntry )
-                        entryFromMainSpreadsheet = programSettings[ 'mainSpreadsheet' ].getCellValue( programSettings[ 'currentMainSpreadsheetColumn' ] + str( tempCurrentRow ) )
-                        if ( entryFromCache == None ) and ( entryFromMainSpreadsheet == None ):
-                            alreadyTranslated = False
-                            break
-                    else:
-                        if programSettings[ 'mainSpreadsheet' ].getCellValue( programSettings[ 'currentMainSpreadsheetColumn' ] + str( tempCurrentRow ) ) == None:
-                            alreadyTranslated = False
-                            break
-
-            if alreadyTranslated == True:
-                sceneSummary = None
-            else:
-                # This returns either None or a string.
-                sceneSummary = getSceneSummary( userInput=userInput, programSettings=programSettings, untranslatedListSize=currentBatchSize )
-
-                if ( not isinstance( sceneSummary, str ) == True ) or ( sceneSummary == '' ):
-                    # Error generating sceneSummary.
-                    print( 'Warning: Unable to generate summary for ' + userInput[ 'fileToTranslateFileNameWithoutPath' ] + ':' + str( programSettings[ 'currentRow' ] ) + '-' + str( programSettings[ 'currentRow' ] + currentBatchSize ) + ' Skipping.' )
-                    sceneSummary = None
-
-
-        # There are a few special failure cases here:
-        # if sceneSummaryEnabled == True but sceneSummaryEnableTranslation == False, then nothing should be translated regardless of other settings.
-        if ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnableTranslation' ] == False ):
-            programSettings[ 'currentRow' ] += currentBatchSize
-            continue
+            translateMainSpreadsheet( userInput=userInput, programSettings=programSettings )
+    finally:
+        if programSettings[ 'batchExecutor' ] != None:
+            # Cancel the parts that have not started yet one at a time since shutdown( cancel_futures=True ) requires Python 3.9+.
+            for futurePart in list( programSettings[ 'batchFutures' ] ):
+                futurePart.cancel()
+            programSettings[ 'batchFutures' ].clear()
+            programSettings[ 'batchExecutor' ].shutdown( wait=False )
+            programSettings[ 'batchExecutor' ] = None
+
+        # Stop the worker processes of local translation engines, if any were started.
+        if hasattr( programSettings[ 'translationEngine' ], 'close' ):
+            programSettings[ 'translationEngine' ].close()
+
+    if programSettings[ 'duplicateRequestsSaved' ] > 0:
+        print( 'Info: Skipped ' + str( programSettings[ 'duplicateRequestsSaved' ] ) + ' requests for duplicate entries.' )
 
-#        if sceneSummaryEnabled:
-#            sceneSummary None, alreadyTranslated == True
-#                pass
-#            sceneSummary != None, alreadyTranslated == True
-#                pass
-#            sceneSummary None, alreadyTranslated == False
-#                error out
-#            sceneSummary != None, alreadyTranslated == False
-#                pass
-        # if sceneSummary failed to generate but it is enabled, then consider it improper to attempt to translate without it.
-        # However, if the contents of the spreadsheet are already translated, then go ahead and write output as normal.
-        if userInput[ 'sceneSummaryEnabled' ] == True:
-            if ( sceneSummary == None ) and ( alreadyTranslated == False ):
-                programSettings[ 'currentRow' ] += currentBatchSize
-                continue
-
-        # translate() should only consider the size of untranslatedList as valid since it has programSettings[ 'currentRow' ] as the correct pointer to the first entry already and mainSpreadsheet needs to be parsed again to determine which entries already have translations, which entries can be found in the cache, the speaker names, and the order of each entry for {history}. Since it needs to be re-parsed anyway, passing untranslatedListSize makes more sense than passing the untranslatedList[ slice ].
-        # translate() returns a list where each entry is a string that represents the translated contents.
-        translatedList = translate( userInput=userInput, programSettings=programSettings, untranslatedListSize=currentBatchSize, sceneSummary=sceneSummary )
-
-        # Does this still make sense?
-        assert( len( translatedList ) == currentBatchSize )
-
-        # This will attempt to backup mainSpreadsheet after each translation loop. Does this make sense?
-        # No, because processing a batch could take longer, several hours, than the minimum time to save backupMainSpreadsheet(), a few minutes. To avoid losing data due to insufficent mainSpreadsheet backups, there should be an attempt to back it up after every single translation for local LLMs, especially since it is on a minimum timer anyway. However, if updating main spreadsheet here instead of inside the translate() function, then backing up main spreadsheet here is unavoidable because it does not make sense to backupMainSpreadsheet() inside the translate() function since that would back it up prior to updating it. What makes more sense, waiting for the batches to return to update mainSpreadsheet or updating mainSpreadsheet within translate() after every entry?
-        # Normally, it would always make sense to update inside of translate() after every entry, but cache gets updated regardless so there is no lost data. Hummm. Well, that does not consider operations were cache is disabled and backing up mainSpreadsheet() regularly is the only way to save data if an error occurs in that situation. Is cache a required feature? No. Therefore this backupMainSpreadsheet() behavior must be moved inside of translate so it occurs after every translation to minimize loss of data as intended. Thus, that also means the code to update mainSpreadsheet must also take place inside of translate().
-        #backupMainSpreadsheet( userInput=userInput, programSettings=programSettings, outputName=userInput[ 'backupsFileNameWithPathAndDate' ], force=False )
-        # Increment pointer by batch size so next loop begins at the start of the next entry.
-        programSettings[ 'currentRow' ] += currentBatchSize
+    if userInput[ 'testRun' ] == True:
+        return
 
     if userInput[ 'debug' ] == True:
         print( 'mainSpreadsheet.printAllTheThings():' )
         programSettings[ 'mainSpreadsheet' ].printAllTheThings()
 
     if userInput[ 'testRun' ] != True:
-        if ( userInput[ 'sceneSummaryEnabled' ] == False ) or ( ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnableTranslation' ] == True ) ):
+        # When streaming, translateStreaming() already wrote outputFile.
+        if userInput[ 'streamingEnabled' ] == True:
+            pass
+        elif ( userInput[ 'sceneSummaryEnabled' ] == False ) or ( ( userInput[ 'sceneSummaryEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnableTranslation' ] == True ) ):
             programSettings[ 'mainSpreadsheet' ].export( userInput[ 'outputFileName' ], fileEncoding=userInput[ 'outputFileEncoding' ], columnToExportForTextFiles=programSettings[ 'currentMainSpreadsheetColumn' ] )
+            # Every translation is now in outputFile, so the journal is not needed anymore.
+            if programSettings[ 'mainSpreadsheetJournal' ] != None:
+                programSettings[ 'mainSpreadsheetJournal' ].reset()
+
+        if ( userInput[ 'mode' ] == 'koboldcpp' ) and ( userInput[ 'stablePromptEnabled' ] == True ):
+            programSettings[ 'translationEngine' ].printPromptStatistics()
+
+        if userInput[ 'adaptiveBatchSizeEnabled' ] == True:
+            programSettings[ 'translationEngine' ].printBatchSizeStatistics()
 
     # https://openpyxl.readthedocs.io/en/stable/optimized.html
     # readOnlyMode requires manually closing the spreadsheet after use.
     if userInput[ 'cacheEnabled' ] == True:
-        if userInput[ 'readOnlyCache' ] == True:
+        if userInput[ 'cacheIsSQLite' ] == True:
+            # close() commits any remaining changes.
+            programSettings[ 'cache' ].close()
+        elif userInput[ 'readOnlyCache' ] == True:
             programSettings[ 'cache' ].close()
         # There is a bug where cacheWasUpdated is getting set to True even if it is never updated sometimes. # Update: This might have been a scope issue. TODO: Double check if this bug persists after the refactor is complete. Hummm. Seems to have been fixed. Was likely a scope issue.
         elif programSettings[ 'cacheWasUpdated' ] == True:
             backupCache( userInput=userInput, programSettings=programSettings, force=True )
 
+    # Only delete the journals if everything in them has been written out. backupCache() and exporting outputFile both reset their journal.
+    if programSettings[ 'cacheJournal' ] != None:
+        programSettings[ 'cacheJournal' ].close( remove=( programSettings[ 'cacheJournal' ].unsavedRecords == 0 ) )
+    if programSettings[ 'mainSpreadsheetJournal' ] != None:
+        programSettings[ 'mainSpreadsheetJournal' ].close( remove=( programSettings[ 'mainSpreadsheetJournal' ].unsavedRecords == 0 ) )
+
     if ( userInput[ 'sceneSummaryCacheEnabled' ] == True ) and ( userInput[ 'sceneSummaryEnabled' ] == True ):
         if userInput[ 'readOnlyCache' ] == True:
             programSettings[ 'sceneSummaryCache' ].close()
@@ -8,7 +8,7 @@ Usage: See below. Like at the bottom.
 
 Copyright (c) 2024 gdiaz384; License: See main program.
 """
-__version__ = '2024.07.31'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -25,23 +25,36 @@ import os.path                            # Extract extension from filename, and
 import pathlib                             # For pathlib.Path() Override file in file system with another and create subfolders.
 import sys                                   # End program on fail condition.
 #import random                             # Used to create random numbers. 
-import openpyxl                          # Used as the core internal data structure and also to read/write xlsx files.
 import csv                                   # Read and write to csv files. Example: Read in 'resources/languageCodes.csv'
+import array                                # CompactIndex stores the hashes and row numbers of the cache in arrays instead of Python objects.
+# openpyxl takes longer to import than everything else combined, and Blueberry only needs it for .xlsx files, so only import it when it is first used. See: resources/lazyImport.py
+# if this library is used by itself without resources.lazyImport, then just import everything right away.
 try:
-    import xlrd                              #Provides reading from Microsoft Excel Document (.xls).
-    xlrdLibraryIsAvailable = True
-except:
-    xlrdLibraryIsAvailable = False
-try:
-    import xlwt                              #Provides writing to Microsoft Excel Document (.xls).
-    xlwtLibraryIsAvailable = True
-except:
-    xlwtLibraryIsAvailable = False
-try:
-    import odfpy                           #Provides interoperability for Open Document Spreadsheet (.ods). Alternatives: https://github.com/renoyuan/easyofd pyexcel-ods3, pyexcel-ods, ezodf
-    odfpyLibraryIsAvailable = True
-except:
-    odfpyLibraryIsAvailable = False
+    import resources.lazyImport as lazyImport
+    openpyxl = lazyImport.lazyImport( 'openpyxl' )           # Used as the core internal data structure and also to read/write xlsx files.
+    xlrd = lazyImport.lazyImport( 'xlrd', optional=True )     #Provides reading from Microsoft Excel Document (.xls).
+    xlwt = lazyImport.lazyImport( 'xlwt', optional=True )     #Provides writing to Microsoft Excel Document (.xls).
+    odfpy = lazyImport.lazyImport( 'odfpy', optional=True )  #Provides interoperability for Open Document Spreadsheet (.ods). Alternatives: https://github.com/renoyuan/easyofd pyexcel-ods3, pyexcel-ods, ezodf
+    xlrdLibraryIsAvailable = xlrd != None
+    xlwtLibraryIsAvailable = xlwt != None
+    odfpyLibraryIsAvailable = odfpy != None
+except ImportError:
+    import openpyxl
+    try:
+        import xlrd
+        xlrdLibraryIsAvailable = True
+    except:
+        xlrdLibraryIsAvailable = False
+    try:
+        import xlwt
+        xlwtLibraryIsAvailable = True
+    except:
+        xlwtLibraryIsAvailable = False
+    try:
+        import odfpy
+        odfpyLibraryIsAvailable = True
+    except:
+        odfpyLibraryIsAvailable = False
 
 #Using the 'namereplace' error handler for text encoding requires Python 3.5+, so use an older one if necessary.
 if sys.version_info.minor >= 5:
@@ -50,6 +63,34 @@ elif sys.version_info.minor < 5:
     outputErrorHandling = 'backslashreplace'    
 
 
+# These are the same as openpyxl.utils.cell.get_column_letter(), column_index_from_string(), and coordinate_from_string(), but do not need openpyxl.
+# 1 -> 'A', 26 -> 'Z', 27 -> 'AA'
+def getColumnLetter( columnNumber ):
+    columnLetter = ''
+    while columnNumber > 0:
+        columnNumber, remainder = divmod( columnNumber - 1, 26 )
+        columnLetter = chr( 65 + remainder ) + columnLetter
+    return columnLetter
+
+
+# 'A' -> 1, 'aa' -> 27
+def getColumnNumberFromLetter( columnLetter ):
+    columnNumber = 0
+    for character in columnLetter.upper():
+        if ( character < 'A' ) or ( character > 'Z' ):
+            raise ValueError( 'Invalid column letter: ' + str( columnLetter ) )
+        columnNumber = ( columnNumber * 26 ) + ( ord( character ) - 64 )
+    return columnNumber
+
+
+# 'AB25' -> ( 'AB', 25 )
+def splitCellAddress( cellAddress ):
+    for index,character in enumerate( cellAddress ):
+        if character.isdigit() == True:
+            return ( cellAddress[ : index ].upper(), int( cellAddress[ index : ] ) )
+    raise ValueError( 'Invalid cell address: ' + str( cellAddress ) )
+
+
 #wrapper class for spreadsheet data structure
 class Strawberry:
     # self is not a keyword. It can be anything, like pie, but it must be the first argument for every function in the class. 
@@ -57,28 +98,24 @@ class Strawberry:
     def __init__( self, myFileName=None, fileEncoding=defaultTextFileEncoding, removeWhitespaceForCSV=False, addHeaderToTextFile=True, spreadsheetNameInWorkbook=None, readOnlyMode=False, csvDialect=None ):
         # https://openpyxl.readthedocs.io/en/stable/api/openpyxl.workbook.workbook.html
         self.fileEncoding = fileEncoding
-        self.workbook = openpyxl.Workbook()
-        if spreadsheetNameInWorkbook == None:
-            self.spreadsheet = self.workbook.active
-            self.spreadsheetName = self.spreadsheet.title
-        else:
-            self.spreadsheetName = spreadsheetNameInWorkbook
-            #print( spreadsheetNameInWorkbook )
-            self.workbook.create_sheet( title = self.spreadsheetName , index=0 )
-            #print( self.workbook.sheetnames )
-            self.spreadsheet = self.workbook[ self.spreadsheetName ]
+        self._createWorkbook( spreadsheetNameInWorkbook )
         self.readOnlyMode = readOnlyMode
         self.csvDialect = csvDialect
         self.addHeaderToTextFile = addHeaderToTextFile
         #self.randomNumber = int( random.random() * 500000 )
 
         # These last two variables are only for use when chocolate.Strawberry() is being used as cache.xlsx. Ignore otherwise.
-        # Index is every entry in the first column, A, with an associated pointer, as an integer, to the correct row in the main spreadsheet.
+        # Index is every entry in the first column, A, with an associated pointer, as an integer, to the correct row in the main spreadsheet. See: CompactIndex
         # Every item in the cache must be unique, not None, and not an empty string ''.
-        self.index = {}
+        self.index = CompactIndex( self._getCacheKey )
         # the last entry i
         self.lastEntry = len( self.index )
 
+        # headerIndex maps every value in the first row to its column number. firstColumnIndex maps every value in column A to its row number. Only the first match is stored for duplicates.
+        # These make searchHeaders() and searchFirstColumn() dictionary lookups instead of scanning the spreadsheet and parsing raw cell strings every time. appendRow() and replaceRow() keep them up to date. Anything else that changes the first row or column A sets them to None so they get rebuilt the next time they are needed.
+        self.headerIndex = None
+        self.firstColumnIndex = None
+
         # Are there any use cases for creating a spreadsheet in memory without an associated file name? Since chocolate.Strawberry() is a data structure, this must be 'yes' by definition, but what is the use case for that exactly? When would it be useful to only create a spreadsheet in memory but never write it out?
         if myFileName != None:
             #if fileEncoding == None:
@@ -122,6 +159,19 @@ class Strawberry:
                     self.importFromTextFile( myFileName, fileEncoding, addHeaderToTextFile=self.addHeaderToTextFile )
 
 
+    def _createWorkbook( self, spreadsheetNameInWorkbook ):
+        self.workbook = openpyxl.Workbook()
+        if spreadsheetNameInWorkbook == None:
+            self.spreadsheet = self.workbook.active
+            self.spreadsheetName = self.spreadsheet.title
+        else:
+            self.spreadsheetName = spreadsheetNameInWorkbook
+            #print( spreadsheetNameInWorkbook )
+            self.workbook.create_sheet( title = self.spreadsheetName , index=0 )
+            #print( self.workbook.sheetnames )
+            self.spreadsheet = self.workbook[ self.spreadsheetName ]
+
+
     def __str__( self ):
         #maybe return the headers from the spreadsheet?
         #return str( spreadsheet[ 1 ] )
@@ -132,6 +182,37 @@ class Strawberry:
     # Expects a Python list.
     def appendRow( self, newRow ):
         self.spreadsheet.append( newRow )
+        self._updateIndexesForAppendedRow( self.spreadsheet.max_row, newRow )
+
+
+    # rowNumber is the row that newRow was added as.
+    def _updateIndexesForAppendedRow( self, rowNumber, newRow ):
+        if rowNumber == 1:
+            self._buildHeaderIndex( newRow )
+        if ( self.firstColumnIndex != None ) and ( len( newRow ) > 0 ) and ( not newRow[ 0 ] in self.firstColumnIndex ):
+            self.firstColumnIndex[ newRow[ 0 ] ] = rowNumber
+
+
+    # Updates the indexes after row rowNumber was changed by replaceRow().
+    def _updateIndexesForReplacedRow( self, rowNumber ):
+        if rowNumber == 1:
+            self._buildHeaderIndex( self.getRow( 1 ) )
+        # The old value in column A might still be in the index, so just rebuild it later.
+        self.firstColumnIndex = None
+
+
+    def _buildHeaderIndex( self, headers ):
+        self.headerIndex = {}
+        for counter,header in enumerate( headers ):
+            if not header in self.headerIndex:
+                self.headerIndex[ header ] = counter + 1
+
+
+    def _buildFirstColumnIndex( self ):
+        self.firstColumnIndex = {}
+        for counter,row in enumerate( self.iterRows() ):
+            if ( len( row ) > 0 ) and ( not row[ 0 ] in self.firstColumnIndex ):
+                self.firstColumnIndex[ row[ 0 ] ] = counter + 1
 
 
     #def appendColumn( self, newColumn ) #Does not seem to be needed. Data is just not processed that way. Maybe the people who use pandas would appreciate it? Well, if they use pandas, then they should use pandas instead. #notmyproblemyet
@@ -140,6 +221,11 @@ class Strawberry:
     # This sets the value of the cell based upon the cellAddress in the form of 'A4'.
     def setCellValue( self, cellAddress, value ):
         self.spreadsheet[ cellAddress ] = value
+        # if the cell is in the first row or column A, then the indexes might be out of date. Checking the string directly is much faster than parsing it. This also matches rows like 11 and 21, but rebuilding too often is harmless.
+        if cellAddress[ -1 ] == '1':
+            self.headerIndex = None
+        if ( cellAddress[ 0 ] in 'Aa' ) and ( cellAddress[ 1 ].isdigit() == True ):
+            self.firstColumnIndex = None
 
 
     # This retuns the value of the cell based upon the cellAddress in the form of 'A4'.
@@ -147,6 +233,47 @@ class Strawberry:
         return self.spreadsheet[ cellAddress ].value
 
 
+    # These are the same as setCellValue() and getCellValue() but use integers for the row and column instead of a cellAddress string. Rows and columns start at 1, so 'C4' is rowNumber=4, columnNumber=3.
+    # This avoids having to create and then parse the cellAddress string which is faster when accessing a lot of cells in a loop.
+    def setCellValueByIndex( self, rowNumber, columnNumber, value ):
+        self.spreadsheet.cell( row=rowNumber, column=columnNumber ).value = value
+        if rowNumber == 1:
+            self.headerIndex = None
+        if columnNumber == 1:
+            self.firstColumnIndex = None
+
+
+    def getCellValueByIndex( self, rowNumber, columnNumber ):
+        return self.spreadsheet.cell( row=rowNumber, column=columnNumber ).value
+
+
+    # Converts a column letter like 'C' into the column number used by getCellValueByIndex(), like 3. if columnLetter is already an int, then return it as-is.
+    def getColumnNumber( self, columnLetter ):
+        if isinstance( columnLetter, int ) == True:
+            return columnLetter
+        return getColumnNumberFromLetter( columnLetter )
+
+
+    # Returns every row as a tuple of values, starting with the header row. Use this instead of accessing self.spreadsheet directly so the same code works for every storage engine.
+    def iterRows( self ):
+        for row in self.spreadsheet.iter_rows( min_row=1, values_only=True ):
+            yield row
+
+
+    # Returns every value in the column specified, starting with the header, one at a time. Unlike getColumn(), this never builds a list of the entire column.
+    def iterColumn( self, columnLetter ):
+        columnNumber = self.getColumnNumber( columnLetter )
+        for row in self.spreadsheet.iter_rows( min_row=1, min_col=columnNumber, max_col=columnNumber, values_only=True ):
+            yield row[ 0 ]
+
+
+    # Returns the number of rows, including the header. if the file did not say how many rows it has, then this returns 0.
+    def getRowCount( self ):
+        if self.spreadsheet.max_row == None:
+            return 0
+        return self.spreadsheet.max_row
+
+
     # Old function. Unused.
     # Full name of this function is _getCellAddressFromRawCellString, but was shortened for legibility. Edit: Made it longer again.
     # This functions would return 'B5' from: <Cell 'Sheet'.B5>
@@ -168,7 +295,7 @@ class Strawberry:
  
        # https://openpyxl.readthedocs.io/en/stable/api/openpyxl.utils.cell.html
         # So apparently, there is a proper way to do this as openpyxl.utils.cell.coordinate_from_string( 'AB25' ) -> ( 'AB', 25 ).
-        column,row=openpyxl.utils.cell.coordinate_from_string( myInputCell )
+        column,row=splitCellAddress( myInputCell )
         # Swap order. Maybe this should be swapped back? Humm.
         return ( str( row ), column )
 
@@ -235,7 +362,7 @@ class Strawberry:
         # https://openpyxl.readthedocs.io/en/stable/api/openpyxl.utils.cell.html
         if isinstance( columnLetter, int) == True:
             # Convert an integer to a column letter (3 -> 'C') so that the calling code does not have to care.
-            columnLetter = openpyxl.utils.cell.get_column_letter( columnLetter )
+            columnLetter = getColumnLetter( columnLetter )
 
         myList=[]
         # Update: Would the built in iterators also work here? #Yes, but then how does the iterator/code know not to process undesired columns? Would have to process every column until the right one is found. 
@@ -286,6 +413,7 @@ class Strawberry:
 
             #A more direct way of doing the same thing is to use .value without () on the cell after the cell reference.
             self.spreadsheet.cell( row=int( rowLocation ), column=i + 1 ).value = newRowList[ i ]
+        self._updateIndexesForReplacedRow( int( rowLocation ) )
         #return myWorkbook
 
     #Example: replaceRow( 7, newRow )
@@ -302,7 +430,7 @@ class Strawberry:
             try:
                 tempColumnNumber = int( columnLetter )
             except:
-                tempColumnNumber = openpyxl.utils.column_index_from_string( columnLetter.upper() )
+                tempColumnNumber = getColumnNumberFromLetter( columnLetter )
         else:
             # This needs to be an int. Crash if it is not.
             tempColumnNumber = int( columnLetter )
@@ -315,18 +443,30 @@ class Strawberry:
             # Syntax for assignment is: mySpreadsheet[ 'A4' ] = 'pie''
             # Rows begin with 1, not 0, so add 1 to the reference row, but not to source list since list starts references at 0.
             self.spreadsheet.cell( row=int( i + 1 ), column=tempColumnNumber ).value = newColumnInAList[ i ]
+        self.headerIndex = None
+        if tempColumnNumber == 1:
+            self.firstColumnIndex = None
 
     # Example: replaceColumn( 'B', newColumnList )
 
 
     # Return either None if there is no cell with the search term, or the column letter of the cell if it found it. Case and whitespace sensitive search.
     # Aside: To determine the row, the column, or both from the raw cell address, call self._getRowAndColumnFromRawCellString(rawCellAddress)
+    # This uses self.headerIndex, so it is a dictionary lookup except for the first search after the headers change.
     def searchHeaders( self, searchTerm ):
-        for row in self.spreadsheet.iter_rows():
-            for cell in row:
-                if cell.value == searchTerm:
-                    return self._getRowAndColumnFromRawCellString(cell)[1]
-            break
+        if self.headerIndex == None:
+            self._buildHeaderIndex( next( self.iterRows(), () ) )
+        if searchTerm in self.headerIndex:
+            return getColumnLetter( self.headerIndex[ searchTerm ] )
+        return None
+
+
+    # Same as searchHeaders(), but returns the column number instead of the column letter. Use with getCellValueByIndex().
+    def searchHeadersForColumnNumber( self, searchTerm ):
+        if self.headerIndex == None:
+            self._buildHeaderIndex( next( self.iterRows(), () ) )
+        if searchTerm in self.headerIndex:
+            return self.headerIndex[ searchTerm ]
         return None
 
     # Example:
@@ -343,11 +483,10 @@ class Strawberry:
     # This might not be needed anymore because searching the first column is really only necessary when using chocolate.Strawberry() as cache.xlsx and self.searchCache() was implemented to optimize that use case. When processing every entry in the first column, that implies iterating over every entry anyway, so this function to help find the first matching entry would not be used. When is it important to find a specific entry, that is also possibly a duplicate, and also process it outside of cache.xlsx?
     # Should this do something special if there is more than one match found, like return a tuple of row numbers?
     def searchFirstColumn( self, searchTerm ):
-        for column in self.spreadsheet.iter_cols():
-            for cell in column:
-                if cell.value == searchTerm:
-                    return self._getRowAndColumnFromRawCellString( cell )[ 0 ]
-            break
+        if self.firstColumnIndex == None:
+            self._buildFirstColumnIndex()
+        if searchTerm in self.firstColumnIndex:
+            return str( self.firstColumnIndex[ searchTerm ] )
         return None
 
 
@@ -383,7 +522,7 @@ class Strawberry:
 
     #Give this function a spreadsheet object (subclass of workbook) and it will print the contents of that sheet. #Updated: Moved to Strawberry() class.
     def printAllTheThings( self ):
-        for row in self.spreadsheet.iter_rows( min_row=1, values_only=True ):
+        for row in self.iterRows():
             temp=''
             for cell in row:
                 temp = temp + ',' + str( cell )
@@ -437,12 +576,12 @@ class Strawberry:
     def exportToTextFile(self, fileNameWithPath, columnToExport=None, fileEncoding=defaultTextFileEncoding):
         #print('Hello World'.encode(consoleEncoding))
         # TODO: Double check this. Is this really correct? Should it not check the rows instead of the length of a column?
-        totalLengthOfSpreadsheet = len( getColumn('A') )
+        totalLengthOfSpreadsheet = len( self.getColumn('A') )
         if ( columnToExport == None ) and ( totalLengthOfSpreadsheet <=3 ):
             # The user did not translate anything, so just export the extracted data.
             columnToExport = 'A'
         if isinstance( columnToExport, int ):
-            columnToExport=openpyxl.utils.cell.get_column_letter(columnToExport)
+            columnToExport=getColumnLetter(columnToExport)
         # Is this logic correct? Probably.
         if ( columnToExport != None ) and ( not isinstance( columnToExport, str ) ):
             print( 'Error: Unknown column to export for spreadsheet. Must be a column or None.'+str(type(columnToExport)) )
@@ -465,7 +604,7 @@ class Strawberry:
                     if ( self.addHeaderToTextFile == True ) and ( rowNumber+1 == 1 ):
                         # then skip first row.
                         continue
-                    tempRow=getRow( rowNumber+1 )
+                    tempRow=self.getRow( rowNumber+1 )
                     tempString=tempRow[0]
                     for counter,cell in enumerate( tempRow ):
                         if ( counter > 2 ) and ( cell != None ) and ( cell != '' ):
@@ -538,7 +677,7 @@ class Strawberry:
                     #tempSpreadsheet.append(listOfStrings)
                     #tempSpreadsheet.appendRow(listOfStrings)
 
-                self.spreadsheet.append( listOfStrings )
+                self.appendRow( listOfStrings )
         #return tempWorkbook
         if debug == True:
             self.printAllTheThings()
@@ -560,7 +699,7 @@ class Strawberry:
             # Get every row for current spreadsheet.
             # For every row, get each item's value in a list.
             # myCsvHandle.writerow( thatList )
-            for row in self.spreadsheet.iter_rows( min_row=1, values_only=True ):
+            for row in self.iterRows():
                 tempList = []
                 for cell in row:
                     tempList.append( str( cell ) )
@@ -581,6 +720,8 @@ class Strawberry:
                 self.workbook.create_sheet( title = str( sheetNameInWorkbook ) , index=0 )
                 self.spreadsheet = self.workbook[ sheetNameInWorkbook ]
         self.spreadsheetName = self.spreadsheet.title
+        self.headerIndex = None
+        self.firstColumnIndex = None
 
 
     # https://openpyxl.readthedocs.io/en/stable/optimized.html
@@ -666,7 +807,7 @@ class Strawberry:
                     #tempSpreadsheet.append(listOfStrings)
                     #tempSpreadsheet.appendRow(listOfStrings)
 
-                self.spreadsheet.append( listOfStrings )
+                self.appendRow( listOfStrings )
 
         #return tempWorkbook
         if debug == True:
@@ -684,7 +825,7 @@ class Strawberry:
             # Get every row for current spreadsheet.
             # For every row, get each item's value in a list.
             # myCsvHandle.writerow( thatList )
-            for row in self.spreadsheet.iter_rows( min_row=1, values_only=True ):
+            for row in self.iterRows():
                 tempList = []
                 for cell in row:
                     tempList.append( str( cell ) )
@@ -693,37 +834,40 @@ class Strawberry:
         print( ( 'Wrote: ' + fileNameWithPath ).encode( consoleEncoding ) )
 
 
-    # These are methods that try to optimize using chocolate.Strawberry() as cache.xlsx by indexing the first column into a Python dictionary with its associated row number.
+    # These are methods that try to optimize using chocolate.Strawberry() as cache.xlsx by indexing the first column with its associated row number.
+    # The index is a CompactIndex instead of a Python dictionary. See: CompactIndex
     def initializeCache( self ):
         # Technically, if using readOnly mode, then a perfect hash table would provide better 'performance', but not clear how to implement that, so do not worry about it.
-        #tempDict = {}
-        # Build index.
-        self.index = {}
-        for counter,entry in enumerate( self.getColumn( 'A' ) ):
-            #tempDict[ entry ] = None
+        # Build index. Column A is read once, one row at a time, and the strings are never copied into the index.
+        self.index = CompactIndex( self._getCacheKey, expectedSize=self.getRowCount() )
+        for counter,entry in enumerate( self.iterColumn( 'A' ) ):
             # Skip adding the header.
             if counter == 0:
                 continue
             # Otherwise, populate the index based upon the first column. The payload is the source row.
             if ( entry == None ) or ( entry == '' ):
                 raise Exception( 'Unable to initalize cache due to None or empty string values in cache.\nTip: Use cache.rebuildCache() to remove the empty items before trying to initializeCache().' )
-            self.index[ entry ] = counter + 1
+            if self.index.add( entry, counter + 1 ) == False:
+                # If this fails, then it should check a variable that if set tries to deduplicate the cache. Hummmm. Maybe not here, but in main program? It should be a user decision to do rebuild or not.
+                print( ( 'Duplicate key found at row ' + str( counter + 1 ) + ': ' + str( entry ) ).encode( consoleEncoding ) )
+                print( 'Error: Spreadsheet has duplicate items. Cannot use as cache.\nTip: Use cache.rebuildCache() to remove the duplicate items before trying to cache.initializeCache(). Adding new entries while duplicates exist will corrupt the cache.' )
+                raise Exception( 'Unable to initalize cache due to duplicate values in cache.' )
         # last entry = total length of the index since counting starts at 1. Adding 1 would put it out of bounds. # Update: Incorrect. It would be out of bounds if it was pointing to itself, but it is actually pointing to self.spreadsheet which needs the +1 in order for the pointer in the index to point to the correct cell in self.spreadsheet. Otherwise, it ends up pointing to the cell above it resulting in an off by 1 error.
         if len( self.index ) != 0:
             self.lastEntry = len( self.index ) + 1
         else:
             # There is a special failure case when initializing an empty index with only 0 or 1 entries in the main self.spreadsheet. In that case, self.lastEntry will remain 0 instead of getting incremented by 1. Then, the next time something gets cache.addToCache(), self.lastEntry will be incremented by 1 and return 1 when the correct address is actually 2, assuming a header row is present in the main self.spreadsheet which it always should be. So, increment self.lastEntry from 0 to 1 here.
             self.lastEntry = 1
-        # If this fails, then it should check a variable that if set tries to deduplicate the cache. Hummmm. Maybe not here, but in main program? It should be a user decision to do rebuild or not.
-        try:
-            assert( len( self.index ) + 1 == len( self.getColumn('A') ) )
-        except:
-            print( 'len( self.index ) + 1=', len( self.index ) )
-            print( 'len( self.getColumn(A) )=', len( self.getColumn('A') ) )
-            print( 'Error: Spreadsheet has duplicate items. Cannot use as cache.\nTip: Use cache.rebuildCache() to remove the duplicate items before trying to cache.initializeCache(). Adding new entries while duplicates exist will corrupt the cache.' )
-            raise
 
-    # Expects a string and searches through the current cache index. Returns the currentRow number where myString was found. Python dictionaries have an O(1) search time, they are hash tables, compared to O(n) search time on Python lists especially when the last list item is being searched for immediately after an append() opperation. Compared to O(n), O(1) is crazy levels of fast, although even O(log n) would have been an improvement.
+        print( ( 'Info: Indexed ' + str( len( self.index ) ) + ' entries of ' + self.spreadsheetName + ' using ' + str( round( self.index.getMemoryUsage() / 1024, 1 ) ) + ' KB.' ).encode( consoleEncoding ) )
+
+
+    # CompactIndex only stores hashes, so it uses this to check that the entry at rowNumber really is the string that was searched for.
+    def _getCacheKey( self, rowNumber ):
+        return self.getCellValueByIndex( rowNumber, 1 )
+
+
+    # Expects a string and searches through the current cache index. Returns the currentRow number where myString was found. Hash tables have an O(1) search time compared to O(n) search time on Python lists especially when the last list item is being searched for immediately after an append() opperation. Compared to O(n), O(1) is crazy levels of fast, although even O(log n) would have been an improvement.
     def searchCache( self, myString ):
         if myString == None:
             print( 'Warning: Cannot use searchCache to search for myString=None.' )
@@ -734,10 +878,8 @@ class Strawberry:
         if myString.strip() == '' :
             print( 'Warning: Cannot use searchCache to search for myString=empty string.' )
             return None
-        elif myString in self.index.keys(): # The .keys() part is explicit, but even without that, that syntax only searches the keys of the dictionary.
-            return self.index[ myString ]
-        else:
-            return None
+        # Both CompactIndex and dictionaries return None if myString is not in the index.
+        return self.index.get( myString )
 
 
     # accepts a string or a list with a single item? Answer: Just a string.
@@ -756,13 +898,13 @@ class Strawberry:
         tempSearchResult = self.searchCache( myString )
         if tempSearchResult == None:
             # then add it to the main spreadsheet.
-            self.spreadsheet.append( [ myString ] )
+            self.appendRow( [ myString ] )
 
             # Update the self.lastEntry as needed.
             self.lastEntry += 1
 
             # then add it to the index.
-            self.index[ myString ] = self.lastEntry
+            self.index.add( myString, self.lastEntry )
 
             # And return where it was added.
             return self.lastEntry
@@ -786,7 +928,7 @@ class Strawberry:
 
         # Obtain header values. Use header in first cell A1 as core index.
         # coreHeader=self.spreadsheet[ 'A1' ]
-        self.index = {}
+        self.index = CompactIndex( self._getCacheKey )
         database = {}
 
         if coreHeader == None:
@@ -856,6 +998,8 @@ class Strawberry:
         self.workbook.create_sheet( title = self.spreadsheetName , index=0 )
         #print( self.workbook.sheetnames )
         self.spreadsheet = self.workbook[ self.spreadsheetName ]
+        self.headerIndex = None
+        self.firstColumnIndex = None
 
         # Add the values into the worksheet.
         # This needs to construct a list [] in the correct order. The first item in the list is the untranslatedEntry and/or the rowDictionary[coreHeader]=value They shoud be the same. The second item is the item specified by the headers dictionary.
@@ -988,6 +1132,440 @@ class Strawberry:
         return ( headers, tempDatabase )
 
 
+# Blueberry is a Strawberry that stores the data in plain Python lists instead of an openpyxl workbook. openpyxl is only used when reading from or writing to .xlsx files.
+# Every access to an openpyxl cell has to create and parse a cellAddress string and then create or find a Cell object. For spreadsheets with 100k+ rows, that overhead dominates processing time. With lists, getCellValueByIndex() and setCellValueByIndex() are just list lookups. Lists also use much less memory than Cell objects.
+# The data is stored column-oriented. self.columns[ 0 ] is column A and self.columns[ 0 ][ 0 ] is A1. Every column always has the same length, self.rowCount.
+# Limitation: Only one spreadsheet is kept. if an .xlsx file has more than one sheet, then only the active sheet, or spreadsheetNameInWorkbook, is read and exported. Use Strawberry() for workbooks with multiple sheets, like cache.xlsx.
+class Blueberry( Strawberry ):
+    def __init__( self, myFileName=None, fileEncoding=defaultTextFileEncoding, removeWhitespaceForCSV=False, addHeaderToTextFile=True, spreadsheetNameInWorkbook=None, readOnlyMode=False, csvDialect=None ):
+        self.columns = []
+        self.rowCount = 0
+        # Converting column letters to numbers is slow-ish, but there are only a few columns, so remember the results.
+        self.columnNumbersCache = {}
+        # Strawberry.__init__() handles reading the file. It calls appendRow() and importFromXLSX() which are replaced below, so the data ends up in self.columns.
+        super().__init__( myFileName=myFileName, fileEncoding=fileEncoding, removeWhitespaceForCSV=removeWhitespaceForCSV, addHeaderToTextFile=addHeaderToTextFile, spreadsheetNameInWorkbook=spreadsheetNameInWorkbook, readOnlyMode=readOnlyMode, csvDialect=csvDialect )
+
+
+    # There is no openpyxl workbook. 'Sheet' is the same default name openpyxl uses.
+    def _createWorkbook( self, spreadsheetNameInWorkbook ):
+        self.workbook = None
+        self.spreadsheet = None
+        if spreadsheetNameInWorkbook == None:
+            self.spreadsheetName = 'Sheet'
+        else:
+            self.spreadsheetName = spreadsheetNameInWorkbook
+
+
+    # Makes sure the cell at rowNumber, columnNumber exists. Like openpyxl, writing past the end of the spreadsheet expands it.
+    def _expandToFit( self, rowNumber, columnNumber ):
+        while len( self.columns ) < columnNumber:
+            self.columns.append( [ None ] * self.rowCount )
+        if rowNumber > self.rowCount:
+            for column in self.columns:
+                column.extend( [ None ] * ( rowNumber - self.rowCount ) )
+            self.rowCount = rowNumber
+
+
+    # Returns a tuple of ( rowNumber, columnNumber ) as integers from a cellAddress like 'C4'.
+    def _getRowAndColumnNumbersFromCellAddress( self, cellAddress ):
+        columnLetter, rowNumber = splitCellAddress( cellAddress )
+        return ( rowNumber, self.getColumnNumber( columnLetter ) )
+
+
+    def getColumnNumber( self, columnLetter ):
+        if isinstance( columnLetter, int ) == True:
+            return columnLetter
+        if not columnLetter in self.columnNumbersCache:
+            self.columnNumbersCache[ columnLetter ] = getColumnNumberFromLetter( columnLetter )
+        return self.columnNumbersCache[ columnLetter ]
+
+
+    def appendRow( self, newRow ):
+        while len( self.columns ) < len( newRow ):
+            self.columns.append( [ None ] * self.rowCount )
+        for counter,column in enumerate( self.columns ):
+            if counter < len( newRow ):
+                column.append( newRow[ counter ] )
+            else:
+                column.append( None )
+        self.rowCount += 1
+        self._updateIndexesForAppendedRow( self.rowCount, newRow )
+
+
+    def setCellValueByIndex( self, rowNumber, columnNumber, value ):
+        if ( rowNumber > self.rowCount ) or ( columnNumber > len( self.columns ) ):
+            self._expandToFit( rowNumber, columnNumber )
+        self.columns[ columnNumber - 1 ][ rowNumber - 1 ] = value
+        if rowNumber == 1:
+            self.headerIndex = None
+        if columnNumber == 1:
+            self.firstColumnIndex = None
+
+
+    def getCellValueByIndex( self, rowNumber, columnNumber ):
+        if ( rowNumber > self.rowCount ) or ( columnNumber > len( self.columns ) ):
+            return None
+        return self.columns[ columnNumber - 1 ][ rowNumber - 1 ]
+
+
+    def setCellValue( self, cellAddress, value ):
+        rowNumber, columnNumber = self._getRowAndColumnNumbersFromCellAddress( cellAddress )
+        self.setCellValueByIndex( rowNumber, columnNumber, value )
+
+
+    def getCellValue( self, cellAddress ):
+        rowNumber, columnNumber = self._getRowAndColumnNumbersFromCellAddress( cellAddress )
+        return self.getCellValueByIndex( rowNumber, columnNumber )
+
+
+    def iterRows( self ):
+        for rowIndex in range( self.rowCount ):
+            yield tuple( column[ rowIndex ] for column in self.columns )
+
+
+    def getRow( self, rowNumber ):
+        if isinstance( rowNumber, str ) == True:
+            rowNumber = int( rowNumber )
+        if rowNumber > self.rowCount:
+            return [ None ] * len( self.columns )
+        myList = []
+        for column in self.columns:
+            myList.append( column[ rowNumber - 1 ] )
+        if debug == True:
+            print( str( myList ).encode( consoleEncoding ) )
+        return myList
+
+
+    def iterColumn( self, columnLetter ):
+        columnNumber = self.getColumnNumber( columnLetter )
+        if columnNumber > len( self.columns ):
+            for rowIndex in range( self.rowCount ):
+                yield None
+            return
+        for value in self.columns[ columnNumber - 1 ]:
+            yield value
+
+
+    def getRowCount( self ):
+        return self.rowCount
+
+
+    # This returns a copy of the column, so changing the list that is returned does not change the data in the Blueberry.
+    def getColumn( self, columnLetter ):
+        columnNumber = self.getColumnNumber( columnLetter )
+        if columnNumber > len( self.columns ):
+            return [ None ] * self.rowCount
+        return list( self.columns[ columnNumber - 1 ] )
+
+
+    def replaceRow( self, rowLocation, newRowList ):
+        if debug == True:
+            print( ( 'newRowList=' + str( newRowList ) ).encode( consoleEncoding ) )
+        for counter,value in enumerate( newRowList ):
+            self.setCellValueByIndex( int( rowLocation ), counter + 1, value )
+        self._updateIndexesForReplacedRow( int( rowLocation ) )
+
+
+    def replaceColumn( self, columnLetter, newColumnInAList ):
+        if isinstance( columnLetter, str ) == True:
+            try:
+                tempColumnNumber = int( columnLetter )
+            except:
+                tempColumnNumber = self.getColumnNumber( columnLetter )
+        else:
+            tempColumnNumber = int( columnLetter )
+
+        if debug == True:
+            print( ( 'Replacing column \'' + str( columnLetter ) + '\' with the following contents:' ).encode( consoleEncoding ) )
+            print( str( newColumnInAList ).encode( consoleEncoding ) )
+
+        for counter,value in enumerate( newColumnInAList ):
+            self.setCellValueByIndex( counter + 1, tempColumnNumber, value )
+
+
+    def searchSpreadsheet( self, searchTerm ):
+        for rowIndex in range( self.rowCount ):
+            for columnIndex,column in enumerate( self.columns ):
+                if column[ rowIndex ] == searchTerm:
+                    return ( str( rowIndex + 1 ), getColumnLetter( columnIndex + 1 ) )
+        return [ None, None ]
+
+
+    def searchRowsCaseInsensitive( self, searchTerm ):
+        searchTerm = str( searchTerm ).lower()
+        for rowIndex in range( self.rowCount ):
+            for columnIndex,column in enumerate( self.columns ):
+                if ( isinstance( column[ rowIndex ], str ) ) and ( column[ rowIndex ].lower() == searchTerm ):
+                    return ( str( rowIndex + 1 ), getColumnLetter( columnIndex + 1 ) )
+        return [ None, None ]
+
+
+    def searchColumnsCaseInsensitive( self, searchTerm ):
+        searchTerm = str( searchTerm ).lower()
+        for columnIndex,column in enumerate( self.columns ):
+            for rowIndex,value in enumerate( column ):
+                if ( isinstance( value, str ) ) and ( value.lower() == searchTerm ):
+                    return ( str( rowIndex + 1 ), getColumnLetter( columnIndex + 1 ) )
+        return [ None, None ]
+
+
+    # read_only mode reads the rows one at a time without creating Cell objects for the entire workbook first, so it is both faster and uses less memory.
+    def importFromXLSX( self, fileNameWithPath, fileEncoding=defaultTextFileEncoding, sheetNameInWorkbook=None, readOnlyMode=False ):
+        print( ( 'Reading from: ' + fileNameWithPath ).encode( consoleEncoding ) )
+        tempWorkbook = openpyxl.load_workbook( filename = fileNameWithPath, read_only=True )
+        if sheetNameInWorkbook == None:
+            tempSpreadsheet = tempWorkbook.active
+        elif sheetNameInWorkbook in tempWorkbook.sheetnames:
+            tempSpreadsheet = tempWorkbook[ sheetNameInWorkbook ]
+        else:
+            tempSpreadsheet = None
+
+        if len( tempWorkbook.sheetnames ) > 1:
+            print( ( 'Warning: Only one sheet will be read from \'' + fileNameWithPath + '\'. The other sheets will not be exported. Sheets: ' + str( tempWorkbook.sheetnames ) ).encode( consoleEncoding ) )
+
+        if tempSpreadsheet == None:
+            self.spreadsheetName = str( sheetNameInWorkbook )
+        else:
+            self.spreadsheetName = tempSpreadsheet.title
+            for row in tempSpreadsheet.iter_rows( values_only=True ):
+                self.appendRow( list( row ) )
+        tempWorkbook.close()
+
+
+    def close( self ):
+        pass
+
+
+    # openpyxl is only needed here. write_only mode streams the rows to disk instead of building Cell objects for all of them first.
+    def exportToXLSX( self, fileNameWithPath, fileEncoding=defaultTextFileEncoding ):
+        tempWorkbook = openpyxl.Workbook( write_only=True )
+        tempSpreadsheet = tempWorkbook.create_sheet( title=self.spreadsheetName )
+        for row in self.iterRows():
+            tempSpreadsheet.append( row )
+        tempWorkbook.save( filename=fileNameWithPath )
+        print( ( 'Wrote: ' + fileNameWithPath ).encode( consoleEncoding ) )
+
+
+    # Same result as Strawberry.rebuildCache(), but using the lists directly: Remove rows with None or empty keys and remove duplicates. For duplicates, the last row wins.
+    def rebuildCache( self, coreHeader=None, extraStrawberryToMerge=None ):
+        self.index = CompactIndex( self._getCacheKey )
+        if self.rowCount == 0:
+            return
+
+        if coreHeader == None:
+            coreHeader = self.columns[ 0 ][ 0 ]
+        print( ( 'Rebuilding index using coreHeader=' + str( coreHeader ) ).encode( consoleEncoding ) )
+
+        headers = self.getRow( 1 )
+        if not coreHeader in headers:
+            print( 'Error: The column header chosen as an index could not be found in the spreadsheet headers: ' + str( coreHeader ) )
+            return
+        keyColumnIndex = headers.index( coreHeader )
+
+        # Move the key column to column A.
+        if keyColumnIndex != 0:
+            self.columns.insert( 0, self.columns.pop( keyColumnIndex ) )
+            headers = self.getRow( 1 )
+
+        tempDatabase = {}
+        for rowIndex in range( 1, self.rowCount ):
+            rowKey = self.columns[ 0 ][ rowIndex ]
+            if ( rowKey == None ) or ( str( rowKey ).strip() == '' ):
+                print( ( 'None or empty string key found at row ' + str( rowIndex + 1 ) + '.' ).encode( consoleEncoding ) )
+                continue
+            if rowKey in tempDatabase:
+                print( ( 'Duplicate key found at row ' + str( rowIndex + 1 ) + ': ' + str( rowKey ) ).encode( consoleEncoding ) )
+            tempDatabase[ rowKey ] = rowIndex
+
+        print( 'Rows before rebuilding=', self.rowCount )
+        print( 'len( tempDatabase ) after rebuilding=', len( tempDatabase ) )
+
+        newColumns = []
+        for counter,column in enumerate( self.columns ):
+            newColumn = [ headers[ counter ] ]
+            for rowIndex in tempDatabase.values():
+                newColumn.append( column[ rowIndex ] )
+            newColumns.append( newColumn )
+        self.columns = newColumns
+        self.rowCount = len( tempDatabase ) + 1
+        self.headerIndex = None
+        self.firstColumnIndex = None
+
+
+# Streaming i/o. These read and write one row at a time so that spreadsheets that are too large to fit in memory can still be processed in pieces. Only .xlsx and .csv are supported.
+streamingExtensions = [ '.xlsx', '.csv' ]
+
+
+# This is a generator that returns every row in myFileName as a list, starting with the header row. Nothing is kept in memory besides the current row.
+# For .xlsx, openpyxl read_only mode only reads each row from the file when it is needed. For .csv, the same type conversions as importFromCSV() are applied.
+def iterateRowsFromFile( myFileName, fileEncoding=defaultTextFileEncoding, removeWhitespaceForCSV=False, spreadsheetNameInWorkbook=None, csvDialect=None ):
+    myFileExtensionOnly = os.path.splitext( myFileName )[ 1 ]
+    if not myFileExtensionOnly in streamingExtensions:
+        print( ( 'Error: Unable to read file with extension \'' + myFileExtensionOnly + '\' one row at a time. Supported extensions: ' + str( streamingExtensions ) ).encode( consoleEncoding ) )
+        sys.exit( 1 )
+    print( ( 'Reading from: ' + myFileName ).encode( consoleEncoding ) )
+
+    if myFileExtensionOnly == '.xlsx':
+        tempWorkbook = openpyxl.load_workbook( filename = myFileName, read_only=True )
+        try:
+            if ( spreadsheetNameInWorkbook != None ) and ( spreadsheetNameInWorkbook in tempWorkbook.sheetnames ):
+                tempSpreadsheet = tempWorkbook[ spreadsheetNameInWorkbook ]
+            else:
+                tempSpreadsheet = tempWorkbook.active
+            for row in tempSpreadsheet.iter_rows( values_only=True ):
+                yield list( row )
+        finally:
+            tempWorkbook.close()
+
+    elif myFileExtensionOnly == '.csv':
+        with open( myFileName, newline='', encoding=fileEncoding, errors=inputErrorHandling ) as myFile:
+            if csvDialect == None:
+                myCsvHandle = csv.reader( myFile )
+            else:
+                myCsvHandle = csv.reader( myFile, dialect=csvDialect )
+            for listOfStrings in myCsvHandle:
+                for i in range( len( listOfStrings ) ):
+                    if removeWhitespaceForCSV == True:
+                        listOfStrings[ i ] = listOfStrings[ i ].strip()
+                    if listOfStrings[ i ].lower() == 'true':
+                        listOfStrings[ i ] = True
+                    elif listOfStrings[ i ].lower() == 'false':
+                        listOfStrings[ i ] = False
+                    elif ( listOfStrings[ i ].lower() == 'none' ) or ( listOfStrings[ i ] == '' ):
+                        listOfStrings[ i ] = None
+                yield listOfStrings
+
+
+# Writes rows to a file one at a time instead of building the entire spreadsheet in memory first. Call close() at the end.
+# For .xlsx, openpyxl write_only mode keeps rows in a temporary file until save() is called, so memory use stays low. .csv rows are written immediately.
+class StreamingWriter:
+    def __init__( self, myFileName, fileEncoding=defaultTextFileEncoding, spreadsheetName=None, csvDialect=None ):
+        self.fileName = myFileName
+        self.fileExtension = os.path.splitext( myFileName )[ 1 ]
+        if not self.fileExtension in streamingExtensions:
+            print( ( 'Error: Unable to write file with extension \'' + self.fileExtension + '\' one row at a time. Supported extensions: ' + str( streamingExtensions ) ).encode( consoleEncoding ) )
+            sys.exit( 1 )
+        self.rowCount = 0
+
+        if self.fileExtension == '.xlsx':
+            self.workbook = openpyxl.Workbook( write_only=True )
+            if spreadsheetName == None:
+                self.spreadsheet = self.workbook.create_sheet()
+            else:
+                self.spreadsheet = self.workbook.create_sheet( title=spreadsheetName )
+        elif self.fileExtension == '.csv':
+            self.fileHandle = open( myFileName, 'w', newline='', encoding=fileEncoding, errors=outputErrorHandling )
+            if csvDialect == None:
+                self.csvHandle = csv.writer( self.fileHandle )
+            else:
+                self.csvHandle = csv.writer( self.fileHandle, dialect=csvDialect )
+
+
+    def appendRow( self, newRow ):
+        if self.fileExtension == '.xlsx':
+            self.spreadsheet.append( newRow )
+        else:
+            # Same as exportToCSV().
+            tempList = []
+            for cell in newRow:
+                tempList.append( str( cell ) )
+            self.csvHandle.writerow( tempList )
+        self.rowCount += 1
+
+
+    def close( self ):
+        if self.fileExtension == '.xlsx':
+            self.workbook.save( filename=self.fileName )
+        else:
+            self.fileHandle.close()
+        print( ( 'Wrote: ' + self.fileName ).encode( consoleEncoding ) )
+
+
+# A hash table that maps every entry in column A of a cache to its row number. This is what Strawberry.initializeCache() uses as self.index.
+# A Python dictionary { entry : rowNumber } needs around 100 bytes per entry for the hash table, the key pointer, and a separate int object for every row number. For caches with millions of entries, that adds up quickly.
+# Instead, this stores only the 64-bit hash of each entry and its row number in two array.array objects, 12 bytes per slot. The table is kept at most half full. The strings themselves are not stored here at all since they are already in the spreadsheet. When a hash matches, getKey( rowNumber ) reads the entry back from the spreadsheet to make sure it is the same string, so hash collisions can never return the wrong row.
+# Collisions are resolved by linear probing. Row numbers start at 1, so a row number of 0 marks an empty slot. Entries are never removed.
+# Python's hash() is only stable within a single process, so the index must never be saved to disk. It is rebuilt every time initializeCache() is called.
+class CompactIndex:
+    def __init__( self, getKey, expectedSize=0 ):
+        self.getKey = getKey
+        self.count = 0
+        capacity = 8
+        while capacity < expectedSize * 2:
+            capacity = capacity * 2
+        self._allocate( capacity )
+
+
+    def _allocate( self, capacity ):
+        self.mask = capacity - 1
+        # Creating an array from bytes fills it with zeros without a Python loop.
+        self.hashes = array.array( 'q', bytes( 8 * capacity ) )
+        self.rows = array.array( 'I', bytes( array.array( 'I' ).itemsize * capacity ) )
+
+
+    def __len__( self ):
+        return self.count
+
+
+    def __contains__( self, key ):
+        return self.get( key ) != None
+
+
+    # Returns the slot for key. if key is not in the index, this is the empty slot where it should be added.
+    def _findSlot( self, key, keyHash ):
+        slot = keyHash & self.mask
+        while True:
+            rowNumber = self.rows[ slot ]
+            if rowNumber == 0:
+                return slot
+            if ( self.hashes[ slot ] == keyHash ) and ( self.getKey( rowNumber ) == key ):
+                return slot
+            slot = ( slot + 1 ) & self.mask
+
+
+    # Returns the row number for key, or None if key is not in the index. Same as dict.get().
+    def get( self, key, default=None ):
+        rowNumber = self.rows[ self._findSlot( key, hash( key ) ) ]
+        if rowNumber == 0:
+            return default
+        return rowNumber
+
+
+    # Adds key with rowNumber to the index. Returns False if key was already in the index. In that case, the existing row number is not changed.
+    def add( self, key, rowNumber ):
+        if ( self.count + 1 ) * 2 > len( self.rows ):
+            self._resize( len( self.rows ) * 2 )
+        keyHash = hash( key )
+        slot = self._findSlot( key, keyHash )
+        if self.rows[ slot ] != 0:
+            return False
+        self.hashes[ slot ] = keyHash
+        self.rows[ slot ] = rowNumber
+        self.count += 1
+        return True
+
+
+    # The hashes are already stored, so growing the table does not need to read any entries from the spreadsheet.
+    def _resize( self, capacity ):
+        oldHashes = self.hashes
+        oldRows = self.rows
+        self._allocate( capacity )
+        for oldSlot,rowNumber in enumerate( oldRows ):
+            if rowNumber == 0:
+                continue
+            keyHash = oldHashes[ oldSlot ]
+            slot = keyHash & self.mask
+            while self.rows[ slot ] != 0:
+                slot = ( slot + 1 ) & self.mask
+            self.hashes[ slot ] = keyHash
+            self.rows[ slot ] = rowNumber
+
+
+    # Returns the number of bytes used by the arrays.
+    def getMemoryUsage( self ):
+        return ( len( self.hashes ) * self.hashes.itemsize ) + ( len( self.rows ) * self.rows.itemsize )
+
+
 """
 
 # TODO: This section.
@@ -1003,6 +1581,17 @@ spreadsheet=chocolate.Strawberry()
 
 searchCellRow, searchCellColumn = spreadsheet.search
 
+# Blueberry has the same interface but stores the data in Python lists. Faster for large spreadsheets, but only keeps one sheet.
+mainSpreadsheet = chocolate.Blueberry( 'myFile.xlsx' )
+mainSpreadsheet.getCellValueByIndex( 4, 3 ) # Same as getCellValue( 'C4' )
+mainSpreadsheet.setCellValueByIndex( 4, 3, 'pie' )
+
+# For files too large to fit in memory, read and write one row at a time.
+outputFile = chocolate.StreamingWriter( 'myFile.translated.xlsx' )
+for row in chocolate.iterateRowsFromFile( 'myFile.xlsx' ):
+    outputFile.appendRow( row )
+outputFile.close()
+
 
 if dealWithEncodingLibraryIsAvailable == True:
     #Update internal library variables to match main program settings.
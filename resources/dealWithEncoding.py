@@ -11,7 +11,7 @@ Usage: See below. Like at the bottom.
 
 License: See main program.
 """
-__version__ = '2024.07.22'
+__version__ = '2024.11.17'
 
 
 #set defaults
@@ -36,21 +36,31 @@ knownBinaryFormats = [
 #These must be here or the library will crash even if these modules have already been imported by main program.
 import os.path                                   # Test if file exists.
 import sys                                         # End program on fail condition.
+# Detecting the encoding is only needed when it was not specified, so only import these libraries when they are first used. See: resources/lazyImport.py
 try:
-    import chardet                              # Detect character encoding from files using heuristics.
-    chardetLibraryAvailable = True
-except:
-    chardetLibraryAvailable = False
-try:
-    import charamel                            # Detect character encoding from files using machine learning heuristics.
-    charamelLibraryAvailable = True
-except:
-    charamelLibraryAvailable = False
-try:
-    import charset_normalizer              # Try to figure out which character encoding correctly decodes the text.
-    charsetNormalizerLibraryAvailable = True
-except:
-    charsetNormalizerLibraryAvailable = False
+    import resources.lazyImport as lazyImport
+    chardet = lazyImport.lazyImport( 'chardet', optional=True )                                 # Detect character encoding from files using heuristics.
+    charamel = lazyImport.lazyImport( 'charamel', optional=True )                            # Detect character encoding from files using machine learning heuristics.
+    charset_normalizer = lazyImport.lazyImport( 'charset_normalizer', optional=True )  # Try to figure out which character encoding correctly decodes the text.
+    chardetLibraryAvailable = chardet != None
+    charamelLibraryAvailable = charamel != None
+    charsetNormalizerLibraryAvailable = charset_normalizer != None
+except ImportError:
+    try:
+        import chardet
+        chardetLibraryAvailable = True
+    except:
+        chardetLibraryAvailable = False
+    try:
+        import charamel
+        charamelLibraryAvailable = True
+    except:
+        charamelLibraryAvailable = False
+    try:
+        import charset_normalizer
+        charsetNormalizerLibraryAvailable = True
+    except:
+        charsetNormalizerLibraryAvailable = False
 
 
 #Returns a string containing the encoding to use, relied on detectEncoding(filename) but code was merged down.
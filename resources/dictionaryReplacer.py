@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: A helper library that applies every key=value replacement in a dictionary to a string in a single pass. py3TranslateLLM uses it for preTranslationDictionary, revertAfterTranslationDictionary, and postTranslationDictionary.
+
+Looping over every key and calling str.find() and str.replace() for every line gets very slow with large dictionaries since every line has to be searched once for every key. Instead, all of the keys are compiled once into a single regular expression shaped like a trie, so 'cat', 'car', 'cart' becomes 'ca(?:rt?|t)'. The regex engine then only needs to follow the trie from each position in the string. The work per line depends on the length of the line, not on the number of keys.
+
+Matching rules:
+- The string is scanned from left to right.
+- At each position, the longest key that matches is replaced. if 'New York' and 'New' are both keys, then 'New York City' becomes value('New York') + ' City'.
+- Replaced text is never searched again, so the result does not depend on the order of the keys in the dictionary.
+- Empty keys are ignored.
+
+Usage: See below. Like at the bottom. To compare the speed against the old loops, run: python resources/dictionaryReplacer.py
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+
+import re
+
+
+class DictionaryReplacer:
+    # if reverse == True, then replace every value with its key instead. if several keys have the same value, then the first key wins, the same as the old loops.
+    def __init__( self, dictionary, reverse=False ):
+        self.replacements = {}
+        for key,value in dictionary.items():
+            # The spreadsheet importers convert values like '1' or 'true' to int and bool.
+            if value == None:
+                value = ''
+            value = str( value )
+            key = str( key )
+            if reverse == True:
+                key,value = value,key
+            if ( key == '' ) or ( key in self.replacements ):
+                continue
+            self.replacements[ key ] = value
+
+        if len( self.replacements ) == 0:
+            self.pattern = None
+        else:
+            self.pattern = re.compile( self._buildTrieRegex( self._buildTrie( self.replacements.keys() ) ) )
+
+        if debug == True:
+            print( ( 'DictionaryReplacer keys=' + str( len( self.replacements ) ) + ' pattern length=' + str( len( self.pattern.pattern ) if self.pattern != None else 0 ) ).encode( consoleEncoding ) )
+
+
+    def __len__( self ):
+        return len( self.replacements )
+
+
+    # Each node is a dictionary of character -> child node. The '' key marks the end of a complete key.
+    def _buildTrie( self, keyList ):
+        trie = {}
+        for key in keyList:
+            node = trie
+            for character in key:
+                node = node.setdefault( character, {} )
+            node[ '' ] = True
+        return trie
+
+
+    # Converts the trie into a regular expression. Chains of nodes with only one child are written as a single literal string, so the nesting depth only depends on the number of branches, not the length of the keys.
+    # Longer matches are always tried first: branches that continue the key come before the end of the key, and quantifiers like ? are greedy.
+    def _buildTrieRegex( self, node ):
+        literal = ''
+        while ( len( node ) == 1 ) and ( '' not in node ):
+            character, node = next( iter( node.items() ) )
+            literal = literal + re.escape( character )
+
+        endsHere = '' in node
+        branchList = []
+        for character,childNode in node.items():
+            if character == '':
+                continue
+            branchList.append( re.escape( character ) + self._buildTrieRegex( childNode ) )
+
+        if len( branchList ) == 0:
+            return literal
+        if len( branchList ) == 1:
+            rest = branchList[ 0 ]
+        else:
+            rest = '(?:' + '|'.join( branchList ) + ')'
+        if endsHere == True:
+            # The end of a key was reached but longer keys are still possible.
+            if len( branchList ) == 1:
+                rest = '(?:' + rest + ')'
+            rest = rest + '?'
+        return literal + rest
+
+
+    def _replaceMatch( self, match ):
+        return self.replacements[ match.group( 0 ) ]
+
+
+    def replace( self, string ):
+        if ( self.pattern == None ) or ( string == None ):
+            return string
+        return self.pattern.sub( self._replaceMatch, string )
+
+
+# Compares DictionaryReplacer against the str.find()/str.replace() loops it replaced using a random dictionary. The results are not always identical since the old loops allow a replacement to create a new match for a later key.
+def benchmark( keyCount=20000, lineCount=2000 ):
+    import random
+    import timeit
+
+    random.seed( 0 )
+    alphabet = 'あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん'
+    dictionary = {}
+    while len( dictionary ) < keyCount:
+        key = ''.join( random.choice( alphabet ) for counter in range( random.randint( 2, 8 ) ) )
+        dictionary[ key ] = 'value' + str( len( dictionary ) )
+    lineList = [ ''.join( random.choice( alphabet ) for counter in range( random.randint( 10, 60 ) ) ) for lineCounter in range( lineCount ) ]
+
+    def oldLoops():
+        for line in lineList:
+            for key,item in dictionary.items():
+                if line.find( key ) != -1:
+                    line = line.replace( key, item )
+
+    startTime = timeit.default_timer()
+    replacer = DictionaryReplacer( dictionary )
+    buildTime = timeit.default_timer() - startTime
+
+    def newReplacer():
+        for line in lineList:
+            replacer.replace( line )
+
+    oldTime = timeit.timeit( oldLoops, number=1 )
+    newTime = timeit.timeit( newReplacer, number=1 )
+    print( 'keys=' + str( keyCount ) + ' lines=' + str( lineCount ) )
+    print( 'str.find()/str.replace() loops: ' + str( round( oldTime, 3 ) ) + ' seconds' )
+    print( 'DictionaryReplacer: ' + str( round( newTime, 3 ) ) + ' seconds, plus ' + str( round( buildTime, 3 ) ) + ' seconds to build it once.' )
+    if newTime > 0:
+        print( 'Speedup: ' + str( round( oldTime / newTime, 1 ) ) + 'x' )
+
+
+if __name__ == '__main__':
+    benchmark()
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources':
+
+import resources.dictionaryReplacer as dictionaryReplacer
+
+myReplacer = dictionaryReplacer.DictionaryReplacer( { 'New' : 'Old', 'New York' : 'NYC' } )
+myReplacer.replace( 'New York is New.' )
+# Returns: 'NYC is Old.'
+
+# To undo a revertAfterTranslationDictionary after translation.
+myReverseReplacer = dictionaryReplacer.DictionaryReplacer( { 'Ann' : '{name1}' }, reverse=True )
+myReverseReplacer.replace( '{name1} said hello.' )
+# Returns: 'Ann said hello.'
+"""
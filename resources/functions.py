@@ -21,7 +21,7 @@ Notes: Only functions that do not use module-wide variables and have return valu
 Copyright (c) 2024 gdiaz384; License: See main program.
 
 """
-__version__ = '2024.07.25'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -38,6 +38,12 @@ assignmentOperatorInSettingsFile = '='
 #domainWithoutProtocolToResolveForInternetConnectivity = 'yahoo.com'
 domainWithProtocolToResolveForInternetConnectivity = 'https://yahoo.com'
 defaultTimeout = 10
+# The number of connections to the server that are kept open and reused between requests. This is increased to maxConcurrentRequests if that is higher.
+defaultConnectionPoolSize = 4
+# The number of times a request is retried if the server cannot be reached or if it reports that it is busy. Requests that time out while waiting for a translation are never retried.
+defaultMaxRetries = 3
+# Wait 0.5s, 1s, 2s... between retries.
+defaultRetryBackoffFactor = 0.5
 
 inputErrorHandling = 'strict'
 #outputErrorHandling = 'namereplace'    # This gets updated dynamically later.
@@ -50,27 +56,39 @@ usageHelp = ' Usage: python py3TranslateLLM --help  Example: py3TranslateLLM -te
 import sys                                   # End program on fail condition.
 import os, os.path                      # Extract extension from filename, and test if file exists.
 #import pathlib                            # For pathlib.Path Override file in file system with another and create subfolders. Sane path handling.
-import requests                          # Check if internet exists. # Update: Changed to socket library instead, so this is not needed anymore.
 #import socket
 #import io                                      # Manipulate files (open/read/write/close).
 import datetime                          # Used to get current date and time.
 import csv                                    # Read and write to csv files. Example: Read in 'resources/languageCodes.csv'
-import openpyxl                          # Used as the core internal data structure and to read/write xlsx files. Must be installed using pip.
+# requests and openpyxl are only needed by a few functions, so only import them when they are first used. See: resources/lazyImport.py
 try:
-    import odfpy                           #Provides interoperability for Open Document Spreadsheet (.ods).
-    odfpyLibraryIsAvailable=True
-except:
-    odfpyLibraryIsAvailable=False
-try:
-    import xlrd                              #Provides reading from Microsoft Excel Document (.xls).
-    xlrdLibraryIsAvailable=True
-except:
-    xlrdLibraryIsAvailable=False
-try:
-    import xlwt                              #Provides writing to Microsoft Excel Document (.xls).
-    xlwtLibraryIsAvailable=True
-except:
-    xlwtLibraryIsAvailable=False
+    import resources.lazyImport as lazyImport
+    requests = lazyImport.lazyImport( 'requests' )        # Check if internet exists. # Update: Changed to socket library instead, so this is not needed anymore.
+    openpyxl = lazyImport.lazyImport( 'openpyxl' )        # Used as the core internal data structure and to read/write xlsx files. Must be installed using pip.
+    odfpy = lazyImport.lazyImport( 'odfpy', optional=True ) #Provides interoperability for Open Document Spreadsheet (.ods).
+    xlrd = lazyImport.lazyImport( 'xlrd', optional=True )   #Provides reading from Microsoft Excel Document (.xls).
+    xlwt = lazyImport.lazyImport( 'xlwt', optional=True )  #Provides writing to Microsoft Excel Document (.xls).
+    odfpyLibraryIsAvailable = odfpy != None
+    xlrdLibraryIsAvailable = xlrd != None
+    xlwtLibraryIsAvailable = xlwt != None
+except ImportError:
+    import requests
+    import openpyxl
+    try:
+        import odfpy
+        odfpyLibraryIsAvailable=True
+    except:
+        odfpyLibraryIsAvailable=False
+    try:
+        import xlrd
+        xlrdLibraryIsAvailable=True
+    except:
+        xlrdLibraryIsAvailable=False
+    try:
+        import xlwt
+        xlwtLibraryIsAvailable=True
+    except:
+        xlwtLibraryIsAvailable=False
 
 #Using the 'namereplace' error handler for text encoding requires Python 3.5+, so use an older one if necessary.
 if sys.version_info.minor >= 5:
@@ -284,6 +302,31 @@ def checkIfInternetIsAvailable():
         return False
 
 
+# Returns a requests.Session that keeps the connection to the server open between requests. Reusing the connection avoids the TCP, and for https the TLS, setup for every line.
+# Used by the translation engines that connect to a server, like KoboldCpp and py3translationServer. settings is the settings dictionary of the translation engine. Only connectionPoolSize and maxRetries are read from it.
+def createSession( settings ):
+    import urllib3.util.retry     # urllib3 is always installed with requests.
+    connectionPoolSize = defaultConnectionPoolSize
+    if ( 'connectionPoolSize' in settings ) and ( isinstance( settings[ 'connectionPoolSize' ], int ) ) and ( settings[ 'connectionPoolSize' ] > connectionPoolSize ):
+        connectionPoolSize = settings[ 'connectionPoolSize' ]
+    maxRetries = defaultMaxRetries
+    if ( 'maxRetries' in settings ) and ( isinstance( settings[ 'maxRetries' ], int ) ) and ( settings[ 'maxRetries' ] >= 0 ):
+        maxRetries = settings[ 'maxRetries' ]
+
+    # read=0 means a request that was already sent is never sent again because of a timeout, since that would mean waiting for the entire timeout again.
+    # allowed_methods=None means POST is also retried. That is safe here since translating the same text twice does not change anything on the server.
+    try:
+        retryPolicy = urllib3.util.retry.Retry( total=maxRetries, connect=maxRetries, read=0, status=maxRetries, status_forcelist=[ 502, 503, 504 ], allowed_methods=None, backoff_factor=defaultRetryBackoffFactor, raise_on_status=False )
+    except TypeError:
+        # urllib3 < 1.26 calls allowed_methods method_whitelist instead.
+        retryPolicy = urllib3.util.retry.Retry( total=maxRetries, connect=maxRetries, read=0, status=maxRetries, status_forcelist=[ 502, 503, 504 ], method_whitelist=None, backoff_factor=defaultRetryBackoffFactor, raise_on_status=False )
+    adapter = requests.adapters.HTTPAdapter( pool_connections=1, pool_maxsize=connectionPoolSize, max_retries=retryPolicy )
+    session = requests.Session()
+    session.mount( 'http://', adapter )
+    session.mount( 'https://', adapter )
+    return session
+
+
 def importDictionaryFromFile( myFile, encoding=defaultTextFileEncoding ):
     if checkIfThisFileExists( myFile ) != True:
         return None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: A helper library that implements an append-only journal, also known as a write-ahead log. Every record is written to the end of a text file as a single line of JSON and flushed to disk immediately. If the program crashes, then the records can be read back on the next run and applied again.
+The idea is that appending one line to a file is very cheap while exporting an entire cache.xlsx or mainSpreadsheet is very expensive. With a journal, the expensive full export only needs to happen rarely because nothing is lost in between exports.
+
+The first line of every journal is a header that describes what the journal is for, like the file being translated and the current model. Records are only replayed if the header matches, so a journal from a different input file or model is never applied by accident.
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+# JSON escapes every non-ascii character when ensure_ascii=True, so utf-8 is only needed for the file itself if ensure_ascii=False.
+defaultJournalEncoding = 'utf-8'
+
+#These must be here or the library will crash even if these modules have already been imported by main program.
+import os, os.path                      # fsync and test if file exists.
+import sys                                   # End program on fail condition.
+import json                                 # Each record is stored as one line of JSON.
+
+
+class Journal:
+    # header should be a dictionary that uniquely identifies what this journal is for. It must be convertable to JSON.
+    def __init__( self, myFileName=None, header=None ):
+        if myFileName == None:
+            print( 'Error: Journal requires a file name.' )
+            sys.exit( 1 )
+        if header == None:
+            header = {}
+
+        self.fileName = myFileName
+        self.header = header
+        # records holds every valid record from a previous run that used the same header. It is only filled once during initialization. Use replay() to get it.
+        self.records = []
+        # The number of records that have been written but not fsync'd yet. See: append( sync=False )
+        self.pendingRecords = 0
+        # The number of records in the journal since it was last reset, including replayed records. if this is 0, then the journal file is safe to delete.
+        self.unsavedRecords = 0
+
+        if os.path.isfile( self.fileName ) == True:
+            previousHeader, previousRecords = self.readJournal()
+            if previousHeader == self.header:
+                self.records = previousRecords
+                self.unsavedRecords = len( self.records )
+            elif len( previousRecords ) > 0:
+                # The journal is from a different file or model. Do not apply it, but do not delete it either in case it is still needed.
+                print( ( 'Warning: Journal header mismatch. Moving old journal to: ' + self.fileName + '.old' ).encode( consoleEncoding ) )
+                os.replace( self.fileName, self.fileName + '.old' )
+
+        if len( self.records ) > 0:
+            # Append to the existing journal. A crash during the last write could have left a partial line at the end, so always start on a new line.
+            self.fileHandle = open( self.fileName, 'a', encoding=defaultJournalEncoding )
+            self.fileHandle.write( '\n' )
+            self.sync()
+        else:
+            self.fileHandle = open( self.fileName, 'w', encoding=defaultJournalEncoding )
+            self.writeHeader()
+
+        if debug == True:
+            print( ( 'Journal file=' + str( self.fileName ) + ' records=' + str( len( self.records ) ) ).encode( consoleEncoding ) )
+
+
+    def __len__( self ):
+        return len( self.records )
+
+
+    # Returns a tuple of the header and a list of every record. Lines that cannot be read, like a partial line from a crash, are skipped.
+    def readJournal( self ):
+        header = None
+        records = []
+        with open( self.fileName, 'r', encoding=defaultJournalEncoding, errors='replace' ) as myFileHandle:
+            for counter,line in enumerate( myFileHandle ):
+                line = line.strip()
+                if line == '':
+                    continue
+                try:
+                    record = json.loads( line )
+                except ValueError:
+                    if debug == True:
+                        print( ( 'Skipping invalid journal line: ' + str( counter ) ).encode( consoleEncoding ) )
+                    continue
+                if header == None:
+                    header = record
+                else:
+                    records.append( record )
+        return header, records
+
+
+    def writeHeader( self ):
+        self.fileHandle.write( json.dumps( self.header, ensure_ascii=False ) + '\n' )
+        self.sync()
+
+
+    # Returns every record from the previous run that used the same header, in the order they were written.
+    def replay( self ):
+        return self.records
+
+
+    # record must be convertable to JSON, like a dictionary of strings and integers.
+    # if sync == False, then the record is written but not fsync'd. Call sync() afterwards. This is useful when adding a lot of records at once, like for batches.
+    def append( self, record, sync=True ):
+        self.fileHandle.write( json.dumps( record, ensure_ascii=False ) + '\n' )
+        self.pendingRecords += 1
+        self.unsavedRecords += 1
+        if sync == True:
+            self.sync()
+
+
+    # Flush Python's internal buffer to the operating system, and then ask the operating system to flush it to disk.
+    def sync( self ):
+        self.fileHandle.flush()
+        os.fsync( self.fileHandle.fileno() )
+        self.pendingRecords = 0
+
+
+    # Call this after the data in the journal has been safely written somewhere else, like after exporting the full cache.xlsx. This removes every record but keeps the header.
+    def reset( self ):
+        self.fileHandle.close()
+        self.records = []
+        self.unsavedRecords = 0
+        self.fileHandle = open( self.fileName, 'w', encoding=defaultJournalEncoding )
+        self.writeHeader()
+
+
+    # if remove == True, then delete the journal file after closing it. Only do this after all of the data has been written out.
+    def close( self, remove=False ):
+        if self.fileHandle.closed == False:
+            self.sync()
+            self.fileHandle.close()
+        if ( remove == True ) and ( os.path.isfile( self.fileName ) == True ):
+            os.remove( self.fileName )
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources':
+
+import resources.journal as journal
+
+myJournal = journal.Journal( 'backups/myFile.xlsx.journal', header={ 'fileToTranslate': 'myFile.xlsx', 'model': 'sugoi/v4' } )
+
+# Apply records from a previous run that crashed.
+for record in myJournal.replay():
+    print( record[ 'row' ], record[ 'translation' ] )
+
+myJournal.append( { 'row': 2, 'translation': 'Hello.' } )
+
+# For a lot of records at once, only fsync once at the end.
+myJournal.append( { 'row': 3, 'translation': 'Bye.' }, sync=False )
+myJournal.append( { 'row': 4, 'translation': 'Hi.' }, sync=False )
+myJournal.sync()
+
+# After exporting everything in the journal somewhere else.
+myJournal.reset()
+
+# At the end. Only delete the journal if everything in it has been saved.
+myJournal.close( remove=( myJournal.unsavedRecords == 0 ) )
+"""
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: A helper library that reads languageCodes.csv and finds languages by name, two letter code, or three letter code. py3TranslateLLM uses it to resolve --sourceLanguage and --targetLanguage.
+
+Reading languageCodes.csv into a spreadsheet and comparing every cell with .lower() on every run is slow for what it does. Instead, every row and a lowercase search index are saved once to a .index.json file next to languageCodes.csv. After that, every run only reads that file, and every search is a single dictionary lookup.
+The index is rebuilt automatically if:
+- languageCodes.csv changes. The sha1 hash of the contents of languageCodes.csv is stored in the index.
+- The encoding used to read languageCodes.csv changes.
+- The format of the index changes. See: indexVersion
+if the index cannot be written, like if languageCodes.csv is in a read-only folder, then it is just rebuilt in memory every time.
+
+Searches work the same way as chocolate.Strawberry().searchColumnsCaseInsensitive(): Every cell is checked, one column at a time from left to right, and the first match wins. Only text is compared. The header row is included.
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+# Increase this every time the contents of the index change so that old index files are rebuilt.
+indexVersion = 1
+defaultIndexFileExtension = '.index.json'
+
+import os.path                            # Test if file exists.
+import hashlib                            # Detect changes to languageCodes.csv.
+import json                                 # The index is stored as JSON.
+
+
+class LanguageCodes:
+    # if indexFileName is None, then the index is stored next to fileName. Example: resources/languageCodes.csv -> resources/languageCodes.index.json
+    def __init__( self, fileName, fileEncoding='utf-8', indexFileName=None ):
+        self.fileName = fileName
+        self.fileEncoding = fileEncoding
+        if indexFileName == None:
+            indexFileName = os.path.splitext( fileName )[ 0 ] + defaultIndexFileExtension
+        self.indexFileName = indexFileName
+
+        # Reading and hashing the raw bytes is much faster than parsing the file.
+        with open( fileName, 'rb' ) as myFileHandle:
+            self.fileHash = hashlib.sha1( myFileHandle.read() ).hexdigest()
+
+        # rows is a list of every row in languageCodes.csv, including the header. The row number x is at index x - 1.
+        # index is a dictionary of lowercase text -> [ rowNumber, columnLetter ] for the first cell with that text.
+        self.rows = None
+        self.index = None
+        if self._readIndexFile() != True:
+            self._buildIndex()
+            self._writeIndexFile()
+
+
+    def _readIndexFile( self ):
+        if os.path.isfile( self.indexFileName ) != True:
+            return False
+        try:
+            with open( self.indexFileName, 'rt', encoding='utf-8' ) as myFileHandle:
+                indexData = json.load( myFileHandle )
+        except ( OSError, ValueError ):
+            return False
+
+        if ( indexData.get( 'indexVersion' ) != indexVersion ) or ( indexData.get( 'fileHash' ) != self.fileHash ) or ( indexData.get( 'fileEncoding' ) != self.fileEncoding ):
+            if verbose == True:
+                print( ( 'Info: ' + self.indexFileName + ' is out of date. Rebuilding it.' ).encode( consoleEncoding ) )
+            return False
+
+        self.rows = indexData[ 'rows' ]
+        self.index = indexData[ 'index' ]
+        if debug == True:
+            print( ( 'Read: ' + self.indexFileName ).encode( consoleEncoding ) )
+        return True
+
+
+    # chocolate is only imported here, so it is only needed when the index has to be rebuilt. Blueberry reads .csv files without openpyxl and converts the values the same way as before.
+    def _buildIndex( self ):
+        import resources.chocolate as chocolate
+        languageCodesSpreadsheet = chocolate.Blueberry( myFileName=self.fileName, fileEncoding=self.fileEncoding, removeWhitespaceForCSV=True )
+        self.rows = [ list( row ) for row in languageCodesSpreadsheet.iterRows() ]
+
+        self.index = {}
+        for columnIndex,column in enumerate( languageCodesSpreadsheet.columns ):
+            columnLetter = chocolate.getColumnLetter( columnIndex + 1 )
+            for rowIndex,value in enumerate( column ):
+                if isinstance( value, str ) and ( not value.lower() in self.index ):
+                    self.index[ value.lower() ] = [ rowIndex + 1, columnLetter ]
+
+
+    def _writeIndexFile( self ):
+        indexData = {
+            'indexVersion' : indexVersion,
+            'fileHash' : self.fileHash,
+            'fileEncoding' : self.fileEncoding,
+            'rows' : self.rows,
+            'index' : self.index
+        }
+        # Write to a temporary file first so a partially written index is never read.
+        temporaryFileName = self.indexFileName + '.tmp'
+        try:
+            with open( temporaryFileName, 'wt', encoding='utf-8' ) as myFileHandle:
+                json.dump( indexData, myFileHandle, ensure_ascii=False )
+            os.replace( temporaryFileName, self.indexFileName )
+        except OSError:
+            if verbose == True:
+                print( ( 'Info: Unable to write ' + self.indexFileName + ' The index will be rebuilt every time.' ).encode( consoleEncoding ) )
+            return
+        if verbose == True:
+            print( ( 'Wrote: ' + self.indexFileName ).encode( consoleEncoding ) )
+
+
+    # Returns a tuple of ( rowNumber, columnLetter ) for the first cell that matches searchTerm, ignoring case, or ( None, None ) if there is no match.
+    def search( self, searchTerm ):
+        result = self.index.get( str( searchTerm ).lower() )
+        if result == None:
+            return ( None, None )
+        return ( result[ 0 ], result[ 1 ] )
+
+
+    # Returns a copy of the row as a list. Same as chocolate.Strawberry().getRow()
+    def getRow( self, rowNumber ):
+        return list( self.rows[ int( rowNumber ) - 1 ] )
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources':
+
+import resources.languageCodes as languageCodes
+
+myLanguageCodes = languageCodes.LanguageCodes( 'resources/languageCodes.csv' )
+rowNumber, columnLetter = myLanguageCodes.search( 'japanese' )
+if rowNumber != None:
+    myLanguageCodes.getRow( rowNumber )
+    # Returns: [ 'Japanese', 'JA', 'JPN', True, False, None, None, None ]
+"""
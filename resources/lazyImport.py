@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: A helper library that imports modules only when they are first used. py3TranslateLLM uses it for the libraries that take a long time to import, like openpyxl, requests, and tqdm, so short jobs like --testRun or small .csv files do not have to wait for libraries they never use.
+
+lazyImport( 'openpyxl' ) returns a module object right away without running any of the code in the module. The module is only actually imported the first time one of its attributes is accessed, like openpyxl.Workbook. This uses importlib.util.LazyLoader from the Python standard library. Since the module is added to sys.modules, any later 'import openpyxl' statement in other libraries also gets the same lazy module instead of importing it again.
+
+How long each module took to import when it was finally used is stored in importTimes. printImportReport() prints them in the same format as: python -X importtime
+
+Limitations:
+- Modules that are already imported are returned as-is.
+- Errors in the module itself only show up when it is first used, not at the lazyImport() line.
+- The first use should happen in the main thread. Before Python 3.12, LazyLoader is not thread-safe.
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+
+import sys
+import time
+import importlib.util                # For importlib.util.LazyLoader, find_spec(), and module_from_spec().
+
+# The time this library was imported. py3TranslateLLM imports it before any other library, so this is close to when the program started.
+startTime = time.perf_counter()
+# moduleName -> the number of seconds it took to import that module, for every module returned by lazyImport() that was actually used.
+importTimes = {}
+# Every module that lazyImport() returned without importing it, in order.
+lazyModuleNames = []
+
+
+# LazyLoader calls exec_module() of this loader when the module is first used, so this is the only place that knows when the import actually happens.
+# Everything else, like is_package() or get_resource_reader(), is passed on to the original loader.
+class _TimedLoader:
+    def __init__( self, loader, moduleName ):
+        self.loader = loader
+        self.moduleName = moduleName
+
+
+    def __getattr__( self, name ):
+        return getattr( self.loader, name )
+
+
+    def create_module( self, spec ):
+        return self.loader.create_module( spec )
+
+
+    def exec_module( self, module ):
+        moduleStartTime = time.perf_counter()
+        self.loader.exec_module( module )
+        importTimes[ self.moduleName ] = time.perf_counter() - moduleStartTime
+        if debug == True:
+            print( ( 'Imported ' + self.moduleName + ' in ' + str( round( importTimes[ self.moduleName ], 3 ) ) + ' seconds.' ).encode( consoleEncoding ) )
+
+
+# Returns the module named moduleName without importing it yet.
+# if the module is not installed, then raise ImportError like the import statement would, or return None if optional == True. Use optional=True for libraries that only add extra features, like tqdm.
+def lazyImport( moduleName, optional=False ):
+    if moduleName in sys.modules:
+        return sys.modules[ moduleName ]
+
+    try:
+        spec = importlib.util.find_spec( moduleName )
+    except ( ImportError, ValueError ):
+        spec = None
+    if spec == None:
+        if optional == True:
+            return None
+        raise ImportError( 'No module named \'' + moduleName + '\'', name=moduleName )
+
+    spec.loader = importlib.util.LazyLoader( _TimedLoader( spec.loader, moduleName ) )
+    module = importlib.util.module_from_spec( spec )
+    sys.modules[ moduleName ] = module
+    spec.loader.exec_module( module )
+    lazyModuleNames.append( moduleName )
+    return module
+
+
+# Prints how long every module returned by lazyImport() took to import, slowest first, and how long it has been since this library was imported. Modules that were never used are listed too, since not importing them is the point.
+def printImportReport():
+    print( 'import time: seconds | module' )
+    for moduleName,importTime in sorted( importTimes.items(), key=lambda item : item[ 1 ], reverse=True ):
+        print( ( 'import time: ' + format( importTime, '.3f' ) + ' | ' + moduleName ).encode( consoleEncoding ) )
+    for moduleName in lazyModuleNames:
+        if not moduleName in importTimes:
+            print( ( 'import time: unused | ' + moduleName ).encode( consoleEncoding ) )
+    print( 'Startup took ' + format( time.perf_counter() - startTime, '.3f' ) + ' seconds.' )
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources':
+
+import resources.lazyImport as lazyImport
+
+openpyxl = lazyImport.lazyImport( 'openpyxl' )  # Nothing is imported yet.
+tqdm = lazyImport.lazyImport( 'tqdm', optional=True )
+if tqdm == None:
+    print( 'tqdm is not installed.' )
+
+workbook = openpyxl.Workbook()  # openpyxl is imported here.
+lazyImport.printImportReport()
+"""
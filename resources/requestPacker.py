@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: A helper library that splits a batch into requests by size instead of by the number of entries. py3TranslateLLM uses it for --maxCharactersPerRequest and --maxTokensPerRequest.
+
+How long a translation engine takes to process a request, and whether the server accepts it at all, depends on how much text is in it, not on how many entries it has. 1000 long lines of narration can be too large for the server while 1000 short interjections barely use it. Instead, entries are packed into requests in order, and a new request is started whenever adding the next entry would go over the character or token budget. The requests then all have about the same amount of text.
+Entries that are larger than the budget by themselves are still sent, alone in their own request, since they cannot be split.
+
+Tokens are counted by a tokenizer. The available tokenizers are:
+- bytes: The number of bytes in UTF-8. This is the default. Most tokenizers never produce more tokens than bytes, so this is a safe upper limit that does not need any extra libraries.
+- words: The number of words separated by whitespace. Not useful for Chinese and Japanese.
+- sentencepiece:<file.model> The sentencepiece model used by the server, like the spm models of Sugoi/fairseq and CTranslate2. Requires: pip install sentencepiece
+- tiktoken:<encoding> Like tiktoken:cl100k_base. Requires: pip install tiktoken
+Other tokenizers can be added with registerTokenizer().
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+defaultTokenizer = 'bytes'
+
+
+# name -> function that takes a string and returns the number of tokens in it.
+tokenizerDictionary = {
+    'bytes' : lambda string : len( string.encode( 'utf-8' ) ),
+    'words' : lambda string : len( string.split() ),
+}
+# name -> function that takes the part after the : and returns a function like the ones in tokenizerDictionary. Used for tokenizers that need a file or a name, like sentencepiece:spm.ja.nopretok.model
+tokenizerLoaderDictionary = {}
+availableTokenizers = 'bytes, words, sentencepiece:<file.model>, tiktoken:<encoding>'
+
+
+def registerTokenizer( name, countTokensFunction ):
+    tokenizerDictionary[ name ] = countTokensFunction
+
+
+def registerTokenizerLoader( name, loaderFunction ):
+    tokenizerLoaderDictionary[ name ] = loaderFunction
+
+
+# The libraries for these tokenizers are only imported if they are used.
+def _loadSentencePiece( modelFileName ):
+    import sentencepiece
+    processor = sentencepiece.SentencePieceProcessor( model_file=modelFileName )
+    return lambda string : len( processor.encode( string ) )
+
+
+def _loadTikToken( encodingName ):
+    import tiktoken
+    encoding = tiktoken.get_encoding( encodingName )
+    return lambda string : len( encoding.encode( string, disallowed_special=() ) )
+
+
+registerTokenizerLoader( 'sentencepiece', _loadSentencePiece )
+registerTokenizerLoader( 'tiktoken', _loadTikToken )
+
+
+# Returns a function that takes a string and returns the number of tokens in it.
+# Raises ValueError if tokenizerName is not a known tokenizer, or ImportError if the library for it is not installed.
+def getTokenizer( tokenizerName=None ):
+    if tokenizerName == None:
+        tokenizerName = defaultTokenizer
+    if tokenizerName in tokenizerDictionary:
+        return tokenizerDictionary[ tokenizerName ]
+
+    loaderName, separator, argument = tokenizerName.partition( ':' )
+    if ( separator == '' ) or ( not loaderName in tokenizerLoaderDictionary ):
+        raise ValueError( 'Unknown tokenizer \'' + str( tokenizerName ) + '\'. Valid tokenizers: ' + availableTokenizers )
+    countTokensFunction = tokenizerLoaderDictionary[ loaderName ]( argument )
+    # Only load each model once.
+    tokenizerDictionary[ tokenizerName ] = countTokensFunction
+    return countTokensFunction
+
+
+# Returns a list of ( startIndex, endIndex ) tuples, one for every request, so that entryList[ startIndex : endIndex ] is the content of that request. Together, they cover every entry of entryList in order.
+# 0 means no limit for maxCharacters, maxTokens, and maxEntries. countTokens is only needed if maxTokens > 0.
+def packRequests( entryList, maxCharacters=0, maxTokens=0, countTokens=None, maxEntries=0 ):
+    if ( maxTokens > 0 ) and ( countTokens == None ):
+        countTokens = getTokenizer()
+
+    requestRangeList = []
+    startIndex = 0
+    characterCount = 0
+    tokenCount = 0
+    for index,entry in enumerate( entryList ):
+        entry = str( entry )
+        entryCharacters = len( entry )
+        if maxTokens > 0:
+            entryTokens = countTokens( entry )
+        else:
+            entryTokens = 0
+
+        # Start a new request if this entry does not fit into the current one. The current request must have at least one entry.
+        if index > startIndex:
+            if ( ( maxCharacters > 0 ) and ( characterCount + entryCharacters > maxCharacters ) ) or ( ( maxTokens > 0 ) and ( tokenCount + entryTokens > maxTokens ) ) or ( ( maxEntries > 0 ) and ( index - startIndex >= maxEntries ) ):
+                requestRangeList.append( ( startIndex, index ) )
+                startIndex = index
+                characterCount = 0
+                tokenCount = 0
+
+        characterCount += entryCharacters
+        tokenCount += entryTokens
+
+    if startIndex < len( entryList ):
+        requestRangeList.append( ( startIndex, len( entryList ) ) )
+
+    if debug == True:
+        print( ( 'packRequests entries=' + str( len( entryList ) ) + ' requests=' + str( len( requestRangeList ) ) + ' sizes=' + str( [ endIndex - startIndex for startIndex,endIndex in requestRangeList ] ) ).encode( consoleEncoding ) )
+    return requestRangeList
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources':
+
+import resources.requestPacker as requestPacker
+
+requestPacker.packRequests( [ 'a' * 30, 'b' * 30, 'c' * 30, 'd' * 100, 'e' ], maxCharacters=64 )
+# Returns: [ ( 0, 2 ), ( 2, 3 ), ( 3, 4 ), ( 4, 5 ) ]
+
+countTokens = requestPacker.getTokenizer( 'sentencepiece:C:/Sugoi/fairseq/spmModels/spm.ja.nopretok.model' )
+requestPacker.packRequests( myList, maxTokens=4096, countTokens=countTokens )
+
+# Custom tokenizers.
+requestPacker.registerTokenizer( 'characters', len )
+requestPacker.getTokenizer( 'characters' )( 'hello' )
+# Returns: 5
+"""
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: A helper library that stores the translation cache in an SQLite database instead of cache.xlsx. Uses the sqlite3 library that is included with Python.
+chocolate.Strawberry() keeps all of cache.xlsx in memory as an openpyxl workbook and must write out the entire workbook every time the cache is saved. That does not scale well for caches with millions of entries. SQLite only reads the entries that are needed and writes each change incrementally, so memory usage and save times stay small regardless of the size of the cache.
+
+Each entry is keyed on ( languagePair, rawText, model ). languagePair is the same as the sheet name used in cache.xlsx, like jpn_eng. model is the same as the column header used in cache.xlsx, like the value of translationEngine.model.
+There is also an import/export bridge to the cache.xlsx layout via chocolate.Strawberry() so existing caches can be converted back and forth.
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+
+# WAL mode allows reading from the database while it is being written to and makes each commit an append to the -wal file instead of a rewrite of the database.
+# synchronous=NORMAL in WAL mode means commits are not fsync'd individually. The database will never be corrupted by a crash, but the last few commits might be lost if the operating system crashes or loses power.
+defaultJournalMode = 'WAL'
+defaultSynchronousMode = 'NORMAL'
+# The header used for the first column when exporting to the cache.xlsx layout. Must match the main program.
+defaultRawTextHeader = 'rawText'
+
+#These must be here or the library will crash even if these modules have already been imported by main program.
+import os.path                            # Test if file exists.
+import sys                                   # End program on fail condition.
+import pathlib                              # Escape the path of the database when opening it as a file: uri.
+import sqlite3                             # The database itself. Included with Python.
+
+
+class SQLiteCache:
+    def __init__( self, myFileName=None, languagePair=None, readOnlyMode=False ):
+        if ( myFileName == None ) or ( languagePair == None ):
+            print( 'Error: SQLiteCache requires both a file name and a languagePair.' )
+            sys.exit( 1 )
+
+        self.fileName = myFileName
+        self.languagePair = languagePair
+        self.readOnlyMode = readOnlyMode
+        # This is True if the database file did not exist prior to instantiating this class. The main program uses this to decide if an existing cache.xlsx should be imported.
+        self.isNew = not os.path.isfile( self.fileName )
+        # The number of changes that have not been committed yet.
+        self.pendingChanges = 0
+
+        if self.readOnlyMode == True:
+            if self.isNew == True:
+                print( ( 'Error: Unable to open cache in read only mode because the file does not exist: ' + str( self.fileName ) ).encode( consoleEncoding ) )
+                sys.exit( 1 )
+            # https://docs.python.org/3.7/library/sqlite3.html#sqlite3.connect
+            # The file: uri syntax is needed to open the database as read only. as_uri() escapes characters like # and ? that would otherwise end the path early.
+            self.connection = sqlite3.connect( pathlib.Path( self.fileName ).resolve().as_uri() + '?mode=ro', uri=True )
+        else:
+            print( ( 'Reading from: ' + self.fileName ).encode( consoleEncoding ) )
+            self.connection = sqlite3.connect( self.fileName )
+            self.connection.execute( 'PRAGMA journal_mode=' + defaultJournalMode )
+            self.connection.execute( 'PRAGMA synchronous=' + defaultSynchronousMode )
+            # WITHOUT ROWID stores each row inside the primary key index, so looking up ( languagePair, rawText, model ) only needs to search one b-tree.
+            self.connection.execute( 'CREATE TABLE IF NOT EXISTS cache ( languagePair TEXT NOT NULL, rawText TEXT NOT NULL, model TEXT NOT NULL, translation TEXT, PRIMARY KEY ( languagePair, rawText, model ) ) WITHOUT ROWID' )
+            # The models table remembers the order that each model was added. This is the same as the column order in cache.xlsx and is used to favor the most recently added model when using cacheAnyMatch.
+            self.connection.execute( 'CREATE TABLE IF NOT EXISTS models ( id INTEGER PRIMARY KEY AUTOINCREMENT, languagePair TEXT NOT NULL, model TEXT NOT NULL, UNIQUE ( languagePair, model ) )' )
+            self.connection.commit()
+
+        if debug == True:
+            print( ( 'SQLiteCache file=' + str( self.fileName ) + ' languagePair=' + str( self.languagePair ) + ' entries=' + str( self.getLength() ) ).encode( consoleEncoding ) )
+
+
+    def __str__( self ):
+        return str( self.getModels() )
+
+
+    # Adds a model to the list of known models if it is not already present. This is the same as adding a column header in cache.xlsx.
+    def addModel( self, model ):
+        if self.readOnlyMode == True:
+            return
+        self.connection.execute( 'INSERT OR IGNORE INTO models ( languagePair, model ) VALUES ( ?, ? )', ( self.languagePair, model ) )
+        self.pendingChanges += 1
+
+
+    # Returns a list of every model for the current languagePair in the order they were added. This is the same as the header row in cache.xlsx minus rawText.
+    def getModels( self ):
+        tempList = []
+        for row in self.connection.execute( 'SELECT model FROM models WHERE languagePair = ? ORDER BY id', ( self.languagePair, ) ):
+            tempList.append( row[ 0 ] )
+        return tempList
+
+
+    # Returns the number of unique untranslated entries for the current languagePair.
+    def getLength( self ):
+        return self.connection.execute( 'SELECT COUNT( DISTINCT rawText ) FROM cache WHERE languagePair = ?', ( self.languagePair, ) ).fetchone()[ 0 ]
+
+
+    # Returns the translation as a string or None if it was not found.
+    # if anyMatch == True and there is no translation for the current model, then return the translation from the most recently added model that has one, excluding any models in excludeModels. This mirrors cacheAnyMatch for cache.xlsx where the right-most column takes priority.
+    def getTranslation( self, rawText, model, anyMatch=False, excludeModels=None ):
+        if ( rawText == None ) or ( str( rawText ).strip() == '' ):
+            return None
+        rawText = str( rawText )
+
+        row = self.connection.execute( 'SELECT translation FROM cache WHERE languagePair = ? AND rawText = ? AND model = ?', ( self.languagePair, rawText, model ) ).fetchone()
+        if ( row != None ) and ( row[ 0 ] != None ):
+            return row[ 0 ]
+        if anyMatch != True:
+            return None
+
+        translation = None
+        for row in self.connection.execute( 'SELECT cache.model, cache.translation FROM cache LEFT JOIN models ON cache.languagePair = models.languagePair AND cache.model = models.model WHERE cache.languagePair = ? AND cache.rawText = ? AND cache.translation IS NOT NULL ORDER BY models.id', ( self.languagePair, rawText ) ):
+            if row[ 0 ] == model:
+                continue
+            if ( excludeModels != None ) and ( str( row[ 0 ] ).lower() in excludeModels ):
+                continue
+            # Keep updating translation to favor the most recently added model.
+            translation = row[ 1 ]
+        return translation
+
+
+    # Adds or updates the translation for rawText and model. Returns True if the database was changed and False otherwise.
+    # if there is already a translation present, then it will only be replaced if overwrite == True. This mirrors how updateCache() treats existing cells in cache.xlsx.
+    def setTranslation( self, rawText, model, translation, overwrite=False ):
+        if self.readOnlyMode == True:
+            return False
+        if ( rawText == None ) or ( str( rawText ).strip() == '' ):
+            print( 'Warning: Cannot use setTranslation to add rawText=None or empty string.' )
+            return False
+        rawText = str( rawText )
+
+        existingTranslation = self.connection.execute( 'SELECT translation FROM cache WHERE languagePair = ? AND rawText = ? AND model = ?', ( self.languagePair, rawText, model ) ).fetchone()
+        if existingTranslation == None:
+            self.connection.execute( 'INSERT INTO cache ( languagePair, rawText, model, translation ) VALUES ( ?, ?, ?, ? )', ( self.languagePair, rawText, model, translation ) )
+        elif existingTranslation[ 0 ] == None:
+            self.connection.execute( 'UPDATE cache SET translation = ? WHERE languagePair = ? AND rawText = ? AND model = ?', ( translation, self.languagePair, rawText, model ) )
+        elif ( overwrite == True ) and ( existingTranslation[ 0 ] != translation ):
+            self.connection.execute( 'UPDATE cache SET translation = ? WHERE languagePair = ? AND rawText = ? AND model = ?', ( translation, self.languagePair, rawText, model ) )
+        else:
+            return False
+
+        self.pendingChanges += 1
+        return True
+
+
+    # Writes any pending changes to disk. This only writes the changes themselves, not the entire database, so it is cheap to call often.
+    def commit( self ):
+        if ( self.readOnlyMode == True ) or ( self.pendingChanges == 0 ):
+            return
+        self.connection.commit()
+        if debug == True:
+            print( 'SQLiteCache committed ' + str( self.pendingChanges ) + ' changes.' )
+        self.pendingChanges = 0
+
+
+    def close( self ):
+        self.commit()
+        self.connection.close()
+
+
+    # Imports every entry from a chocolate.Strawberry() that uses the cache.xlsx layout: rawText in column A and one column per model with the model as the header.
+    # Existing translations in the database are not overwritten. Returns the number of translations imported.
+    def importFromStrawberry( self, strawberry, blacklistedHeaders=None ):
+        if self.readOnlyMode == True:
+            return 0
+
+        headers = strawberry.getRow( 1 )
+        modelsList = []
+        for counter,header in enumerate( headers ):
+            # Skip rawText.
+            if counter == 0:
+                continue
+            if ( header == None ) or ( ( blacklistedHeaders != None ) and ( str( header ).lower() in blacklistedHeaders ) ):
+                modelsList.append( None )
+                continue
+            self.addModel( str( header ) )
+            modelsList.append( str( header ) )
+
+        importedCounter = 0
+        for rowCounter,row in enumerate( strawberry.iterRows() ):
+            # Skip header.
+            if rowCounter == 0:
+                continue
+            rawText = row[ 0 ]
+            if ( rawText == None ) or ( str( rawText ).strip() == '' ):
+                continue
+            for columnCounter,translation in enumerate( row[ 1 : ] ):
+                if ( columnCounter >= len( modelsList ) ) or ( modelsList[ columnCounter ] == None ) or ( translation == None ):
+                    continue
+                if self.setTranslation( rawText, modelsList[ columnCounter ], str( translation ) ) == True:
+                    importedCounter += 1
+
+        self.commit()
+        if verbose == True:
+            print( 'Imported ' + str( importedCounter ) + ' translations into SQLiteCache.' )
+        return importedCounter
+
+
+    # Appends every entry for the current languagePair to an empty chocolate.Strawberry() using the cache.xlsx layout. Use strawberry.export( 'cache.xlsx' ) afterwards to write it to disk.
+    def exportToStrawberry( self, strawberry ):
+        modelsList = self.getModels()
+        # Models that have translations but were never added to the models table still need a column.
+        for row in self.connection.execute( 'SELECT DISTINCT model FROM cache WHERE languagePair = ?', ( self.languagePair, ) ):
+            if not row[ 0 ] in modelsList:
+                modelsList.append( row[ 0 ] )
+        modelColumnIndex = {}
+        for counter,model in enumerate( modelsList ):
+            modelColumnIndex[ model ] = counter + 1
+
+        strawberry.appendRow( [ defaultRawTextHeader ] + modelsList )
+
+        currentRawText = None
+        currentRow = None
+        # ORDER BY rawText groups every model for a given rawText together so each row only needs to be built once.
+        for rawText,model,translation in self.connection.execute( 'SELECT rawText, model, translation FROM cache WHERE languagePair = ? ORDER BY rawText', ( self.languagePair, ) ):
+            if rawText != currentRawText:
+                if currentRow != None:
+                    strawberry.appendRow( currentRow )
+                currentRawText = rawText
+                currentRow = [ rawText ] + [ None ] * len( modelsList )
+            currentRow[ modelColumnIndex[ model ] ] = translation
+        if currentRow != None:
+            strawberry.appendRow( currentRow )
+
+        return strawberry
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources':
+
+import resources.sqliteCache as sqliteCache
+import resources.chocolate as chocolate
+
+cache = sqliteCache.SQLiteCache( 'backups/cache.sqlite', languagePair='jpn_eng' )
+cache.addModel( 'sugoi/v4' )
+cache.setTranslation( 'こんにちは', 'sugoi/v4', 'Hello.' )
+cache.getTranslation( 'こんにちは', 'sugoi/v4' )
+cache.getTranslation( 'こんにちは', 'someOtherModel', anyMatch=True )
+cache.commit()
+
+# Convert cache.xlsx to cache.sqlite.
+oldCache = chocolate.Strawberry( 'backups/cache.xlsx', spreadsheetNameInWorkbook='jpn_eng' )
+cache.importFromStrawberry( oldCache )
+
+# Convert cache.sqlite to cache.xlsx.
+newCache = chocolate.Strawberry( spreadsheetNameInWorkbook='jpn_eng' )
+cache.exportToStrawberry( newCache )
+newCache.export( 'backups/cache.exported.xlsx' )
+
+cache.close()
+"""
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: This library picks the number of lines to send to a translation engine in each request. Batches that are too large take longer than the timeout on slow servers like NMTs running on the CPU. Batches that are too small waste the throughput of fast servers like NMTs running on a GPU. Instead of tuning --batchSizeLimit by hand for every server, BatchSizeTuner measures how long every request takes and how many lines per second it translated, and adjusts the batch size for the next request.
+
+The batch size is adjusted using additive increase/multiplicative decrease (AIMD), the same idea TCP uses to find the speed of a network connection:
+- Slow start: At the start, the batch size is doubled after every request that finished within targetLatency, so a good size is found quickly.
+- Additive increase: After slow start ends, the batch size only grows by increaseStep lines after every request that finished within targetLatency.
+- Multiplicative decrease: if a request took longer than targetLatency, timed out, or failed, the batch size is cut in half. This also ends slow start.
+- Slow start also ends if doubling the batch size did not increase lines per second by at least minimumSpeedup. The server is then already busy and larger batches only add latency.
+The batch size always stays within minimumSize and maximumSize.
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+defaultInitialSize = 16
+defaultIncreaseStep = 8
+# 1.1 means lines per second must improve by at least 10% after doubling the batch size to keep doubling it.
+defaultMinimumSpeedup = 1.1
+
+import threading                 # The same BatchSizeTuner is used by every thread submitting batches to the same server.
+
+
+class BatchSizeTuner:
+    # name is printed in front of every message, like the address of the server.
+    def __init__( self, minimumSize=1, maximumSize=1000, targetLatency=30, initialSize=None, increaseStep=defaultIncreaseStep, name='' ):
+        if minimumSize < 1:
+            minimumSize = 1
+        if maximumSize < minimumSize:
+            maximumSize = minimumSize
+        if initialSize == None:
+            initialSize = defaultInitialSize
+        self.minimumSize = minimumSize
+        self.maximumSize = maximumSize
+        self.targetLatency = targetLatency
+        self.increaseStep = increaseStep
+        self.name = name
+
+        self.batchSize = min( max( initialSize, minimumSize ), maximumSize )
+        self.slowStart = True
+        # The lines per second of the last request that finished within targetLatency. Used to end slow start.
+        self.lastLinesPerSecond = None
+
+        self._lock = threading.Lock()
+        self._statistics = { 'requests' : 0, 'lines' : 0, 'seconds' : 0.0, 'increases' : 0, 'decreases' : 0, 'failures' : 0 }
+
+
+    def getBatchSize( self ):
+        return self.batchSize
+
+
+    def _setBatchSize( self, newBatchSize, reason ):
+        newBatchSize = min( max( newBatchSize, self.minimumSize ), self.maximumSize )
+        if newBatchSize == self.batchSize:
+            return
+        if newBatchSize > self.batchSize:
+            self._statistics[ 'increases' ] += 1
+        else:
+            self._statistics[ 'decreases' ] += 1
+        if verbose == True:
+            print( ( self.name + 'Info: Batch size ' + str( self.batchSize ) + ' -> ' + str( newBatchSize ) + ' (' + reason + ')' ).encode( consoleEncoding ) )
+        self.batchSize = newBatchSize
+
+
+    # Call this after every request that returned translations. lineCount is the number of lines in that request, not the current batch size, since the last batch of a list is usually smaller.
+    def recordSuccess( self, lineCount, seconds ):
+        with self._lock:
+            self._statistics[ 'requests' ] += 1
+            self._statistics[ 'lines' ] += lineCount
+            self._statistics[ 'seconds' ] += seconds
+            linesPerSecond = lineCount / max( seconds, 0.001 )
+            if debug == True:
+                print( ( self.name + 'lines=' + str( lineCount ) + ' seconds=' + str( round( seconds, 3 ) ) + ' linesPerSecond=' + str( round( linesPerSecond, 1 ) ) ).encode( consoleEncoding ) )
+
+            if seconds > self.targetLatency:
+                self.slowStart = False
+                self.lastLinesPerSecond = None
+                self._setBatchSize( self.batchSize // 2, 'took ' + str( round( seconds, 1 ) ) + 's, more than ' + str( self.targetLatency ) + 's' )
+                return
+
+            # Small requests at the end of a list say nothing about whether the current batch size is too small.
+            if lineCount < self.batchSize:
+                return
+
+            if self.slowStart == True:
+                if ( self.lastLinesPerSecond != None ) and ( linesPerSecond < self.lastLinesPerSecond * defaultMinimumSpeedup ):
+                    self.slowStart = False
+                    if verbose == True:
+                        print( ( self.name + 'Info: Larger batches are no longer faster at ' + str( round( linesPerSecond, 1 ) ) + ' lines/s. Growing the batch size slowly from now on.' ).encode( consoleEncoding ) )
+                else:
+                    self.lastLinesPerSecond = linesPerSecond
+                    self._setBatchSize( self.batchSize * 2, str( round( linesPerSecond, 1 ) ) + ' lines/s' )
+                    return
+            self.lastLinesPerSecond = linesPerSecond
+            self._setBatchSize( self.batchSize + self.increaseStep, str( round( linesPerSecond, 1 ) ) + ' lines/s' )
+
+
+    # Call this after a request timed out or failed. Returns True if the batch size was reduced, so the lines can be sent again as smaller batches, or False if the batch size was already minimumSize.
+    def recordFailure( self, lineCount ):
+        with self._lock:
+            self._statistics[ 'failures' ] += 1
+            self.slowStart = False
+            self.lastLinesPerSecond = None
+            if min( lineCount, self.batchSize ) <= self.minimumSize:
+                return False
+            self._setBatchSize( min( lineCount, self.batchSize ) // 2, 'request failed' )
+            return True
+
+
+    def printStatistics( self ):
+        if self._statistics[ 'requests' ] == 0:
+            return
+        if self._statistics[ 'seconds' ] > 0:
+            linesPerSecond = round( self._statistics[ 'lines' ] / self._statistics[ 'seconds' ], 1 )
+        else:
+            linesPerSecond = 0
+        print( ( self.name + 'Adaptive batch size: final=' + str( self.batchSize ) + ' range=' + str( self.minimumSize ) + '-' + str( self.maximumSize ) + ' requests=' + str( self._statistics[ 'requests' ] ) + ' lines=' + str( self._statistics[ 'lines' ] ) + ' linesPerSecond=' + str( linesPerSecond ) + ' increases=' + str( self._statistics[ 'increases' ] ) + ' decreases=' + str( self._statistics[ 'decreases' ] ) + ' failures=' + str( self._statistics[ 'failures' ] ) ).encode( consoleEncoding ) )
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources/translationEngines':
+
+import time
+import resources.translationEngines.batchSizeTuner as batchSizeTuner
+
+tuner = batchSizeTuner.BatchSizeTuner( minimumSize=1, maximumSize=1000, targetLatency=30 )
+while len( untranslatedList ) > 0:
+    batch = untranslatedList[ : tuner.getBatchSize() ]
+    startTime = time.perf_counter()
+    try:
+        translatedList.extend( myServer.translate( batch ) )
+    except TimeoutError:
+        if tuner.recordFailure( len( batch ) ) == False:
+            raise
+        continue
+    tuner.recordSuccess( len( batch ), time.perf_counter() - startTime )
+    untranslatedList = untranslatedList[ len( batch ) : ]
+tuner.printStatistics()
+"""
@@ -47,7 +47,7 @@ UniDic-lite - MIT/WTFPL - https://github.com/polm/unidic-lite/blob/master/LICENS
 "Unidic 2.1.2 is copyright the UniDic Consortium and distributed under the terms of the BSD license."
 UniDic 2.1.2 - BSD - https://github.com/polm/unidic-lite/blob/master/LICENSE.unidic
 """
-__version__ = '2024.08.13'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -63,6 +63,7 @@ defaultRomajiFormat = 'hepburn'
 punctuationList = [ '。', '「', '」', '、', '…', '？', '♪']
 
 import sys
+import resources.translationEngines.processPool as processPool # Translates large batches in several processes at the same time.
 
 
 class CutletEngine:
@@ -123,6 +124,7 @@ class CutletEngine:
         self.requiresPrompt = False
         self.promptOptional = False
         self.supportsCreatingSummary = False
+        self.supportsConcurrentBatches = False
 
         # Set generic API variables for this engine.
         self.model = None
@@ -159,7 +161,7 @@ class CutletEngine:
         self.version = None
         print( 'Importing cutlet... ', end='' )
         try:
-            import cutlet
+            import cutlet # Only checks if cutlet is installed. See: createConverter()
             try:
                 from importlib import metadata as importlib_metadata
             except ImportError:
@@ -170,12 +172,14 @@ class CutletEngine:
             except ImportError:
                 import unidic_lite as unidic
             self.model = 'cutlet/' + unidic.VERSION + '/' + self.romajiFormat # cutlet/unidic-3.1.0+2021-08-31/hepburn, cutlet/2.1.2/kunrei
-            self.converter = cutlet.Cutlet( self.romajiFormat )
-            print( 'Success.')
+            self.useForeignSpelling = None
             if 'use_foreign_spelling' in settings:
                 if isinstance( settings[ 'use_foreign_spelling' ], bool ):
-                    self.converter.use_foreign_spelling = settings[ 'use_foreign_spelling' ]
-                    print( 'self.converter.use_foreign_spelling=', self.converter.use_foreign_spelling )
+                    self.useForeignSpelling = settings[ 'use_foreign_spelling' ]
+            self.createConverter()
+            print( 'Success.')
+            if self.useForeignSpelling != None:
+                print( 'self.converter.use_foreign_spelling=', self.converter.use_foreign_spelling )
 
         #except requests.exceptions.ConnectTimeout:
         except ImportError:
@@ -185,6 +189,32 @@ class CutletEngine:
         if self.model != None:
             self.reachable = True
 
+        # if processes is more than 1, then large batches are translated by that many processes at the same time. 0 means one process per CPU core.
+        self.processPool = None
+        if ( 'processes' in settings ) and ( isinstance( settings[ 'processes' ], int ) ) and ( settings[ 'processes' ] != 1 ) and ( self.reachable == True ):
+            self.processPool = processPool.EngineProcessPool( self, processes=settings[ 'processes' ] )
+
+
+    # Creates self.converter for the current romajiFormat. Every worker process of self.processPool calls this once when it starts. Loading unidic takes a while, so this should only happen once per process.
+    def createConverter( self ):
+        import cutlet
+        self.converter = cutlet.Cutlet( self.romajiFormat )
+        if self.useForeignSpelling != None:
+            self.converter.use_foreign_spelling = self.useForeignSpelling
+
+
+    # The converter cannot be copied to the worker processes, so each one creates its own. See: createConverter()
+    def __getstate__( self ):
+        state = self.__dict__.copy()
+        state.pop( 'converter', None )
+        state.pop( 'processPool', None )
+        return state
+
+
+    def close( self ):
+        if self.processPool != None:
+            self.processPool.close()
+
 
     # This expects a python list where every entry is a string.
     def batchTranslate( self, untranslatedList, settings=None ):
@@ -193,10 +223,13 @@ class CutletEngine:
             print( 'len(untranslatedList)=' , len( untranslatedList ) )
             print( ( 'untranslatedList=' + str( untranslatedList ) ).encode( consoleEncoding ) )
 
-        translatedList = []
-        for entry in untranslatedList:
-            # Lazy.
-            translatedList.append( self.translate( entry ) )
+        if ( self.processPool != None ) and ( self.processPool.shouldUse( untranslatedList ) == True ):
+            translatedList = self.processPool.batchTranslate( untranslatedList )
+        else:
+            translatedList = []
+            for entry in untranslatedList:
+                # Lazy.
+                translatedList.append( self.translate( entry ) )
 
         try:
             assert( len( untranslatedList ) == len( translatedList ) )
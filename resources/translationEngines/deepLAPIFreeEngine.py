@@ -8,7 +8,7 @@ Usage: See below. Like at the bottom.
 Copyright (c) 2024 gdiaz384; License: See main program.
 
 """
-__version__ = '2024.07.14'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -74,6 +74,7 @@ class DeepLApiFreeEngine:
         self.requiresPrompt = False
         self.promptOptional = True
         self.supportsCreatingSummary = False
+        self.supportsConcurrentBatches = False
 
         # Set generic API variables for this engine.
         self.model = None
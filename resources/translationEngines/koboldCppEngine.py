@@ -8,7 +8,7 @@ Usage: See below. Like at the bottom.
 Copyright (c) 2024 gdiaz384; License: See main program.
 
 """
-__version__ = '2024.08.01'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -23,6 +23,8 @@ defaultTimeoutMulitplierForSceneSummary = 2
 # Valid options are: autocomplete, instruct, chat.
 defaultInstructionFormat = 'autocomplete'
 defaultTargetLanguageIsHalfWidth = True
+# if True, the start of every prompt stays the same and only the history and the current line are added to the end. KoboldCpp only processes the part of the prompt that changed since the last request, so this saves a lot of prompt processing time.
+defaultStablePrompt = False
 
 # Sometimes, the translation is returned prepended or appended with certain data that must be removed. If these strings appear at the start or end, then remove them during post processing.
 blacklistedStarts = []
@@ -62,6 +64,13 @@ stopSequenceList = [
 stopSequenceList2 = stopSequenceList.copy()
 stopSequenceList2.remove( '\n' )
 
+# For batches, the maximum number of lines to send in a single request. Larger values are faster but make it more likely the LLM will skip or merge lines.
+defaultBatchLinesPerRequest = 10
+# For batches, the number of tokens to generate for every line in the request.
+defaultBatchMaxLengthPerLine = 100
+# For batches, this is inserted before the numbered lines.
+batchInstruction = 'Translate every numbered line. Keep the same numbers and write exactly one line of output for each number.'
+
 stopSequenceListForSceneSummary = [
 '[',
 ]
@@ -149,9 +158,15 @@ for counter,entry in enumerate( llama3_1InstructModels ):
 
 
 #import sys                  # Default import.
-import requests          # Required to do the thing.
+import os.path                # commonprefix() is used to measure how much of the prompt is the same as the previous one.
+import re                       # Used to parse the numbered output of batches.
+import threading              # The prompt statistics are shared by every thread submitting requests. See: maxConcurrentRequests
+import resources.functions as functions # For createSession().
 import unicodedata     # Used to normalize output, convert full width characters to half width, during post processing. 
 
+# Matches the numbered output of batches like: '1. Hello.', '2) Hello.', '3: Hello.'
+numberedLinePattern = re.compile( r'^\s*(\d+)\s*[\.\):：]\s*(.*)$' )
+
 
 class KoboldCppEngine:
     # Insert any custom code to pre process the untranslated text here. This is very model, prompt, and dataset specific.
@@ -318,11 +333,13 @@ class KoboldCppEngine:
     def __init__( self, sourceLanguage=None, targetLanguage=None, characterDictionary=None, settings={} ):
 
         # Set generic API static values for this engine.
-        self.supportsBatches = False
+        self.supportsBatches = True
         self.supportsHistory = True
         self.requiresPrompt = True
         self.promptOptional = False
         self.supportsCreatingSummary = True
+        # batchTranslate() can be called from several threads at the same time. They all share self.session. See: maxConcurrentRequests
+        self.supportsConcurrentBatches = True
 
         # Set generic API variables for this engine.
         self.reachable = False  # Some sort of test to check if the server is reachable goes here. Maybe just try to get model/version and if they are returned, then the server is declared reachable?
@@ -352,6 +369,23 @@ class KoboldCppEngine:
         else:
             self._targetLanguageIsHalfWidth = defaultTargetLanguageIsHalfWidth 
 
+        if ( 'stablePrompt' in settings ) and ( isinstance( settings[ 'stablePrompt' ], bool ) ):
+            self._stablePrompt = settings[ 'stablePrompt' ]
+        else:
+            self._stablePrompt = defaultStablePrompt
+        # The full text of the last request plus its output. The next request can only reuse the part that starts the same way.
+        self._previousPrompt = None
+        # The number of tokens in self._previousPrompt, if known. See: _updatePromptStatistics()
+        self._previousPromptTokens = None
+        # Statistics about how much of the prompt KoboldCpp could reuse. See: printPromptStatistics()
+        self._promptStatistics = { 'requests' : 0, 'promptTokens' : 0, 'reusedTokens' : 0, 'processingSeconds' : 0.0 }
+        self._promptStatisticsLock = threading.Lock()
+        # Measuring needs at least one more request to KoboldCpp per line, so it is only done if asked for, like with --verbose.
+        if ( 'measurePromptReuse' in settings ) and ( isinstance( settings[ 'measurePromptReuse' ], bool ) ):
+            self._measurePromptReuse = settings[ 'measurePromptReuse' ]
+        else:
+            self._measurePromptReuse = False
+
         #debug=True
         if debug == True:
             print( str( settings ).encode( consoleEncoding ) )
@@ -401,15 +435,18 @@ class KoboldCppEngine:
         else:
             self.timeout = defaultTimeout
 
+        # Every request to the server uses this session, so the connection is kept open and reused.
+        self.session = functions.createSession( settings )
+
         # Update the generic API variables for this engine with the goal of defining self.reachable, a boolean, correctly.
         print( 'Connecting to KoboldCpp API at ' + self.addressFull + ' ... ', end='' )
         if ( self.address != None ) and ( self.port != None ):
             try:
-                self.model = requests.get( self.addressFull + '/api/v1/model', timeout=10 ).json()[ 'result' ]
+                self.model = self.session.get( self.addressFull + '/api/v1/model', timeout=10 ).json()[ 'result' ]
                 self._modelOnly = self.model.partition( '/' )[2].lower()
-                self.version = requests.get( self.addressFull + '/api/extra/version', timeout=10 ).json()
+                self.version = self.session.get( self.addressFull + '/api/extra/version', timeout=10 ).json()
                 self.version = self.version[ 'result' ] + '/' + self.version[ 'version' ]
-                self._maxContextLength = int( requests.get( self.addressFull + '/api/extra/true_max_context_length', timeout=10 ).json()[ 'value' ] )
+                self._maxContextLength = int( self.session.get( self.addressFull + '/api/extra/true_max_context_length', timeout=10 ).json()[ 'value' ] )
                 print( 'Success.')
                 # Moved to main program.
                 #print( ( 'koboldcpp model=' + self.model ).encode( consoleEncoding ) )
@@ -431,6 +468,23 @@ class KoboldCppEngine:
                 tempCharaString = tempCharaString + untranslatedName + '=' + translatedName + '\n'
             self.prompt = self.prompt.replace( r'{characterNames}' , tempCharaString )
 
+        # For stablePrompt, split the prompt into the part that never changes and the part that is repeated for every line.
+        # Everything before {history} is the prefix. Everything after it is the template for one line, like: [INST]{untranslatedText}[/INST]
+        if self.prompt.find( '{history}' ) != -1:
+            self._promptPrefix, unused, self._promptLineTemplate = self.prompt.partition( '{history}' )
+        elif self.prompt.find( '{untranslatedText}' ) != -1:
+            self._promptPrefix, unused, self._promptLineTemplate = self.prompt.partition( '{untranslatedText}' )
+            self._promptLineTemplate = '{untranslatedText}' + self._promptLineTemplate
+        else:
+            self._promptPrefix = self.prompt
+            self._promptLineTemplate = '{untranslatedText}'
+        # The template for one line should start on a new line. The translation goes right after it, so keep any new line at the end the same as in prompt.txt.
+        self._promptLineTemplate = self._promptLineTemplate.lstrip( '\n' )
+        if self._promptLineTemplate.find( '{untranslatedText}' ) == -1:
+            self._promptLineTemplate = self._promptLineTemplate + '{untranslatedText}'
+        if ( self._promptPrefix != '' ) and ( self._promptPrefix[ -1: ] != '\n' ):
+            self._promptPrefix = self._promptPrefix + '\n'
+
         # if the instruction format is not known, then try to figure it out from the model name.
         # Valid instruction formats are: autocomplete (default), instruct, chat
         if self.instructionFormat == None:
@@ -474,43 +528,161 @@ class KoboldCppEngine:
 
 
     # This expects a python list where every entry is a string.
+    # Several lines are packed into a single numbered prompt, like '1. Speaker: text', and the numbered output is parsed back into a list. Any line that cannot be matched back to its number is translated again using translate().
     def batchTranslate( self, untranslatedList, settings=None ):
-        print( 'Hello world!' )
-        return None
-
         #debug = True
         if debug == True:
             print( 'len( untranslatedList )=' , len( untranslatedList ) )
             print( ( 'untranslatedList=' + str( untranslatedList ) ).encode( consoleEncoding ) )
 
+        # Unpack some variables.
+        if isinstance( settings, dict ) == True:
+            if ( 'speakerList' in settings ) and ( isinstance( settings[ 'speakerList' ], list ) ) and ( len( settings[ 'speakerList' ] ) == len( untranslatedList ) ):
+                speakerList = settings[ 'speakerList' ]
+            else:
+                speakerList = [ None ] * len( untranslatedList )
+        else:
+            settings = {}
+            speakerList = [ None ] * len( untranslatedList )
+
         # Preprocess text.
+        preProcessedList = []
         for counter,entry in enumerate( untranslatedList ):
             #print( str( entry ).encode( consoleEncoding ) )
-            untranslatedList[ counter ] = self.preProcessText( entry )
+            preProcessedList.append( self.preProcessText( entry ) )
 
-        # Translate text.
+        # Translate text. Large batches are split into smaller requests so the prompt and the output both fit in the context window.
         translatedList = []
+        for startIndex in range( 0, len( preProcessedList ), defaultBatchLinesPerRequest ):
+            translatedList = translatedList + self._translateNumberedLines( preProcessedList[ startIndex : startIndex + defaultBatchLinesPerRequest ], untranslatedList[ startIndex : startIndex + defaultBatchLinesPerRequest ], speakerList[ startIndex : startIndex + defaultBatchLinesPerRequest ], settings=settings )
 
         if debug == True:
-            print( ( 'translatedListBeforePostProcessing=' + str( translatedList ) ).encode( consoleEncoding ) )
+            print( ( 'translatedList=' + str( translatedList ) ).encode( consoleEncoding ) )
 
         try:
             assert( len( untranslatedList ) == len( translatedList ) )
         except:
-            print( 'Warning: Server did not return same about entries sent to it. Returning None.' )
+            print( 'Warning: Batch translation did not return the same amount of entries sent to it. Returning None.' )
             print( 'len( untranslatedList )=' + str( len( untranslatedList ) ) )
             print( 'len( translatedList )=' + str( len( translatedList ) ) )
             return None
 
-        # Postprocess text.
-        for counter,entry in enumerate( translatedList ):
-            translatedList[ counter ] = self.postProcessText( entry, untranslatedList[ counter ] )
+        return translatedList
+
+
+    # Translates one request worth of lines. untranslatedList has already been preprocessed and originalList has the same entries as they were before preprocessing. Returns a list with the same length as untranslatedList. Entries that could not be translated at all are None.
+    def _translateNumberedLines( self, untranslatedList, originalList, speakerList, settings=None ):
+        if 'sceneSummary' in settings:
+            sceneSummary = settings[ 'sceneSummary' ]
+            if ( not isinstance( sceneSummary, str ) ) or ( sceneSummary == '' ):
+                sceneSummary = None
+            else:
+                sceneSummary = sceneSummary.replace( '\n',' ' )
+        else:
+            sceneSummary = None
+
+        for counter,speakerName in enumerate( speakerList ):
+            if ( not isinstance( speakerName, str ) ) or ( speakerName == '' ):
+                speakerList[ counter ] = None
+
+        # Build the numbered block. The speaker tags are part of the input so the LLM has the same information as with translate().
+        numberedText = batchInstruction
+        for counter,untranslatedString in enumerate( untranslatedList ):
+            if speakerList[ counter ] == None:
+                numberedText = numberedText + '\n' + str( counter + 1 ) + '. ' + untranslatedString
+            else:
+                numberedText = numberedText + '\n' + str( counter + 1 ) + '. ' + speakerList[ counter ] + ': ' + untranslatedString
+
+        # Build prompt. History is not supported for batches.
+        tempPrompt = self.prompt.replace( r'{history}', '' ).replace( '\n\n', '\n' ).replace( '\n\n', '\n' )
+        if tempPrompt.find( '{untranslatedText}' ) != -1:
+            tempPrompt = tempPrompt.replace( '{untranslatedText}', numberedText )
+        else:
+            tempPrompt = tempPrompt + numberedText
+
+        if ( sceneSummary != None ) and ( tempPrompt.find( r'{scene}' ) != -1 ):
+            tempPrompt = tempPrompt.replace( '{scene}', sceneSummary )
+        elif tempPrompt.find( r'{scene}' ) != -1:
+            tempPrompt = tempPrompt.replace( '{scene}', '' )
+
+        # Build request.
+        requestDictionary = {}
+        # Every line needs its own output tokens, but keep some room for the prompt itself.
+        requestDictionary[ 'max_length' ] = defaultBatchMaxLengthPerLine * len( untranslatedList )
+        if ( self._maxContextLength != None ) and ( requestDictionary[ 'max_length' ] > self._maxContextLength // 2 ):
+            requestDictionary[ 'max_length' ] = self._maxContextLength // 2
+        requestDictionary[ 'max_context_length' ] = self._maxContextLength
+        requestDictionary[ 'trim_stop' ] = True
+        # The output has one line per entry, so \n cannot be a stop sequence here.
+        requestDictionary[ 'stop_sequence' ] = stopSequenceList2
+
+        if ( sceneSummary != None ) and ( self.memory != None ) and ( self.memory.find( '{scene}' ) != -1 ):
+            tempMemory = self.memory.replace( '{scene}', sceneSummary )
+        elif ( self.memory != None ) and ( self.memory.find( '{scene}' ) != -1 ):
+            tempMemory = self.memory.replace( '{scene}', '' )
+        else:
+            tempMemory = self.memory
+
+        if tempMemory != None:
+            requestDictionary[ 'memory' ] = tempMemory
+        requestDictionary[ 'prompt' ] = tempPrompt
+
+        if self._modelOnly.find( 'gemma-2' ) != -1:
+            requestDictionary[ 'use_default_badwordsids' ] = True # if True, prevents EOS token from being generated.
 
         if debug == True:
-            print( ( 'translatedListAfterPostProcessing=' + str( translatedList ) ).encode( consoleEncoding ) )
+            print( str( requestDictionary ).encode( consoleEncoding ) )
+
+        if self._pastFirstTranslation == False:
+            currentTimeout = self.timeout * defaultTimeoutMulitplierForFirstRun
+        else:
+            currentTimeout = self.timeout
+
+        # numberedOutput is a dictionary of { lineNumber : rawTranslatedText }.
+        numberedOutput = {}
+        try:
+            returnedRequest = self.session.post( self.addressFull + '/api/v1/generate', json=requestDictionary, timeout=( 10, currentTimeout ) )
+            if ( returnedRequest.status_code == 200 ) and ( returnedRequest.json() != None ):
+                rawTranslatedText = returnedRequest.json()[ 'results' ][ 0 ][ 'text' ].strip()
+                if verbose == True:
+                    print( ( 'rawTranslatedText=' + rawTranslatedText ).encode( consoleEncoding ) )
+                for line in rawTranslatedText.split( '\n' ):
+                    matchedLine = numberedLinePattern.match( line )
+                    if matchedLine == None:
+                        continue
+                    lineNumber = int( matchedLine.group( 1 ) )
+                    # Only keep the first answer for each number. The LLM sometimes repeats itself at the end.
+                    if ( lineNumber >= 1 ) and ( lineNumber <= len( untranslatedList ) ) and ( lineNumber not in numberedOutput ):
+                        numberedOutput[ lineNumber ] = matchedLine.group( 2 )
+            else:
+                print( 'Warning: Unable to translate batch. Status code:' + str( returnedRequest.status_code ) )
+        except KeyboardInterrupt:
+            raise
+        except Exception as exception:
+            print( ( 'Warning: Unable to translate batch. ' + str( exception ) ).encode( consoleEncoding ) )
+
+        if self._pastFirstTranslation == False:
+            self._pastFirstTranslation = True
+
+        # Postprocess text. Lines that were not returned or that are empty after post processing are translated again one at a time.
+        translatedList = []
+        fallbackCount = 0
+        for counter,untranslatedString in enumerate( untranslatedList ):
+            translatedText = None
+            if ( counter + 1 ) in numberedOutput:
+                translatedText = self.postProcessText( numberedOutput[ counter + 1 ], originalList[ counter ], speakerList[ counter ] )
 
-        return None
-        #return translatedList
+            if translatedText == None:
+                fallbackCount += 1
+                tempSettings = { 'speakerName' : speakerList[ counter ], 'sceneSummary' : sceneSummary }
+                # translate() preprocesses the text itself, so it must get the original entry.
+                translatedText = self.translate( originalList[ counter ], settings=tempSettings )
+            translatedList.append( translatedText )
+
+        if ( verbose == True ) and ( fallbackCount > 0 ):
+            print( 'Batch lines translated individually: ' + str( fallbackCount ) + '/' + str( len( untranslatedList ) ) )
+
+        return translatedList
 
 
     # This expects a string to translate.
@@ -570,74 +742,77 @@ class KoboldCppEngine:
         # { 'results' : [ {'text': '\n\nBien, gracias.'} ] }
 
         # Build prompt.
-        # First build history string from history list. contextHistory is a collections.queue that has lists of untranslated and translated pairs in tuples for each entry.
-        # contextHistory= [  ( untranslatedString1, translatedString2, speaker ), ( uString1, tString2, None ), ( uString1, tString2, speaker )  ]
-        # Hummmm. Maybe update the code below with buildStringFromHistory() to hide the underlying complicated logic and maintain clarity here?
-        #def buildStringFromHistory( self, contextHistory=None ):
-        if contextHistory == None:
-            tempHistory = None
+        if self._stablePrompt == True:
+            tempPrompt = self._buildStablePrompt( untranslatedString, speakerName=speakerName, contextHistory=contextHistory, sceneSummary=sceneSummary )
         else:
-            tempHistory = ''
-            for entry in contextHistory:
-                if self.instructionFormat == 'instruct':
-                    if entry[ 2 ] == None:
-                        if instructSequenceIsAlsoForLLMOutput == False:
-                            tempHistory = tempHistory + self._instructModelStartSequence + entry[ 0 ] + self._instructModelEndSequence + '\n' + entry[ 1 ] + '\n'
-                        #elif instructSequenceIsAlsoForLLMOutput == True
+            # First build history string from history list. contextHistory is a collections.queue that has lists of untranslated and translated pairs in tuples for each entry.
+            # contextHistory= [  ( untranslatedString1, translatedString2, speaker ), ( uString1, tString2, None ), ( uString1, tString2, speaker )  ]
+            # Hummmm. Maybe update the code below with buildStringFromHistory() to hide the underlying complicated logic and maintain clarity here?
+            #def buildStringFromHistory( self, contextHistory=None ):
+            if contextHistory == None:
+                tempHistory = None
+            else:
+                tempHistory = ''
+                for entry in contextHistory:
+                    if self.instructionFormat == 'instruct':
+                        if entry[ 2 ] == None:
+                            if instructSequenceIsAlsoForLLMOutput == False:
+                                tempHistory = tempHistory + self._instructModelStartSequence + entry[ 0 ] + self._instructModelEndSequence + '\n' + entry[ 1 ] + '\n'
+                            #elif instructSequenceIsAlsoForLLMOutput == True
+                            else:
+                                # then append the sequence to the output as well.
+                                tempHistory = tempHistory + self._instructModelStartSequence + entry[ 0 ] + self._instructModelEndSequence + '\n' + self._instructModelStartSequence + entry[ 1 ] + self._instructModelEndSequence + '\n'
                         else:
-                            # then append the sequence to the output as well.
-                            tempHistory = tempHistory + self._instructModelStartSequence + entry[ 0 ] + self._instructModelEndSequence + '\n' + self._instructModelStartSequence + entry[ 1 ] + self._instructModelEndSequence + '\n'
-                    else:
-                        tempHistory = tempHistory + self._instructModelStartSequence + entry[ 2 ] + ': ' + entry[ 0 ] + self._instructModelEndSequence + entry[ 2 ] + ': ' + entry[ 1 ] + '\n'
-                elif self.instructionFormat == 'chat':
-                    if entry[ 2 ] == None:
-                        tempHistory = tempHistory + self._chatModelInputName + ': ' + entry[ 0 ] + '\n' + self._chatModelOutputName + ': ' + entry[ 1 ] + '\n'
+                            tempHistory = tempHistory + self._instructModelStartSequence + entry[ 2 ] + ': ' + entry[ 0 ] + self._instructModelEndSequence + entry[ 2 ] + ': ' + entry[ 1 ] + '\n'
+                    elif self.instructionFormat == 'chat':
+                        if entry[ 2 ] == None:
+                            tempHistory = tempHistory + self._chatModelInputName + ': ' + entry[ 0 ] + '\n' + self._chatModelOutputName + ': ' + entry[ 1 ] + '\n'
+                        else:
+                            tempHistory = tempHistory + self._chatModelInputName + ': ' + entry[ 2 ] + ': ' + entry[ 0 ] + '\n' + self._chatModelOutputName + ': ' + entry[ 2 ] + ': ' + entry[ 1 ] + '\n'
+                    elif self.instructionFormat == 'autocomplete':
+                        #TODO: format autocomplete model history here. How? Maybe just use same as chat syntax?
+                        pass
                     else:
-                        tempHistory = tempHistory + self._chatModelInputName + ': ' + entry[ 2 ] + ': ' + entry[ 0 ] + '\n' + self._chatModelOutputName + ': ' + entry[ 2 ] + ': ' + entry[ 1 ] + '\n'
-                elif self.instructionFormat == 'autocomplete':
-                    #TODO: format autocomplete model history here. How? Maybe just use same as chat syntax?
-                    pass
+                        print( ( 'Warning: Uncrecognized instructionFormat' + str( self.instructionFormat ) ).encode( consoleEncoding ) )
+                # if the last character is a \n, then remove it.
+                if tempHistory[ len( tempHistory ) - 1 : ] == '\n':
+                    tempHistory = tempHistory[ : -1 ]
+
+            # Next build tempPrompt using history string based on {history} tag in prompt.
+            if self.prompt.find( '{history}' ) != -1:
+                if tempHistory != None:
+                    tempPrompt = self.prompt.replace( r'{history}', tempHistory ).replace( '\n\n', '\n' ).replace( '\n\n', '\n' )
                 else:
-                    print( ( 'Warning: Uncrecognized instructionFormat' + str( self.instructionFormat ) ).encode( consoleEncoding ) )
-            # if the last character is a \n, then remove it.
-            if tempHistory[ len( tempHistory ) - 1 : ] == '\n':
-                tempHistory = tempHistory[ : -1 ]
-
-        # Next build tempPrompt using history string based on {history} tag in prompt.
-        if self.prompt.find( '{history}' ) != -1:
-            if tempHistory != None:
-                tempPrompt = self.prompt.replace( r'{history}', tempHistory ).replace( '\n\n', '\n' ).replace( '\n\n', '\n' )
+                    tempPrompt = self.prompt.replace( r'{history}', '' ).replace( '\n\n', '\n' ).replace( '\n\n', '\n' )
             else:
-                tempPrompt = self.prompt.replace( r'{history}', '' ).replace( '\n\n', '\n' ).replace( '\n\n', '\n' )
-        else:
-            tempPrompt = self.prompt
-            if verbose == True:
-                print( r'Warning: Unable to insert history. To use contextHistory, make sure {history} is in the prompt.' )
+                tempPrompt = self.prompt
+                if verbose == True:
+                    print( r'Warning: Unable to insert history. To use contextHistory, make sure {history} is in the prompt.' )
 
-        # Speakers are no longer being processed like this. The name of the speaker is now integrated into the instruction 
+            # Speakers are no longer being processed like this. The name of the speaker is now integrated into the instruction 
 #        if tempPrompt.find( r'{speaker}' ) != -1:
 #            if speakerName != None:
 #                tempPrompt = tempPrompt.replace( r'{speaker}', ' by ' + speakerName )
 #            else:
 #                tempPrompt = tempPrompt.replace( r'{speaker}','')
 
-        if tempPrompt.find( '{untranslatedText}' ) != -1:
-            if speakerName == None:
-                tempPrompt = tempPrompt.replace( '{untranslatedText}', untranslatedString )
-            else:
-                tempPrompt = tempPrompt.replace( '{untranslatedText}', str( speakerName ) + ': ' + untranslatedString )
-        else:
-            if speakerName == None:
-                tempPrompt = tempPrompt + untranslatedString
+            if tempPrompt.find( '{untranslatedText}' ) != -1:
+                if speakerName == None:
+                    tempPrompt = tempPrompt.replace( '{untranslatedText}', untranslatedString )
+                else:
+                    tempPrompt = tempPrompt.replace( '{untranslatedText}', str( speakerName ) + ': ' + untranslatedString )
             else:
-                tempPrompt = tempPrompt + str(speakerName) + ': ' + untranslatedString
+                if speakerName == None:
+                    tempPrompt = tempPrompt + untranslatedString
+                else:
+                    tempPrompt = tempPrompt + str(speakerName) + ': ' + untranslatedString
 
-        #if sceneSummary != None and {scene} is in prompt.txt
-        if ( sceneSummary != None ) and ( tempPrompt.find( r'{scene}' ) != -1 ):
-            # Then update prompt.txt to have the scene.
-            tempPrompt = tempPrompt.replace( '{scene}', sceneSummary )
-        elif tempPrompt.find( r'{scene}' ) != -1:
-            tempPrompt = tempPrompt.replace( '{scene}', '' )
+            #if sceneSummary != None and {scene} is in prompt.txt
+            if ( sceneSummary != None ) and ( tempPrompt.find( r'{scene}' ) != -1 ):
+                # Then update prompt.txt to have the scene.
+                tempPrompt = tempPrompt.replace( '{scene}', sceneSummary )
+            elif tempPrompt.find( r'{scene}' ) != -1:
+                tempPrompt = tempPrompt.replace( '{scene}', '' )
 
         # Build request.
         requestDictionary = {}
@@ -706,7 +881,7 @@ class KoboldCppEngine:
             currentTimeout = self.timeout
 
         try:
-            returnedRequest = requests.post( self.addressFull + '/api/v1/generate', json=requestDictionary, timeout=( 10, currentTimeout ) )
+            returnedRequest = self.session.post( self.addressFull + '/api/v1/generate', json=requestDictionary, timeout=( 10, currentTimeout ) )
         except:
             print( ( 'Error: unable to translate the following: '+ untranslatedString ).encode( consoleEncoding ) )
             raise
@@ -727,6 +902,9 @@ class KoboldCppEngine:
         # { 'results' : [ { 'text' : '\n\nBien, gracias.' } ] }
         translatedText = returnedRequest.json()[ 'results' ][ 0 ][ 'text' ].strip()
 
+        if self._stablePrompt == True:
+            self._updatePromptStatistics( requestDictionary, translatedText )
+
         #verbose = True
         if verbose == True:
             print( ( 'rawTranslatedText=' + translatedText ).encode( consoleEncoding ) )
@@ -743,6 +921,103 @@ class KoboldCppEngine:
         return translatedText
 
 
+    # Builds the prompt for stablePrompt. The result always starts with self._promptPrefix, followed by every history entry and then the current line, all formatted with the same line template.
+    # As long as contextHistory only grows, every prompt starts with the entire previous prompt, so KoboldCpp only needs to process the newest line.
+    def _buildStablePrompt( self, untranslatedString, speakerName=None, contextHistory=None, sceneSummary=None ):
+        tempPrompt = self._promptPrefix
+        if contextHistory != None:
+            for entry in contextHistory:
+                # contextHistory has the raw untranslated text, so process it the same way as the current line or the text will not match the previous request.
+                tempPrompt = tempPrompt + self._formatStableLine( self.preProcessText( entry[ 0 ] ), entry[ 2 ] )
+                if entry[ 2 ] == None:
+                    tempPrompt = tempPrompt + entry[ 1 ] + '\n'
+                else:
+                    tempPrompt = tempPrompt + entry[ 2 ] + ': ' + entry[ 1 ] + '\n'
+        tempPrompt = tempPrompt + self._formatStableLine( untranslatedString, speakerName )
+
+        # The scene summary only changes between batches, so it is part of the stable prefix.
+        if ( sceneSummary != None ) and ( tempPrompt.find( r'{scene}' ) != -1 ):
+            tempPrompt = tempPrompt.replace( '{scene}', sceneSummary )
+        elif tempPrompt.find( r'{scene}' ) != -1:
+            tempPrompt = tempPrompt.replace( '{scene}', '' )
+        return tempPrompt
+
+
+    def _formatStableLine( self, untranslatedString, speakerName=None ):
+        if ( speakerName == None ) or ( speakerName == '' ):
+            return self._promptLineTemplate.replace( '{untranslatedText}', untranslatedString )
+        else:
+            return self._promptLineTemplate.replace( '{untranslatedText}', str( speakerName ) + ': ' + untranslatedString )
+
+
+    # Compares the prompt that was just submitted with the previous one. KoboldCpp keeps the processed tokens from the last request and only processes the part after the first difference.
+    # The number of tokens in the entire prompt is read from /api/extra/perf. That also has the number of output tokens, so if the new prompt starts with the entire previous prompt, then the number of reused tokens is already known. /api/extra/tokencount is only used when the prompt changed, like when contextHistory was reset or the sceneSummary changed. If any request fails, measuring is disabled.
+    def _updatePromptStatistics( self, requestDictionary, rawTranslatedText ):
+        if 'memory' in requestDictionary:
+            fullPrompt = requestDictionary[ 'memory' ] + requestDictionary[ 'prompt' ]
+        else:
+            fullPrompt = requestDictionary[ 'prompt' ]
+
+        # With maxConcurrentRequests, several threads can finish at the same time, so only one of them updates the statistics and self._previousPrompt at a time.
+        with self._promptStatisticsLock:
+            promptTokens = None
+            outputTokens = None
+            if self._measurePromptReuse == True:
+                try:
+                    perf = self.session.get( self.addressFull + '/api/extra/perf', timeout=10 ).json()
+                    if self._previousPrompt == None:
+                        reusedTokens = 0
+                    else:
+                        sharedPrompt = os.path.commonprefix( [ self._previousPrompt, fullPrompt ] )
+                        if sharedPrompt == '':
+                            reusedTokens = 0
+                        elif ( sharedPrompt == self._previousPrompt ) and ( self._previousPromptTokens != None ):
+                            reusedTokens = self._previousPromptTokens
+                        else:
+                            reusedTokens = int( self.session.post( self.addressFull + '/api/extra/tokencount', json={ 'prompt' : sharedPrompt }, timeout=10 ).json()[ 'value' ] )
+
+                    if 'last_input_count' in perf:
+                        promptTokens = int( perf[ 'last_input_count' ] )
+                    else:
+                        promptTokens = int( self.session.post( self.addressFull + '/api/extra/tokencount', json={ 'prompt' : fullPrompt }, timeout=10 ).json()[ 'value' ] )
+                    if 'last_token_count' in perf:
+                        outputTokens = int( perf[ 'last_token_count' ] )
+
+                    self._promptStatistics[ 'requests' ] += 1
+                    self._promptStatistics[ 'promptTokens' ] += promptTokens
+                    self._promptStatistics[ 'reusedTokens' ] += min( reusedTokens, promptTokens )
+                    if 'last_process' in perf:
+                        self._promptStatistics[ 'processingSeconds' ] += float( perf[ 'last_process' ] )
+
+                    if verbose == True:
+                        print( 'Reused ' + str( reusedTokens ) + '/' + str( promptTokens ) + ' prompt tokens.' )
+                except KeyboardInterrupt:
+                    raise
+                except Exception as exception:
+                    print( ( 'Warning: Unable to measure prompt reuse. Disabling measurement. ' + str( exception ) ).encode( consoleEncoding ) )
+                    self._measurePromptReuse = False
+                    promptTokens = None
+
+            # KoboldCpp also keeps the output in its context, so the next prompt can reuse that part too.
+            self._previousPrompt = fullPrompt + rawTranslatedText
+            if ( promptTokens != None ) and ( outputTokens != None ):
+                self._previousPromptTokens = promptTokens + outputTokens
+            else:
+                self._previousPromptTokens = None
+
+
+    def printPromptStatistics( self ):
+        if self._promptStatistics[ 'requests' ] == 0:
+            return
+        promptTokens = self._promptStatistics[ 'promptTokens' ]
+        reusedTokens = self._promptStatistics[ 'reusedTokens' ]
+        if promptTokens > 0:
+            reusedPercent = round( reusedTokens / promptTokens * 100, 1 )
+        else:
+            reusedPercent = 0
+        print( 'KoboldCpp prompt reuse: requests=' + str( self._promptStatistics[ 'requests' ] ) + ' promptTokens=' + str( promptTokens ) + ' reusedTokens=' + str( reusedTokens ) + ' (' + str( reusedPercent ) + '%) promptProcessingTime=' + str( round( self._promptStatistics[ 'processingSeconds' ], 1 ) ) + 's' )
+
+
     def getSceneSummary(self, untranslatedList, settings=None):
         assert( self.sceneSummaryPrompt != None )
 
@@ -785,7 +1060,7 @@ class KoboldCppEngine:
         # This probably should not be hard coded.
         requestDictionary[ 'prompt' ] = self.sceneSummaryPrompt.replace( '{scene}', tempString[ : -1 ] ) # The prompt. The -1 removes the last newline.
 
-        returnedRequest = requests.post( self.addressFull + '/api/v1/generate', json=requestDictionary, timeout=( 10, int ( self.timeout * defaultTimeoutMulitplierForSceneSummary ) ) )
+        returnedRequest = self.session.post( self.addressFull + '/api/v1/generate', json=requestDictionary, timeout=( 10, int ( self.timeout * defaultTimeoutMulitplierForSceneSummary ) ) )
 
         if returnedRequest.status_code != 200:
             print( ( 'Unable to generate summary from following prompt: \'' + str( requestDictionary[ 'prompt' ] ) + '\'' ).encode( consoleEncoding ) )
@@ -836,6 +1111,7 @@ class KoboldCppEngine:
 
         return tempString
 
+
 """
 
 
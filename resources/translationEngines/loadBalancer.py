@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: This library wraps several instances of the same translation engine, each one connected to a different server, and exposes them as a single translation engine. Every call to translate(), batchTranslate(), or getSceneSummary() goes to the server with the fewest requests currently in progress. If a server stops responding, it is ignored for a while and then tried again.
+Servers that could not be reached at startup are handled the same way. Every defaultEjectTime seconds, a new translation engine is created for them using createEngine. Once that works and the server has the same model as the others, it is used like any other server.
+All of the servers must have the same model loaded. Otherwise the translations would be written to the cache and mainSpreadsheet under the wrong model name.
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+# The number of seconds a server is ignored after a request to it fails. After that, it is tried again.
+defaultEjectTime = 60
+
+import sys
+import threading                 # The counters are shared by every thread submitting requests.
+import time
+import requests                 # Only used to recognize connection errors.
+
+
+class LoadBalancerEngine:
+    # engineList is a list of translation engines that were already initialized, one for each server.
+    # createEngine is a function that takes the index of a server in engineList and returns a new translation engine for that server. It is used to connect again to servers that were not reachable at startup. if it is None, then those servers are never used.
+    def __init__( self, engineList, createEngine=None ):
+        self.engineList = engineList
+        self.createEngine = createEngine
+        self.addressList = []
+        for engine in self.engineList:
+            self.addressList.append( str( getattr( engine, 'addressFull', None ) ) )
+
+        reachableEngines = []
+        for engine in self.engineList:
+            if engine.reachable == True:
+                reachableEngines.append( engine )
+        self.reachable = len( reachableEngines ) > 0
+        if self.reachable == True:
+            firstEngine = reachableEngines[ 0 ]
+        else:
+            firstEngine = self.engineList[ 0 ]
+
+        # Set generic API static values. These are the same for every instance of the same engine.
+        self.supportsBatches = firstEngine.supportsBatches
+        self.supportsHistory = firstEngine.supportsHistory
+        self.requiresPrompt = firstEngine.requiresPrompt
+        self.promptOptional = firstEngine.promptOptional
+        self.supportsCreatingSummary = firstEngine.supportsCreatingSummary
+        self.supportsConcurrentBatches = True
+        for engine in self.engineList:
+            if getattr( engine, 'supportsConcurrentBatches', False ) != True:
+                self.supportsConcurrentBatches = False
+
+        self.model = firstEngine.model
+        self.version = firstEngine.version
+
+        # Every server must have the same model.
+        for counter,engine in enumerate( self.engineList ):
+            if ( engine.reachable == True ) and ( engine.model != self.model ):
+                print( ( 'Error: All servers must have the same model loaded. ' + self.addressList[ 0 ] + ' has \'' + str( self.model ) + '\' but ' + self.addressList[ counter ] + ' has \'' + str( engine.model ) + '\'' ).encode( consoleEncoding ) )
+                sys.exit( 1 )
+
+        # The number of requests currently in progress for each server.
+        self._outstandingRequests = [ 0 ] * len( self.engineList )
+        # The time until which each server should not be used. For servers that are not usable yet, this is the time to try connecting to them again.
+        self._ejectedUntil = [ 0 ] * len( self.engineList )
+        # Servers that could not be reached at startup never reported a model, so they cannot be verified and are not used until connecting to them again works. See: _reconnect()
+        self._usable = []
+        for engine in self.engineList:
+            self._usable.append( engine.reachable == True )
+        # True while _reconnect() is connecting to that server, so only one thread tries at a time.
+        self._reconnecting = [ False ] * len( self.engineList )
+        self._lock = threading.Lock()
+
+        for counter,usable in enumerate( self._usable ):
+            if usable == False:
+                if self.createEngine == None:
+                    print( ( 'Warning: Unable to connect to ' + self.addressList[ counter ] + ' It will not be used.' ).encode( consoleEncoding ) )
+                else:
+                    self._ejectedUntil[ counter ] = time.time() + defaultEjectTime
+                    print( ( 'Warning: Unable to connect to ' + self.addressList[ counter ] + ' Trying again in ' + str( defaultEjectTime ) + ' seconds.' ).encode( consoleEncoding ) )
+        print( 'Using ' + str( self._usable.count( True ) ) + '/' + str( len( self.engineList ) ) + ' servers.' )
+
+
+    # Connects again to every server that was not reachable at startup and is due to be tried again. This creates a new translation engine for that server, since engines that could not connect are not fully initialized.
+    def _reconnect( self ):
+        if self.createEngine == None:
+            return
+        with self._lock:
+            currentTime = time.time()
+            indexList = []
+            for index,usable in enumerate( self._usable ):
+                if ( usable == False ) and ( self._reconnecting[ index ] == False ) and ( self._ejectedUntil[ index ] <= currentTime ):
+                    self._reconnecting[ index ] = True
+                    indexList.append( index )
+
+        for index in indexList:
+            newEngine = None
+            try:
+                newEngine = self.createEngine( index )
+            except Exception as exception:
+                if debug == True:
+                    print( ( 'Unable to create translation engine for ' + self.addressList[ index ] + ': ' + str( exception ) ).encode( consoleEncoding ) )
+            with self._lock:
+                self._reconnecting[ index ] = False
+                if ( newEngine == None ) or ( newEngine.reachable != True ):
+                    self._ejectedUntil[ index ] = time.time() + defaultEjectTime
+                    continue
+                if newEngine.model != self.model:
+                    self._ejectedUntil[ index ] = time.time() + defaultEjectTime
+                    print( ( 'Warning: ' + self.addressList[ index ] + ' has \'' + str( newEngine.model ) + '\' but the other servers have \'' + str( self.model ) + '\' It will not be used.' ).encode( consoleEncoding ) )
+                    continue
+                self.engineList[ index ] = newEngine
+                self._ejectedUntil[ index ] = 0
+                self._usable[ index ] = True
+                print( ( 'Info: Connected to ' + self.addressList[ index ] + ' Using ' + str( self._usable.count( True ) ) + '/' + str( len( self.engineList ) ) + ' servers.' ).encode( consoleEncoding ) )
+
+
+    # Returns the index of the server to use for the next request and marks it as busy.
+    # Ties go to the server with the lowest index, so requests sent one at a time keep going to the same server. That keeps any prompt cache on that server useful.
+    def _acquire( self ):
+        with self._lock:
+            currentTime = time.time()
+            candidates = []
+            for index,usable in enumerate( self._usable ):
+                if ( usable == True ) and ( self._ejectedUntil[ index ] <= currentTime ):
+                    candidates.append( index )
+            # if every server was ejected, then try the one that was ejected first instead of waiting.
+            if len( candidates ) == 0:
+                candidates = [ index for index,usable in enumerate( self._usable ) if usable == True ]
+                candidates = [ min( candidates, key=lambda index : self._ejectedUntil[ index ] ) ]
+
+            index = min( candidates, key=lambda index : ( self._outstandingRequests[ index ], index ) )
+            self._outstandingRequests[ index ] += 1
+            return index
+
+
+    def _release( self, index, failed=False ):
+        with self._lock:
+            self._outstandingRequests[ index ] -= 1
+            if failed == True:
+                self._ejectedUntil[ index ] = time.time() + defaultEjectTime
+                print( ( 'Warning: ' + self.addressList[ index ] + ' did not respond. Ignoring it for ' + str( defaultEjectTime ) + ' seconds.' ).encode( consoleEncoding ) )
+            elif self._ejectedUntil[ index ] != 0:
+                self._ejectedUntil[ index ] = 0
+                if verbose == True:
+                    print( ( 'Info: ' + self.addressList[ index ] + ' is responding again.' ).encode( consoleEncoding ) )
+
+
+    # Submits the request to the least busy server. if that server cannot be reached, then try the next one. Only give up after every server has failed once.
+    # Every request is always released, even if the engine raised something other than a network error, like a JSONDecodeError. Only network errors eject the server.
+    def _submit( self, functionName, *args, **kwargs ):
+        self._reconnect()
+        failedAttempts = 0
+        while True:
+            index = self._acquire()
+            if debug == True:
+                print( ( functionName + ' -> ' + self.addressList[ index ] ).encode( consoleEncoding ) )
+            failed = False
+            try:
+                result = getattr( self.engineList[ index ], functionName )( *args, **kwargs )
+            except ( requests.exceptions.ConnectionError, requests.exceptions.Timeout ):
+                failed = True
+                failedAttempts += 1
+                if failedAttempts >= self._usable.count( True ):
+                    raise
+                continue
+            finally:
+                self._release( index, failed=failed )
+            return result
+
+
+    def translate( self, untranslatedString, settings=None ):
+        return self._submit( 'translate', untranslatedString, settings=settings )
+
+
+    def batchTranslate( self, untranslatedList, settings=None ):
+        return self._submit( 'batchTranslate', untranslatedList, settings=settings )
+
+
+    def getSceneSummary( self, untranslatedList, settings=None ):
+        return self._submit( 'getSceneSummary', untranslatedList, settings=settings )
+
+
+    # For KoboldCpp with stablePrompt.
+    def printPromptStatistics( self ):
+        for counter,engine in enumerate( self.engineList ):
+            if ( self._usable[ counter ] == True ) and ( hasattr( engine, 'printPromptStatistics' ) ):
+                print( self.addressList[ counter ] + ': ', end='' )
+                engine.printPromptStatistics()
+
+
+    # For adaptiveBatchSize. Every server has its own batch size, so print all of them.
+    def printBatchSizeStatistics( self ):
+        for engine in self.engineList:
+            if hasattr( engine, 'printBatchSizeStatistics' ):
+                engine.printBatchSizeStatistics()
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources/translationEngines':
+
+import resources.translationEngines.py3translationServerEngine as py3translationServerEngine
+import resources.translationEngines.loadBalancer as loadBalancer
+
+serverList = [ ( 'http://192.168.0.100', 14366 ), ( 'http://192.168.0.101', 14366 ) ]
+def createEngine( index ):
+    return py3translationServerEngine.Py3translationServerEngine( sourceLanguage=sourceLanguage, targetLanguage=targetLanguage, settings={ 'address' : serverList[ index ][ 0 ], 'port' : serverList[ index ][ 1 ] } )
+
+engineList = [ createEngine( index ) for index in range( len( serverList ) ) ]
+translationEngine = loadBalancer.LoadBalancerEngine( engineList, createEngine=createEngine )
+translationEngine.model
+translationEngine.batchTranslate( [ 'untranslated line 1', 'untranslated line 2' ] )
+"""
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+"""
+Description: This library runs batchTranslate() of local translation engines, like pykakasi and cutlet, in several processes at the same time. These engines only use the CPU, and Python can only use one CPU core per process, so translating in a single process does not get any faster with more cores.
+
+Every worker process gets a copy of the translation engine and creates its own converter once when it starts. Batches are split into chunks, the chunks are sent to the workers, and the results are put back together in the same order as the batch.
+The translation engine must implement:
+- createConverter(): Creates whatever the engine needs to translate, like self.converter. This is called once in every worker.
+- __getstate__(): Returns self.__dict__ without the converter and without the EngineProcessPool, since those cannot be copied to other processes.
+- translate(): Translates a single string using the converter.
+
+Worker processes are started with 'spawn' on every OS, the same as on Windows, so the code behaves the same everywhere and is safe to use together with threads. The main program must use: if __name__ == '__main__':
+
+Usage: See below. Like at the bottom.
+
+Copyright (c) 2024 gdiaz384; License: See main program.
+
+"""
+__version__ = '2024.11.17'
+
+#set defaults
+#printStuff = True
+verbose = False
+debug = False
+consoleEncoding = 'utf-8'
+# Batches with fewer entries than this are translated in the current process since sending them to the workers would take longer than translating them.
+defaultMinimumBatchSize = 64
+# Every batch is split into this many chunks per worker, so workers that finish early can take another chunk instead of waiting.
+defaultChunksPerProcess = 4
+
+import os
+import multiprocessing
+
+# The translation engine of the current worker process. Set by _initializeWorker().
+_workerEngine = None
+
+
+def _initializeWorker( engine ):
+    global _workerEngine
+    engine.createConverter()
+    _workerEngine = engine
+
+
+def _translateChunk( untranslatedChunk ):
+    return [ _workerEngine.translate( entry ) for entry in untranslatedChunk ]
+
+
+class EngineProcessPool:
+    # if processes is 0 or None, then use one process for every CPU core.
+    def __init__( self, engine, processes=None, minimumBatchSize=defaultMinimumBatchSize ):
+        if ( processes == None ) or ( processes < 1 ):
+            processes = os.cpu_count() or 1
+        self.engine = engine
+        self.processes = processes
+        self.minimumBatchSize = minimumBatchSize
+        # The workers are only started when the first large batch is translated, so short jobs and --testRun do not wait for them.
+        self.pool = None
+
+
+    def _startPool( self ):
+        if verbose == True:
+            print( 'Info: Starting ' + str( self.processes ) + ' worker processes.' )
+        self.pool = multiprocessing.get_context( 'spawn' ).Pool( processes=self.processes, initializer=_initializeWorker, initargs=( self.engine, ) )
+
+
+    # Returns True if untranslatedList should be sent to the workers.
+    def shouldUse( self, untranslatedList ):
+        return ( self.processes > 1 ) and ( len( untranslatedList ) >= self.minimumBatchSize )
+
+
+    # Translates every entry in untranslatedList using the workers and returns the translations in the same order.
+    def batchTranslate( self, untranslatedList ):
+        if self.pool == None:
+            self._startPool()
+        chunkSize = max( 1, -( -len( untranslatedList ) // ( self.processes * defaultChunksPerProcess ) ) ) # Round up.
+        chunkList = [ untranslatedList[ startIndex : startIndex + chunkSize ] for startIndex in range( 0, len( untranslatedList ), chunkSize ) ]
+        if debug == True:
+            print( 'EngineProcessPool entries=' + str( len( untranslatedList ) ) + ' chunks=' + str( len( chunkList ) ) + ' chunkSize=' + str( chunkSize ) )
+
+        # map() always returns the results in the same order as chunkList.
+        translatedList = []
+        for translatedChunk in self.pool.map( _translateChunk, chunkList ):
+            translatedList.extend( translatedChunk )
+        return translatedList
+
+
+    def close( self ):
+        if self.pool != None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+"""
+Usage examples, assuming this library is in a subfolder named 'resources/translationEngines':
+
+import resources.translationEngines.processPool as processPool
+
+class MyEngine:
+    def createConverter( self ):
+        import mylibrary
+        self.converter = mylibrary.Converter()
+
+    def __getstate__( self ):
+        state = self.__dict__.copy()
+        state.pop( 'converter', None )
+        state.pop( 'processPool', None )
+        return state
+
+    def translate( self, untranslatedString, settings=None ):
+        return self.converter.convert( untranslatedString )
+
+myEngine = MyEngine()
+myEngine.createConverter()
+myEngine.processPool = processPool.EngineProcessPool( myEngine, processes=4 )
+if myEngine.processPool.shouldUse( untranslatedList ) == True:
+    translatedList = myEngine.processPool.batchTranslate( untranslatedList )
+myEngine.processPool.close()
+"""
@@ -8,7 +8,7 @@ Usage: See below. Like at the bottom.
 Copyright (c) 2024 gdiaz384; License: See main program.
 
 """
-__version__ = '2024.07.14'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -18,7 +18,10 @@ consoleEncoding = 'utf-8'
 defaultTimeout = 360
 
 import sys
+import time
 import requests
+import resources.functions as functions # For createSession().
+import resources.translationEngines.batchSizeTuner as batchSizeTuner # Picks the batch size for adaptiveBatchSize.
 
 
 class Py3translationServerEngine:
@@ -67,6 +70,8 @@ class Py3translationServerEngine:
         self.requiresPrompt = False
         self.promptOptional = False
         self.supportsCreatingSummary = False
+        # batchTranslate() can be called from several threads at the same time. They all share self.session. See: maxConcurrentRequests
+        self.supportsConcurrentBatches = True
 
         # Set generic API variables for this engine.
         self.model = None
@@ -86,6 +91,14 @@ class Py3translationServerEngine:
         else:
             self.timeout = defaultTimeout
 
+        # Every request to the server uses this session, so the connection is kept open and reused.
+        self.session = functions.createSession( settings )
+
+        # if adaptiveBatchSize == True, then batchTranslate() splits every batch into smaller batches and adjusts their size based on how long the server takes to translate them. See: batchSizeTuner.py
+        self.batchSizeTuner = None
+        if ( 'adaptiveBatchSize' in settings ) and ( settings[ 'adaptiveBatchSize' ] == True ):
+            self.batchSizeTuner = batchSizeTuner.BatchSizeTuner( minimumSize=settings[ 'adaptiveBatchSizeMinimum' ], maximumSize=settings[ 'adaptiveBatchSizeMaximum' ], targetLatency=settings[ 'adaptiveBatchSizeTargetLatency' ], name=self.addressFull + ' ' )
+
         self.reachable = False
         # Some sort of test to check if the server is reachable goes here. Maybe just try to get model/version and if they are returned, then the server is declared reachable?
 
@@ -94,8 +107,8 @@ class Py3translationServerEngine:
         print( 'Connecting to py3translationServer at ' + self.addressFull + ' ... ', end='')
         if ( self.address != None ) and ( self.port != None ):
             try:
-                self.model = requests.get( self.addressFull + '/api/v1/model', timeout=10 ).text
-                self.version = requests.get( self.addressFull + '/api/v1/version', timeout=10 ).text
+                self.model = self.session.get( self.addressFull + '/api/v1/model', timeout=10 ).text
+                self.version = self.session.get( self.addressFull + '/api/v1/version', timeout=10 ).text
                 print( 'Success.' )
             #except requests.exceptions.ConnectTimeout:
             except:
@@ -121,8 +134,10 @@ class Py3translationServerEngine:
             #print( str( entry ).encode( consoleEncoding ) )
             untranslatedList[ counter ] = self.preProcessText( entry )
 
-        # https://docs.python-requests.org/en/latest/user/advanced/#timeouts
-        translatedList = requests.post( self.addressFull, json = dict ( [ ( 'content' , untranslatedList ), ( 'message' , 'translate sentences') ] ), timeout=( 10, self.timeout ) ).json()
+        if self.batchSizeTuner == None:
+            translatedList = self.postBatch( untranslatedList )
+        else:
+            translatedList = self.adaptiveBatchTranslate( untranslatedList )
 
         if debug == True:
             print( ( 'translatedListBeforePostProcessing=' + str( translatedList ) ).encode( consoleEncoding ) )
@@ -145,6 +160,51 @@ class Py3translationServerEngine:
         return translatedList
 
 
+    # Sends the list to the server in a single request and returns whatever the server returned.
+    # if raiseForStatus == True, then raise requests.exceptions.HTTPError if the server returned an error, like 413 Payload Too Large, instead of trying to read the error as the translations.
+    def postBatch( self, untranslatedList, raiseForStatus=False ):
+        # https://docs.python-requests.org/en/latest/user/advanced/#timeouts
+        response = self.session.post( self.addressFull, json = dict ( [ ( 'content' , untranslatedList ), ( 'message' , 'translate sentences') ] ), timeout=( 10, self.timeout ) )
+        if raiseForStatus == True:
+            response.raise_for_status()
+        return response.json()
+
+
+    # Sends the list to the server as several smaller batches, one after another, using the batch size picked by self.batchSizeTuner. if a request times out, or the server says it was too large or failed to process it (413 or 5xx), then the batch size is reduced and the same lines are sent again.
+    # if the server cannot be reached at all, then smaller batches would not help, so the error is raised right away. That lets the load balancer send the batch to a different server.
+    def adaptiveBatchTranslate( self, untranslatedList ):
+        translatedList = []
+        currentIndex = 0
+        while currentIndex < len( untranslatedList ):
+            currentBatch = untranslatedList[ currentIndex : currentIndex + self.batchSizeTuner.getBatchSize() ]
+            startTime = time.perf_counter()
+            try:
+                translatedBatch = self.postBatch( currentBatch, raiseForStatus=True )
+            # ConnectTimeout is both a ConnectionError and a Timeout, so this must be checked first.
+            except requests.exceptions.ConnectionError:
+                raise
+            except ( requests.exceptions.Timeout, requests.exceptions.HTTPError ) as exception:
+                if isinstance( exception, requests.exceptions.HTTPError ) and ( exception.response.status_code != 413 ) and ( exception.response.status_code < 500 ):
+                    raise
+                # if the batch size cannot be reduced any further, then give up the same way as without adaptiveBatchSize.
+                if self.batchSizeTuner.recordFailure( len( currentBatch ) ) == False:
+                    raise
+                continue
+            self.batchSizeTuner.recordSuccess( len( currentBatch ), time.perf_counter() - startTime )
+
+            # The length of the entire list is checked by batchTranslate(), so stop here if any part is wrong.
+            if len( translatedBatch ) != len( currentBatch ):
+                return translatedBatch
+            translatedList.extend( translatedBatch )
+            currentIndex += len( currentBatch )
+        return translatedList
+
+
+    def printBatchSizeStatistics( self ):
+        if self.batchSizeTuner != None:
+            self.batchSizeTuner.printStatistics()
+
+
     # This expects a string to translate.
     def translate( self, untranslatedString, settings=None ):
         #assert type is a string
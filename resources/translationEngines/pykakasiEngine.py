@@ -20,7 +20,7 @@ This plugin uses the pykakasi library that is copyright (C) 2010-2024 by Hiroshi
 pykakasi is licensed as GNU GPLv3: https://codeberg.org/miurahr/pykakasi/src/branch/master/COPYING
 See the source code for additional details: https://codeberg.org/miurahr/pykakasi
 """
-__version__ = '2024.07.14'
+__version__ = '2024.11.17'
 
 #set defaults
 #printStuff = True
@@ -36,6 +36,7 @@ defaultRomajiFormat = 'hepburn'
 punctuationList = [ '。', '「', '」', '、', '…', '？', '♪']
 
 import sys
+import resources.translationEngines.processPool as processPool # Translates large batches in several processes at the same time.
 
 
 class PyKakasiEngine:
@@ -109,6 +110,7 @@ class PyKakasiEngine:
         self.requiresPrompt = False
         self.promptOptional = False
         self.supportsCreatingSummary = False
+        self.supportsConcurrentBatches = False
 
         # Set generic API variables for this engine.
         self.model = None
@@ -140,53 +142,16 @@ class PyKakasiEngine:
         self.version = None
         print( 'Importing pykakasi... ', end='' )
         try:
-            import pykakasi
+            import pykakasi # Only checks if pykakasi is installed. See: createConverter()
             try:
                 from importlib import metadata as importlib_metadata
             except ImportError:
                 import importlib_metadata
             self.version = importlib_metadata.distribution( 'pykakasi' ).version
             self.model = 'pykakasi/' + str( self.version ) + '/' + self.romajiFormat # pykakasi/2.2.1/hepburn, pykakasi/2.2.1/kunrei
-            self.kakasi = pykakasi.kakasi()
+            self.createConverter()
             print( 'Success.')
 
-            if ( self.romajiFormat == 'hepburn' ) or ( self.romajiFormat == 'kunrei' ) or ( self.romajiFormat == 'passport' ):
-                # Developer hard coded these for the old API, so have to match the case exactly.
-                if self.romajiFormat == 'hepburn':
-                    self.kakasi.setMode( 'r', 'Hepburn' )
-                elif self.romajiFormat == 'kunrei':
-                    self.kakasi.setMode( 'r', 'Kunrei' )
-                elif self.romajiFormat == 'passport':
-                    self.kakasi.setMode( 'r', 'Passport' )
-
-                # Convert all the things, but...
-                self.kakasi.setMode( 'H','a' ) # Hiragana.
-                self.kakasi.setMode( 'K','a' ) # Katakana.
-                self.kakasi.setMode( 'J','a' ) # Kanji.
-                self.kakasi.setMode( 'E','a' ) # E is full length roman characters. This converts them back to half length. The developer calls this option 'kigou' which means 'symbol.'
-                # ...leave well enough alone.
-                self.kakasi.setMode( 'a', None )
-
-            elif ( self.romajiFormat == 'hira' ):
-                #print('pie')
-                # Convert all the things, but...
-                #self.kakasi.setMode( 'H', None ) # Hiragana.
-                self.kakasi.setMode( 'K', 'H' ) # Katakana.
-                self.kakasi.setMode( 'J', 'H' ) # Kanji.
-                self.kakasi.setMode( 'E', 'H' ) # E is full length roman characters. This converts them back to half length.
-                self.kakasi.setMode( 'a', 'H' ) # Normal half-length roman characters.
-
-            elif (self.romajiFormat == 'kana'):
-                # Convert all the things, but...
-                self.kakasi.setMode( 'H', 'K' ) # Hiragana.
-                #self.kakasi.setMode( 'K', None ) # Katakana.
-                self.kakasi.setMode( 'J', 'K' ) # Kanji.
-                self.kakasi.setMode( 'E', 'K' ) # E is full length roman characters. This converts them back to half length.
-                self.kakasi.setMode( 'a', 'K' ) # Normal half-length roman characters.
-
-            # Add spaces to output.
-            self.kakasi.setMode( 's', True )
-
         #except requests.exceptions.ConnectTimeout:
         except ImportError:
             print( 'Failure.')
@@ -206,6 +171,71 @@ class PyKakasiEngine:
                 tempResult = self.kakasi.convert( key )[ 0 ][ self.romajiFormat ]
                 self.characterDictionaryRomajiToTargetLanguage[tempResult] = value
 
+        # if processes is more than 1, then large batches are translated by that many processes at the same time. 0 means one process per CPU core.
+        self.processPool = None
+        if ( 'processes' in settings ) and ( isinstance( settings[ 'processes' ], int ) ) and ( settings[ 'processes' ] != 1 ) and ( self.reachable == True ):
+            self.processPool = processPool.EngineProcessPool( self, processes=settings[ 'processes' ] )
+
+
+    # Creates self.kakasi and self.converter for the current romajiFormat. Every worker process of self.processPool calls this once when it starts.
+    def createConverter( self ):
+        import pykakasi
+        self.kakasi = pykakasi.kakasi()
+
+        if ( self.romajiFormat == 'hepburn' ) or ( self.romajiFormat == 'kunrei' ) or ( self.romajiFormat == 'passport' ):
+            # Developer hard coded these for the old API, so have to match the case exactly.
+            if self.romajiFormat == 'hepburn':
+                self.kakasi.setMode( 'r', 'Hepburn' )
+            elif self.romajiFormat == 'kunrei':
+                self.kakasi.setMode( 'r', 'Kunrei' )
+            elif self.romajiFormat == 'passport':
+                self.kakasi.setMode( 'r', 'Passport' )
+
+            # Convert all the things, but...
+            self.kakasi.setMode( 'H','a' ) # Hiragana.
+            self.kakasi.setMode( 'K','a' ) # Katakana.
+            self.kakasi.setMode( 'J','a' ) # Kanji.
+            self.kakasi.setMode( 'E','a' ) # E is full length roman characters. This converts them back to half length. The developer calls this option 'kigou' which means 'symbol.'
+            # ...leave well enough alone.
+            self.kakasi.setMode( 'a', None )
+
+        elif ( self.romajiFormat == 'hira' ):
+            #print('pie')
+            # Convert all the things, but...
+            #self.kakasi.setMode( 'H', None ) # Hiragana.
+            self.kakasi.setMode( 'K', 'H' ) # Katakana.
+            self.kakasi.setMode( 'J', 'H' ) # Kanji.
+            self.kakasi.setMode( 'E', 'H' ) # E is full length roman characters. This converts them back to half length.
+            self.kakasi.setMode( 'a', 'H' ) # Normal half-length roman characters.
+
+        elif (self.romajiFormat == 'kana'):
+            # Convert all the things, but...
+            self.kakasi.setMode( 'H', 'K' ) # Hiragana.
+            #self.kakasi.setMode( 'K', None ) # Katakana.
+            self.kakasi.setMode( 'J', 'K' ) # Kanji.
+            self.kakasi.setMode( 'E', 'K' ) # E is full length roman characters. This converts them back to half length.
+            self.kakasi.setMode( 'a', 'K' ) # Normal half-length roman characters.
+
+        # Add spaces to output.
+        self.kakasi.setMode( 's', True )
+
+        # The converter only has to be created once, not once per line.
+        self.converter = self.kakasi.getConverter()
+
+
+    # The converter cannot be copied to the worker processes, so each one creates its own. See: createConverter()
+    def __getstate__( self ):
+        state = self.__dict__.copy()
+        state.pop( 'kakasi', None )
+        state.pop( 'converter', None )
+        state.pop( 'processPool', None )
+        return state
+
+
+    def close( self ):
+        if self.processPool != None:
+            self.processPool.close()
+
 
     # This expects a python list where every entry is a string.
     def batchTranslate( self, untranslatedList, settings=None ):
@@ -214,9 +244,12 @@ class PyKakasiEngine:
             print( 'len(untranslatedList)=' , len( untranslatedList ) )
             print( ( 'untranslatedList=' + str( untranslatedList ) ).encode( consoleEncoding ) )
 
-        translatedList = []
-        for entry in untranslatedList:
-            translatedList.append( self.translate( entry ) )
+        if ( self.processPool != None ) and ( self.processPool.shouldUse( untranslatedList ) == True ):
+            translatedList = self.processPool.batchTranslate( untranslatedList )
+        else:
+            translatedList = []
+            for entry in untranslatedList:
+                translatedList.append( self.translate( entry ) )
 
         try:
             assert( len( untranslatedList ) == len( translatedList ) )
@@ -243,7 +276,7 @@ class PyKakasiEngine:
         #translatedString = self.kakasi.convert( untranslatedStringAfterPreProcessing )[ 0 ][ self.romajiFormat ]
 
         # Old API. Works.
-        translatedString = self.kakasi.getConverter().do( untranslatedStringAfterPreProcessing )
+        translatedString = self.converter.do( untranslatedStringAfterPreProcessing )
 
         return self.postProcessText( translatedString, untranslatedString )
 
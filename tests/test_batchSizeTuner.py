@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Run from the main folder with: python -m pytest tests
+import resources.translationEngines.batchSizeTuner as batchSizeTuner
+
+
+def test_slowStartDoublesBatchSize():
+    tuner = batchSizeTuner.BatchSizeTuner( minimumSize=1, maximumSize=1000, targetLatency=30, initialSize=16 )
+    # Every request takes 1 second, so lines per second doubles together with the batch size.
+    for expectedSize in [ 32, 64, 128 ]:
+        tuner.recordSuccess( tuner.getBatchSize(), 1 )
+        assert tuner.getBatchSize() == expectedSize
+    assert tuner.slowStart == True
+
+
+def test_additiveIncreaseAfterSlowStartEnds():
+    tuner = batchSizeTuner.BatchSizeTuner( minimumSize=1, maximumSize=1000, targetLatency=30, initialSize=16, increaseStep=8 )
+    tuner.recordSuccess( 16, 1 )
+    assert tuner.getBatchSize() == 32
+    # 32 lines took twice as long as 16 lines, so larger batches are no longer faster.
+    tuner.recordSuccess( 32, 2 )
+    assert tuner.slowStart == False
+    assert tuner.getBatchSize() == 40
+    tuner.recordSuccess( 40, 2 )
+    assert tuner.getBatchSize() == 48
+
+
+def test_smallRequestsDoNotChangeBatchSize():
+    tuner = batchSizeTuner.BatchSizeTuner( initialSize=16 )
+    tuner.recordSuccess( 3, 0.1 )
+    assert tuner.getBatchSize() == 16
+
+
+def test_halvesWhenSlowerThanTargetLatency():
+    tuner = batchSizeTuner.BatchSizeTuner( minimumSize=1, maximumSize=1000, targetLatency=30, initialSize=64 )
+    tuner.recordSuccess( 64, 31 )
+    assert tuner.getBatchSize() == 32
+    assert tuner.slowStart == False
+
+
+def test_failureHalvesUntilMinimumSize():
+    tuner = batchSizeTuner.BatchSizeTuner( minimumSize=4, maximumSize=1000, initialSize=16 )
+    assert tuner.recordFailure( 16 ) == True
+    assert tuner.getBatchSize() == 8
+    assert tuner.recordFailure( 8 ) == True
+    assert tuner.getBatchSize() == 4
+    # The floor was reached, so the caller must give up.
+    assert tuner.recordFailure( 4 ) == False
+    assert tuner.getBatchSize() == 4
+
+
+def test_batchSizeStaysWithinLimits():
+    tuner = batchSizeTuner.BatchSizeTuner( minimumSize=10, maximumSize=50, initialSize=40 )
+    tuner.recordSuccess( 40, 1 )
+    assert tuner.getBatchSize() == 50
+    tuner.recordSuccess( 50, 1000 )
+    assert tuner.getBatchSize() == 25
+    tuner.recordSuccess( 25, 1000 )
+    tuner.recordSuccess( 12, 1000 )
+    assert tuner.getBatchSize() == 10
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Run from the main folder with: python -m pytest tests
+import resources.dictionaryReplacer as dictionaryReplacer
+
+
+# The same str.find()/str.replace() loop that DictionaryReplacer replaced. Each key is applied to the whole line in dictionary order.
+def replaceSequentially( dictionary, string ):
+    for key,value in dictionary.items():
+        if string.find( key ) != -1:
+            string = string.replace( key, value )
+    return string
+
+
+def test_longestMatchWins():
+    dictionary = { 'New' : 'Old', 'New York' : 'NYC' }
+    replacer = dictionaryReplacer.DictionaryReplacer( dictionary )
+    assert replacer.replace( 'New York is New.' ) == 'NYC is Old.'
+    # The sequential loop replaces 'New' first, so 'New York' can never match.
+    assert replaceSequentially( dictionary, 'New York is New.' ) == 'Old York is Old.'
+
+
+def test_resultDoesNotDependOnKeyOrder():
+    string = 'cart car cat'
+    forward = dictionaryReplacer.DictionaryReplacer( { 'car' : '1', 'cart' : '2', 'cat' : '3' } )
+    backward = dictionaryReplacer.DictionaryReplacer( { 'cat' : '3', 'cart' : '2', 'car' : '1' } )
+    assert forward.replace( string ) == '2 1 3'
+    assert backward.replace( string ) == '2 1 3'
+
+
+def test_replacedTextIsNotSearchedAgain():
+    dictionary = { 'a' : 'b', 'b' : 'c' }
+    replacer = dictionaryReplacer.DictionaryReplacer( dictionary )
+    assert replacer.replace( 'ab' ) == 'bc'
+    # The sequential loop turns the new 'b' into 'c' too.
+    assert replaceSequentially( dictionary, 'ab' ) == 'cc'
+
+
+def test_sameResultAsSequentialWhenKeysDoNotOverlap():
+    dictionary = { '猫' : 'cat', '犬' : 'dog', '鳥' : 'bird' }
+    replacer = dictionaryReplacer.DictionaryReplacer( dictionary )
+    for string in [ '猫と犬', '鳥', '何もない', '' ]:
+        assert replacer.replace( string ) == replaceSequentially( dictionary, string )
+
+
+def test_reverseAndEmptyKeys():
+    reverseReplacer = dictionaryReplacer.DictionaryReplacer( { 'Ann' : '{name1}' }, reverse=True )
+    assert reverseReplacer.replace( '{name1} said hello.' ) == 'Ann said hello.'
+
+    emptyReplacer = dictionaryReplacer.DictionaryReplacer( { '' : 'x' } )
+    assert len( emptyReplacer ) == 0
+    assert emptyReplacer.replace( 'unchanged' ) == 'unchanged'
+    assert emptyReplacer.replace( None ) == None
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: UTF-8 -*-
+# Run from the main folder with: python -m pytest tests
+import pytest
+import resources.requestPacker as requestPacker
+
+
+def test_characterBudget():
+    entryList = [ 'a' * 30, 'b' * 30, 'c' * 30, 'd' * 10 ]
+    assert requestPacker.packRequests( entryList, maxCharacters=64 ) == [ ( 0, 2 ), ( 2, 4 ) ]
+
+
+def test_tokenBudget():
+    entryList = [ 'one two', 'three', 'four five six', 'seven' ]
+    countTokens = requestPacker.getTokenizer( 'words' )
+    assert requestPacker.packRequests( entryList, maxTokens=3, countTokens=countTokens ) == [ ( 0, 2 ), ( 2, 3 ), ( 3, 4 ) ]
+
+
+def test_defaultTokenizerCountsUtf8Bytes():
+    # Every Japanese character is 3 bytes in UTF-8.
+    entryList = [ 'あ', 'い', 'う' ]
+    assert requestPacker.packRequests( entryList, maxTokens=6 ) == [ ( 0, 2 ), ( 2, 3 ) ]
+
+
+def test_oversizedEntryIsSentAlone():
+    entryList = [ 'a' * 30, 'b' * 30, 'c' * 30, 'd' * 100, 'e' ]
+    assert requestPacker.packRequests( entryList, maxCharacters=64 ) == [ ( 0, 2 ), ( 2, 3 ), ( 3, 4 ), ( 4, 5 ) ]
+    # An oversized entry at the start still gets its own request.
+    assert requestPacker.packRequests( [ 'x' * 100 ], maxCharacters=64 ) == [ ( 0, 1 ) ]
+
+
+def test_bothBudgetsAndMaxEntries():
+    entryList = [ 'ab', 'cd', 'ef', 'gh' ]
+    assert requestPacker.packRequests( entryList, maxCharacters=100, maxTokens=4 ) == [ ( 0, 2 ), ( 2, 4 ) ]
+    assert requestPacker.packRequests( entryList, maxEntries=3 ) == [ ( 0, 3 ), ( 3, 4 ) ]
+
+
+def test_noLimitsAndEmptyList():
+    entryList = [ 'a', 'b', 'c' ]
+    assert requestPacker.packRequests( entryList ) == [ ( 0, 3 ) ]
+    assert requestPacker.packRequests( [] ) == []
+
+
+def test_unknownTokenizer():
+    with pytest.raises( ValueError ):
+        requestPacker.getTokenizer( 'notATokenizer' )